@@ -0,0 +1,363 @@
+"""Reproducible benchmarks for DatabaseManager and the viewer on synthetic data.
+
+    python benchmark.py [--sizes 10k,100k] [--output bench_results.json]
+                        [--baseline baseline.json --threshold 0.25] [--save-baseline baseline.json]
+
+Datasets are synthesized from grand-prix-race-winners.csv with a fixed seed and
+cached under .bench_cache/. GUI timings run MotoGPApp under
+QT_QPA_PLATFORM=offscreen and are skipped when PyQt5 is not installed.
+Exits with status 1 when an operation regresses past the threshold or a query plan
+falls back to a temporary sort.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+from columnar_snapshot import ColumnarSnapshot
+from database import DatabaseManager
+from migrations import deferred_insert_triggers, index_rider_names, query_plan, run_migrations
+from queries import SORT_COLUMNS, has_search_index, select_query
+
+
+SOURCE_CSV = "grand-prix-race-winners.csv"
+CACHE_DIR = ".bench_cache"
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+# Riders in a synthetic dataset; larger ones get one per RIDER_WINS rows, so wins per
+# rider stay in the range of the source (388 riders, 3083 wins).
+RIDER_POOL = 3000
+RIDER_WINS = 30
+# Rank r wins in proportion to 1 / r ** ZIPF_EXPONENT; 0.8 gives the top rider about
+# 4% of the wins, as in the source.
+ZIPF_EXPONENT = 0.8
+MAX_CAREER = 12
+
+
+class _Source:
+    """What synthetic datasets are drawn from.
+
+    For each class its seasons; for each (class, season) its circuits and
+    constructors, repeated once per win; and the real riders with their class,
+    seasons and country.
+    """
+
+    def __init__(self, csv_path):
+        self.seasons = defaultdict(set)
+        self.circuits = defaultdict(list)
+        self.constructors = defaultdict(list)
+        wins = Counter()
+        riders = defaultdict(lambda: {"classes": Counter(), "seasons": defaultdict(set), "country": None})
+        with open(csv_path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                class_name, season = row["Class"].replace("™", "").strip(), int(row["Season"])
+                self.seasons[class_name].add(season)
+                self.circuits[class_name, season].append(row["Circuit"])
+                self.constructors[class_name, season].append(row["Constructor"] or None)
+                rider = riders[row["Rider"]]
+                rider["classes"][class_name] += 1
+                rider["seasons"][class_name].add(season)
+                rider["country"] = rider["country"] or row["Country"] or None
+                wins[row["Rider"]] += 1
+        self.seasons = {class_name: sorted(seasons) for class_name, seasons in self.seasons.items()}
+        self.class_weights = Counter({class_name: len(values) for (class_name, _), values in self.circuits.items()})
+        # (name, class, career seasons, country), most wins first.
+        self.riders = []
+        for name, _ in wins.most_common():
+            rider = riders[name]
+            class_name = rider["classes"].most_common(1)[0][0]
+            self.riders.append((name, class_name, sorted(rider["seasons"][class_name]), rider["country"]))
+
+    def rider_pool(self, size, rng):
+        """The real riders, then made-up ones up to size.
+
+        A made-up rider has a real first and last name, a class picked by its share
+        of wins and a career of up to MAX_CAREER of that class's seasons.
+        """
+        pool = list(self.riders[:size])
+        names = {name for name, *_ in pool}
+        first_names = [rider[0].split()[0] for rider in self.riders]
+        last_names = [(rider[0].split()[-1], rider[3]) for rider in self.riders]
+        classes, weights = zip(*sorted(self.class_weights.items()))
+        while len(pool) < size:
+            last_name, country = rng.choice(last_names)
+            name = f"{rng.choice(first_names)} {last_name}"
+            if name in names:
+                name = f"{name} {len(pool)}"
+            names.add(name)
+            class_name = rng.choices(classes, weights)[0]
+            seasons = self.seasons[class_name]
+            length = min(rng.randint(1, MAX_CAREER), len(seasons))
+            start = rng.randrange(len(seasons) - length + 1)
+            pool.append((name, class_name, seasons[start:start + length], country))
+        return pool
+
+
+def generate_dataset(db_path, rows, seed=1949, csv_path=SOURCE_CSV, batch_size=100_000):
+    """Create db_path with `rows` synthetic winners.
+
+    Wins are spread over a pool of riders with Zipf-like weights (the real riders,
+    most successful first, then made-up ones). Each win falls in a season of the
+    rider's career, which lies within the seasons their class was held, at a
+    circuit and with a constructor that won in that class and season in the
+    source. A rider's repeat wins at one circuit in a season are numbered as
+    further races, so the natural key stays unique.
+    """
+    source = _Source(csv_path)
+    rng = random.Random(seed)
+    pool = source.rider_pool(max(RIDER_POOL, rows // RIDER_WINS), rng)
+    cumulative = list(itertools.accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, len(pool) + 1)))
+    wins = Counter()
+    for start in range(0, rows, batch_size):
+        wins.update(rng.choices(range(len(pool)), cum_weights=cumulative, k=min(batch_size, rows - start)))
+
+    conn = sqlite3.connect(db_path)
+    run_migrations(conn)
+    batch = []
+
+    def flush():
+        rng.shuffle(batch)
+        conn.execute("BEGIN")
+        with deferred_insert_triggers(conn):
+            conn.executemany("""
+                INSERT INTO grand_prix_race_winners (Season, Circuit, Class, Rider, Constructor, Country, Race)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+        conn.execute("COMMIT")
+        batch.clear()
+
+    for index in sorted(wins, key=lambda index: rng.random()):
+        rider, class_name, career, country = pool[index]
+        races = Counter()
+        for _ in range(wins[index]):
+            season = rng.choice(career)
+            circuit = rng.choice(source.circuits[class_name, season])
+            races[season, circuit] += 1
+            batch.append((season, circuit, class_name, rider, rng.choice(source.constructors[class_name, season]),
+                          country, races[season, circuit]))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    # Once, after every win is in, so the most successful rider keeps a shared name key.
+    conn.execute("BEGIN")
+    index_rider_names(conn)
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def dataset_path(label, seed):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # The version changes whenever generate_dataset does, so stale caches are not reused.
+    path = os.path.join(CACHE_DIR, f"winners_v3_{label}_{seed}.db")
+    if not os.path.exists(path):
+        print(f"Generating {label} dataset...", file=sys.stderr)
+        generate_dataset(path + ".tmp", SIZES[label], seed)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "min_ms": round(timings[0], 4),
+        "repeat": repeat,
+    }
+
+
+def bench_database(db_path, repeat):
+    db = DatabaseManager(db_path)
+    key = (1800, "Benchmark Ring", "MotoGP", "Bench Rider")
+    results = {}
+    state = {"inserted": False}
+
+    def insert():
+        db.insert_entry(*key, "Honda", "IT")
+        state["inserted"] = True
+
+    def update():
+        db.update_entry(*key, *key, "Yamaha", "ES")
+
+    def delete():
+        db.delete_entry(*key)
+        state["inserted"] = False
+
+    def cold_unique(getter):
+        def run():
+            db._value_cache.clear()
+            getter()
+        return run
+
+    results["select_all_entries"] = measure(lambda: db.select_all_entries(), max(1, repeat // 5))
+    results["select_all_entries_search"] = measure(lambda: db.select_all_entries("mugello"), repeat)
+    results["select_all_entries_class"] = measure(lambda: db.select_all_entries("", "Moto2"), max(1, repeat // 5))
+    results["count_entries"] = measure(lambda: db.count_entries(), repeat)
+    results["select_entries_window"] = measure(lambda: db.select_entries_window("", "All", 200, 0), repeat)
+    middle = db.count_entries() // 2
+    by_rider = (("Rider", False),)
+    results["select_entries_window_seek"] = measure(
+        lambda: db.select_entries_window("", "All", 200, middle, by_rider), repeat)
+    results["select_entries_window_seek_next"] = measure(
+        lambda: db.select_entries_window("", "All", 200, middle + 200, by_rider), repeat)
+    results["get_unique_classes"] = measure(cold_unique(db.get_unique_classes), repeat)
+    results["get_unique_countries"] = measure(cold_unique(db.get_unique_countries), repeat)
+
+    snapshot = ColumnarSnapshot.from_database(db)
+    results["snapshot_load"] = measure(lambda: ColumnarSnapshot.from_database(db), max(1, repeat // 5))
+    results["snapshot_class_window"] = measure(
+        lambda: (snapshot.count_entries("", "Moto2"), snapshot.select_entries_window("", "Moto2", 200, 0)), repeat)
+    results["snapshot_search_window"] = measure(
+        lambda: (snapshot.count_entries("mugello"), snapshot.select_entries_window("mugello", "All", 200, 0)), repeat)
+    db.add_change_listener(snapshot.apply_change)
+
+    write_timings = {"insert_entry": [], "update_entry": [], "delete_entry": []}
+    for _ in range(repeat):
+        for name, function in (("insert_entry", insert), ("update_entry", update), ("delete_entry", delete)):
+            started = time.perf_counter()
+            function()
+            write_timings[name].append((time.perf_counter() - started) * 1000)
+    for name, timings in write_timings.items():
+        timings.sort()
+        results[name] = {"median_ms": round(statistics.median(timings), 4),
+                         "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+                         "min_ms": round(timings[0], 4), "repeat": repeat}
+    if state["inserted"]:
+        db.delete_entry(*key)
+
+    plans = {}
+    fts_enabled = has_search_index(db.conn)
+    for name, (search_term, class_filter) in {"listing": ("", "All"), "class_filter": ("", "Moto2")}.items():
+        plans[name] = query_plan(db.conn, *select_query(search_term, class_filter, fts_enabled))
+    for column in SORT_COLUMNS:
+        for descending in (False, True):
+            order = ((column, descending),)
+            key = db.sort_key_at("", "All", middle, order)
+            plans[f"seek_{column.lower()}{'_desc' if descending else ''}"] = query_plan(
+                db.conn, *db.window_query("", "All", 200, order=order, after=tuple(key)))
+    db.close()
+    return results, plans
+
+
+def bench_gui(db_path, repeat):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtCore import QEventLoop
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None
+    from main import MotoGPApp
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    started = time.perf_counter()
+    window = MotoGPApp(db_path)
+    window.show()
+    app.processEvents()
+    results["startup_first_paint"] = {"median_ms": round((time.perf_counter() - started) * 1000, 4), "repeat": 1}
+    if window.db_manager is None:
+        loop = QEventLoop()
+        window.ready.connect(loop.quit)
+        loop.exec_()
+    results["startup"] = {"median_ms": round((time.perf_counter() - started) * 1000, 4), "repeat": 1}
+
+    def refresh(search_term="", class_filter="All"):
+        window.load_all_data(search_term, class_filter)
+        window.data_table.viewport().repaint()
+        app.processEvents()
+
+    results["load_all_data"] = measure(refresh, repeat)
+    results["load_all_data_search"] = measure(lambda: refresh("mugello"), repeat)
+    results["load_all_data_class"] = measure(lambda: refresh("", "Moto2"), repeat)
+    window.close()
+    app.processEvents()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Failures for medians past threshold against baseline, a --save-baseline or --output file."""
+    baseline = baseline.get("results", baseline)
+    regressions = []
+    compared = 0
+    for size, groups in results.items():
+        for group, operations in groups.items():
+            for operation, stats in operations.items():
+                base = baseline.get(size, {}).get(group, {}).get(operation)
+                if not base or not base.get("median_ms"):
+                    continue
+                compared += 1
+                ratio = stats["median_ms"] / base["median_ms"]
+                if ratio > 1 + threshold:
+                    regressions.append(f"{size} {group}.{operation}: {base['median_ms']:.3f} ms -> "
+                                       f"{stats['median_ms']:.3f} ms ({ratio:.2f}x)")
+    if not compared:
+        regressions.append("no operation was found in the baseline; check its sizes and format")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DatabaseManager and the viewer.")
+    parser.add_argument("--sizes", default="10k,100k", help=f"comma separated: {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=1949)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-gui", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="fail when a median regresses past --threshold against this "
+                                             "--save-baseline or --output file")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    args = parser.parse_args(argv)
+
+    labels = [label.strip().lower() for label in args.sizes.split(",") if label.strip()]
+    unknown = [label for label in labels if label not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    results = {}
+    failures = []
+    for label in labels:
+        db_path = dataset_path(label, args.seed)
+        database_results, plans = bench_database(db_path, args.repeat)
+        results[label] = {"database": database_results}
+        for name, plan in plans.items():
+            if any("TEMP B-TREE" in step for step in plan):
+                failures.append(f"{label} {name} query sorts in a temp B-tree: {plan}")
+        if not args.no_gui:
+            gui_results = bench_gui(db_path, max(1, args.repeat // 4))
+            if gui_results is not None:
+                results[label]["gui"] = gui_results
+        for group, operations in results[label].items():
+            for operation, stats in operations.items():
+                print(f"{label:>5} {group:<8} {operation:<28} {stats['median_ms']:>10.3f} ms")
+
+    output = {"seed": args.seed, "python": sys.version.split()[0], "sqlite": sqlite3.sqlite_version,
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(output, handle, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            failures += compare(results, json.load(handle), args.threshold)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Headless bulk CSV import/export for grand_prix_race_winners.
+
+    python bulk_io.py import grand-prix-race-winners.csv [--db motogp_database.db] [--rejected rejected.csv]
+    python bulk_io.py export out.csv [--search TERM] [--class CLASS]
+    python bulk_io.py vacuum [--db motogp_database.db]
+"""
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+
+from connection_pool import ConnectionPool
+from migrations import deferred_insert_triggers, index_rider_names, run_migrations, vacuum
+from queries import has_search_index, select_query
+
+
+COLUMNS = ["Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race"]
+# The published CSV has no Race column; repeats of a key within a file are numbered in file order.
+REQUIRED_COLUMNS = COLUMNS[:6]
+
+INSERT_ENTRY = """
+    INSERT OR IGNORE INTO grand_prix_race_winners (Season, Circuit, Class, Rider, Constructor, Country, Race)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class ImportReport:
+
+    def __init__(self):
+        self.rows_read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.rejected = []
+        self.elapsed = 0.0
+
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"Read {self.rows_read} rows: {self.inserted} inserted, {self.duplicates} duplicates, "
+                f"{len(self.rejected)} rejected ({self.rows_per_second():.0f} rows/s).")
+
+
+def normalize_class(value):
+    # The published CSV uses trademark names ("MotoGP™", "Moto2™"); the app uses plain ones.
+    return value.replace("™", "").strip()
+
+
+def normalize_row(record):
+    """Map a CSV record (any column order) onto a table row, or raise ValueError.
+
+    Race is None when the record does not give one.
+    """
+    values = {column: (record.get(column) or "").strip() for column in COLUMNS}
+    if not values["Season"] or not values["Circuit"] or not values["Rider"]:
+        raise ValueError("Season, Circuit, and Rider cannot be empty")
+    try:
+        season = int(values["Season"])
+    except ValueError:
+        raise ValueError(f"Invalid Season: {values['Season']!r}")
+    class_name = normalize_class(values["Class"])
+    if not class_name:
+        raise ValueError("Class cannot be empty")
+    race = None
+    if values["Race"]:
+        try:
+            race = int(values["Race"])
+        except ValueError:
+            race = 0
+        if race < 1:
+            raise ValueError(f"Invalid Race: {values['Race']!r}")
+    return (season, values["Circuit"], class_name, values["Rider"],
+            values["Constructor"] or None, values["Country"].upper() or None, race)
+
+
+def import_csv(conn, csv_path, batch_size=50000, progress=None):
+    """Stream csv_path into grand_prix_race_winners in batched transactions.
+
+    Rows that fail validation are collected in report.rejected as
+    (line_number, record, reason); rows whose natural key already exists are
+    skipped and counted as duplicates. progress(report) is called after every batch.
+    """
+    run_migrations(conn)
+    report = ImportReport()
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    batch = []
+    # (Season, Circuit, Class, Rider) -> races seen in this file.
+    races = {}
+
+    def flush():
+        conn.execute("BEGIN")
+        try:
+            with deferred_insert_triggers(conn) as result:
+                cursor.executemany(INSERT_ENTRY, batch)
+            index_rider_names(conn, (row[3] for row in batch))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        report.inserted += result.inserted
+        report.duplicates += len(batch) - result.inserted
+        batch.clear()
+        report.elapsed = time.perf_counter() - started
+        if progress:
+            progress(report)
+
+    with open(csv_path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{csv_path} is missing columns: {', '.join(sorted(missing))}")
+        for record in reader:
+            report.rows_read += 1
+            try:
+                row = normalize_row(record)
+            except ValueError as e:
+                report.rejected.append((reader.line_num, record, str(e)))
+                continue
+            race = row[6] if row[6] is not None else races.get(row[:4], 0) + 1
+            races[row[:4]] = max(race, races.get(row[:4], 0))
+            batch.append(row[:6] + (race,))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def write_rejected(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Line", "Reason"] + COLUMNS)
+        for line_number, record, reason in report.rejected:
+            writer.writerow([line_number, reason] + [record.get(column, "") for column in COLUMNS])
+
+
+def export_csv(conn, csv_path, search_term="", class_filter="All", fetch_size=5000):
+    """Stream the filtered, ordered view to csv_path; returns the number of rows written."""
+    sql, params = select_query(search_term, class_filter, has_search_index(conn))
+    cursor = conn.execute(sql, params)
+    written = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(COLUMNS)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            writer.writerows(rows)
+            written += len(rows)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of grand prix race winners.")
+    parser.add_argument("--db", default="motogp_database.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("csv_path")
+    import_parser.add_argument("--batch-size", type=int, default=50000)
+    import_parser.add_argument("--rejected", help="write rejected rows to this CSV file")
+
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("csv_path")
+    export_parser.add_argument("--search", default="")
+    export_parser.add_argument("--class", dest="class_filter", default="All")
+
+    commands.add_parser("vacuum", help="return free pages left by migrations and deletes to the file system")
+
+    args = parser.parse_args(argv)
+    pool = ConnectionPool(args.db)
+    conn = pool.writer
+    try:
+        if args.command == "import":
+            report = import_csv(conn, args.csv_path, args.batch_size,
+                                progress=lambda r: print(f"  {r.rows_read} rows...", file=sys.stderr))
+            print(report)
+            if args.rejected and report.rejected:
+                write_rejected(report, args.rejected)
+        elif args.command == "vacuum":
+            print(f"Released {vacuum(conn)} free pages.")
+        else:
+            written = export_csv(conn, args.csv_path, args.search, args.class_filter)
+            print(f"Exported {written} rows to {args.csv_path}.")
+    finally:
+        pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+import bisect
+import functools
+from array import array
+from collections import OrderedDict
+
+from queries import DEFAULT_ORDER, ORDER_BY, SELECT_ENTRIES, matches_search, precedes, sort_terms, sort_values, words
+
+
+COLUMNS = ("Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race")
+TEXT_COLUMNS = COLUMNS[1:6]
+SEARCH_COLUMNS = ("Circuit", "Rider", "Constructor", "Country")
+POSITIONS = {column: position for position, column in enumerate(COLUMNS)}
+
+# Set bit offsets of every byte value, used to walk a bitmap in rank order.
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def sort_key(row):
+    # Mirrors queries.ORDER_BY: Season DESC, Circuit, Class, Rider, Race.
+    return (-int(row[0]), row[1] or "", row[2] or "", row[3] or "", int(row[6]))
+
+
+class _Dictionary:
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+        # (word, code) pairs of every value's folded words, sorted on the next lookup.
+        self.words = []
+        self._words_sorted = True
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.words.extend((word, code) for word in set(words(value)))
+            self._words_sorted = False
+        return code
+
+    def prefixed(self, token):
+        # Codes of the values with a word starting with token.
+        if not self._words_sorted:
+            self.words.sort()
+            self._words_sorted = True
+        codes = set()
+        for index in range(bisect.bisect_left(self.words, (token,)), len(self.words)):
+            word, code = self.words[index]
+            if not word.startswith(token):
+                break
+            codes.add(code)
+        return codes
+
+
+class ColumnarSnapshot:
+    """Dictionary-encoded, in-memory copy of grand_prix_race_winners.
+
+    Rows are stored in display order (the "base"), one array per column: int16
+    seasons and race numbers and int32 dictionary codes for the text columns.
+    Filters are evaluated as bitmaps over base ranks (Python ints, so
+    AND/OR/popcount run in C) built from per-value posting lists. Search matches
+    like DatabaseManager's FTS5 prefix query: every search word must start a
+    case- and accent-folded word of a searched column, found through a sorted
+    word index per dictionary. Writes are applied incrementally: removed base
+    rows are tombstoned and new rows go to a small sorted delta that is merged
+    into query results and folded into the base once it grows past
+    compact_threshold. Other sort orders are materialized from the filtered rows;
+    the last sorted_cache_size of them are cached until the next write.
+
+    The query methods mirror DatabaseManager, so it can back RaceWinnersTableModel.
+    """
+
+    def __init__(self, rows=(), compact_threshold=2048, bitmap_cache_size=1024, sorted_cache_size=8):
+        self.compact_threshold = compact_threshold
+        self.bitmap_cache_size = bitmap_cache_size
+        self.sorted_cache_size = sorted_cache_size
+        self._build(rows)
+
+    @classmethod
+    def from_database(cls, db_manager, **kwargs):
+        sql = SELECT_ENTRIES + ORDER_BY
+        with db_manager.pool.reading() as conn:
+            return cls(conn.execute(sql), **kwargs)
+
+    def _build(self, rows):
+        self.dictionaries = {column: _Dictionary() for column in TEXT_COLUMNS}
+        self.seasons = array("h")
+        self.races = array("h")
+        self.codes = {column: array("i") for column in TEXT_COLUMNS}
+        self._postings = {column: {} for column in COLUMNS}
+
+        size = 0
+        for rank, row in enumerate(rows):
+            season = int(row[0])
+            self.seasons.append(season)
+            self._postings["Season"].setdefault(season, array("i")).append(rank)
+            self.races.append(row[6])
+            for column in TEXT_COLUMNS:
+                code = self.dictionaries[column].encode(row[POSITIONS[column]])
+                self.codes[column].append(code)
+                self._postings[column].setdefault(code, array("i")).append(rank)
+            size = rank + 1
+
+        self.size = size
+        self._all = (1 << size) - 1
+        self.tombstones = 0
+        self.delta = []
+        self._delta_keys = []
+        self._bitmaps = OrderedDict()
+        self._sorted = OrderedDict()
+
+    def __len__(self):
+        return self.size - self.tombstones.bit_count() + len(self.delta)
+
+    # Base storage
+
+    def _row(self, rank):
+        names = tuple(self.dictionaries[column].values[self.codes[column][rank]] for column in TEXT_COLUMNS)
+        return (self.seasons[rank],) + names + (self.races[rank],)
+
+    def _key_at(self, rank):
+        return (-self.seasons[rank],
+                self.dictionaries["Circuit"].values[self.codes["Circuit"][rank]] or "",
+                self.dictionaries["Class"].values[self.codes["Class"][rank]] or "",
+                self.dictionaries["Rider"].values[self.codes["Rider"][rank]] or "",
+                self.races[rank])
+
+    def _base_rank(self, key):
+        return bisect.bisect_left(range(self.size), key, key=self._key_at)
+
+    def _bitmap(self, column, value):
+        cache_key = (column, value)
+        bitmap = self._bitmaps.get(cache_key)
+        if bitmap is not None:
+            self._bitmaps.move_to_end(cache_key)
+            return bitmap
+        posting = self._postings[column].get(value, ())
+        bits = bytearray((self.size + 7) // 8)
+        for rank in posting:
+            bits[rank >> 3] |= 1 << (rank & 7)
+        bitmap = int.from_bytes(bits, "little")
+        self._bitmaps[cache_key] = bitmap
+        while len(self._bitmaps) > self.bitmap_cache_size:
+            self._bitmaps.popitem(last=False)
+        return bitmap
+
+    def _iter_ranks(self, mask, skip=0, chunk_bytes=1024):
+        # Yield set bit positions of mask in ascending order, after skipping `skip` of them.
+        data = mask.to_bytes((self.size + 7) // 8, "little")
+        start = 0
+        while start < len(data):
+            count = int.from_bytes(data[start:start + chunk_bytes], "little").bit_count()
+            if skip < count:
+                break
+            skip -= count
+            start += chunk_bytes
+        for index in range(start, len(data)):
+            byte = data[index]
+            if not byte:
+                continue
+            for bit in _BYTE_BITS[byte]:
+                if skip:
+                    skip -= 1
+                    continue
+                yield (index << 3) | bit
+
+    # Filtering
+
+    def _filters(self, search_term="", category_filter="All", season=None, country=None):
+        return tuple(words(search_term)), category_filter, season, country
+
+    def _base_mask(self, filters):
+        search_tokens, category_filter, season, country = filters
+        mask = self._all & ~self.tombstones
+        if category_filter != "All":
+            code = self.dictionaries["Class"].codes.get(category_filter)
+            mask &= self._bitmap("Class", code) if code is not None else 0
+        if season is not None:
+            mask &= self._bitmap("Season", int(season))
+        if country is not None:
+            code = self.dictionaries["Country"].codes.get(country)
+            mask &= self._bitmap("Country", code) if code is not None else 0
+        for token in search_tokens:
+            if not mask:
+                break
+            token_mask = 0
+            for column in SEARCH_COLUMNS:
+                for code in self.dictionaries[column].prefixed(token):
+                    token_mask |= self._bitmap(column, code)
+            mask &= token_mask
+        return mask
+
+    @staticmethod
+    def _row_matches(row, filters):
+        search_tokens, category_filter, season, country = filters
+        if category_filter != "All" and row[2] != category_filter:
+            return False
+        if season is not None and int(row[0]) != int(season):
+            return False
+        if country is not None and row[5] != country:
+            return False
+        return matches_search((row[POSITIONS[column]] for column in SEARCH_COLUMNS), search_tokens)
+
+    def _delta_matches(self, filters):
+        return [(key, row) for key, row in zip(self._delta_keys, self.delta) if self._row_matches(row, filters)]
+
+    # DatabaseManager-compatible queries
+
+    def count_entries(self, search_term="", category_filter="All", season=None, country=None):
+        filters = self._filters(search_term, category_filter, season, country)
+        return self._base_mask(filters).bit_count() + len(self._delta_matches(filters))
+
+    def select_entries_window(self, search_term="", category_filter="All", limit=200, offset=0, order=(),
+                              season=None, country=None):
+        filters = self._filters(search_term, category_filter, season, country)
+        terms = sort_terms(order)
+        if terms != DEFAULT_ORDER:
+            return self._ordered(filters, terms)[offset:offset + limit]
+        return self._window(filters, limit, offset)
+
+    def _window(self, filters, limit, offset):
+        mask = self._base_mask(filters)
+        delta = self._delta_matches(filters)
+        total = mask.bit_count() + len(delta)
+        end = min(offset + limit, total)
+        if offset >= end:
+            return []
+
+        # Position of each matching delta row in the merged order.
+        positions = [i + (mask & ((1 << self._base_rank(key)) - 1)).bit_count()
+                     for i, (key, _) in enumerate(delta)]
+        j = bisect.bisect_left(positions, offset)
+        ranks = self._iter_ranks(mask, offset - j)
+        rows = []
+        for position in range(offset, end):
+            if j < len(positions) and positions[j] == position:
+                rows.append(delta[j][1])
+                j += 1
+            else:
+                rows.append(self._row(next(ranks)))
+        return rows
+
+    def select_all_entries(self, search_term="", category_filter="All", season=None, country=None):
+        return self._window(self._filters(search_term, category_filter, season, country), len(self), 0)
+
+    def _ordered(self, filters, terms):
+        cache_key = (filters, terms)
+        rows = self._sorted.get(cache_key)
+        if rows is not None:
+            self._sorted.move_to_end(cache_key)
+            return rows
+        rows = self._window(filters, len(self), 0)
+        # Stable sorts from the last term to the first give the combined order.
+        for column, descending in reversed(terms):
+            rows.sort(key=lambda row: sort_values(row, ((column, descending),)), reverse=descending)
+        self._sorted[cache_key] = rows
+        while len(self._sorted) > self.sorted_cache_size:
+            self._sorted.popitem(last=False)
+        return rows
+
+    def position_of(self, row, search_term="", category_filter="All", order=()):
+        filters = self._filters(search_term, category_filter)
+        terms = sort_terms(order)
+        if terms != DEFAULT_ORDER:
+            compare = functools.cmp_to_key(
+                lambda a, b: -1 if precedes(a, b, terms) else int(precedes(b, a, terms)))
+            return bisect.bisect_left(self._ordered(filters, terms), compare(row), key=compare)
+        key = sort_key(row)
+        mask = self._base_mask(filters)
+        before = (mask & ((1 << self._base_rank(key)) - 1)).bit_count()
+        return before + sum(1 for delta_key, _ in self._delta_matches(filters) if delta_key < key)
+
+    def entry_matches(self, row, search_term="", category_filter="All"):
+        return self._row_matches(row, self._filters(search_term, category_filter))
+
+    row_matches = entry_matches
+
+    # Incremental maintenance
+
+    def apply_change(self, change, old_row, new_row):
+        """DatabaseManager change listener: patch the snapshot instead of reloading it."""
+        self._sorted.clear()
+        if old_row is not None:
+            key = sort_key(old_row)
+            index = bisect.bisect_left(self._delta_keys, key)
+            if index < len(self._delta_keys) and self._delta_keys[index] == key:
+                del self._delta_keys[index]
+                del self.delta[index]
+            else:
+                rank = self._base_rank(key)
+                if rank < self.size and self._key_at(rank) == key:
+                    self.tombstones |= 1 << rank
+        if new_row is not None:
+            row = (int(new_row[0]),) + tuple(new_row[1:6]) + (int(new_row[6]),)
+            for column in TEXT_COLUMNS:
+                self.dictionaries[column].encode(row[POSITIONS[column]])
+            key = sort_key(row)
+            index = bisect.bisect_left(self._delta_keys, key)
+            self._delta_keys.insert(index, key)
+            self.delta.insert(index, row)
+        if len(self.delta) > self.compact_threshold or self.tombstones.bit_count() > self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        self._build(self.select_all_entries())
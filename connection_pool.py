@@ -0,0 +1,74 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+PRAGMAS = {
+    "synchronous": "NORMAL",       # safe with WAL; only checkpoints fsync
+    "cache_size": -16000,          # 16 MB page cache per connection
+    "mmap_size": 268435456,        # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+class ConnectionPool:
+    """One dedicated writer connection plus up to max_readers read-only connections.
+
+    The database runs in WAL mode, so readers on any thread keep working while the
+    writer commits. Writes are serialized through write_lock. Readers are checked
+    out with reading() and returned when the block ends, so they are shared by
+    however many threads come and go; a thread that finds all of them in use waits
+    for one to be returned.
+    """
+
+    def __init__(self, db_name, pragmas=None, max_readers=4):
+        self.db_name = db_name
+        self.pragmas = dict(PRAGMAS, **(pragmas or {}))
+        self.max_readers = max_readers
+        self.write_lock = threading.RLock()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_readers)
+        self._closed = False
+
+        self.writer = self._open()
+        self.journal_mode = self.writer.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.pragmas["busy_timeout"] / 1000,
+                               check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @contextmanager
+    def reading(self):
+        """Check out a read-only connection for the duration of the block."""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+                conn.execute("PRAGMA query_only = ON")
+            try:
+                yield conn
+            finally:
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        # Connections still checked out are closed when they are returned.
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self.write_lock:
+            self.writer.close()
@@ -0,0 +1,666 @@
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from itertools import groupby
+
+from connection_pool import ConnectionPool
+from migrations import (
+    ALL_CLASSES, ALL_SEASONS, DICTIONARY_TABLES, FACT_TABLE, JOURNAL_COLUMNS, RIDER_INFO_TABLE, RIDER_NAME_INDEX,
+    SEARCH_TABLE, index_rider_names, rider_name_key, run_migrations,
+)
+from instrumentation import QueryStats
+from queries import (
+    DEFAULT_ORDER, FROM_FACTS, KEY_COLUMNS, ORDER_BY, SELECT_ENTRIES, build_filter, entry_key, fts_query,
+    has_search_index, key_of, name_of, order_by, rank_of, row_matches, seek_condition, sort_expression, sort_terms,
+    sort_values,
+)
+
+
+class DatabaseError(Exception):
+    pass
+
+
+class DatabaseConnectionError(DatabaseError):
+    pass
+
+
+class MigrationError(DatabaseError):
+    pass
+
+
+class DuplicateEntryError(DatabaseError):
+    """Raised when a write would repeat an existing (Season, Circuit, Class, Rider, Race) key."""
+
+
+class StaleEntryError(DatabaseError):
+    """Raised when a change targets an entry that is no longer in the database."""
+
+
+INSERT_ENTRY = """
+    INSERT INTO grand_prix_race_winners (Season, Circuit, Class, Rider, Constructor, Country, Race)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+UPDATE_ENTRY = """
+    UPDATE grand_prix_race_winners
+    SET Season = ?, Circuit = ?, Class = ?, Rider = ?, Constructor = ?, Country = ?, Race = ?
+    WHERE Season = ? AND Circuit = ? AND Class = ? AND Rider = ? AND Race = ?
+"""
+DELETE_ENTRY = """
+    DELETE FROM grand_prix_race_winners
+    WHERE Season = ? AND Circuit = ? AND Class = ? AND Rider = ? AND Race = ?
+"""
+CHANGE_SQL = {"inserted": INSERT_ENTRY, "updated": UPDATE_ENTRY, "removed": DELETE_ENTRY}
+JOURNAL_FIELDS = [f"{side}_{column.lower()}" for side in ("old", "new") for column in JOURNAL_COLUMNS]
+# Natural keys per validation query, within SQLite's default 999 bound parameters.
+KEYS_PER_QUERY = 150
+
+
+def entry_row(season, circuit, class_name, rider, constructor, country, race=1):
+    # As read back from the database: empty constructors and countries are NULL.
+    return int(season), circuit, class_name, rider, constructor or None, country or None, int(race)
+
+
+def _raw_key(column):
+    # seek_condition lookup for sort keys that are already fact table keys.
+    return "?"
+
+
+def change_kind(old_row, new_row):
+    return "inserted" if old_row is None else "removed" if new_row is None else "updated"
+
+
+def _change_params(old_row, new_row):
+    kind = change_kind(old_row, new_row)
+    if kind == "inserted":
+        return new_row
+    return new_row + entry_key(old_row) if kind == "updated" else entry_key(old_row)
+
+
+class RiderProfile:
+    """A rider's wins from the winners table with the career figures of the per-rider tables.
+
+    wins_by_class/season/circuit are (value, wins) lists, most wins first (seasons
+    newest first). finishing_positions holds the 1st..6th place counts, when known.
+    """
+
+    def __init__(self, rider_id, name):
+        self.rider_id = rider_id
+        self.name = name
+        self.wins = 0
+        self.wins_by_class = []
+        self.wins_by_season = []
+        self.wins_by_circuit = []
+        self.country = None
+        self.finishing_positions = None
+        self.podiums = None
+        self.pole_positions = None
+        self.fastest_laps = None
+        self.championships = 0
+
+
+class DatabaseManager:
+    """Qt-free access to the MotoGP database.
+
+    Failures are raised as DatabaseError subclasses; presenting them is up to the caller.
+    """
+
+    def __init__(self, db_name="motogp_database.db", slow_query_ms=None):
+        self.db_name = db_name
+        self.query_stats = QueryStats(slow_query_ms)
+        self.pool = None
+        self.conn = None
+        self.fts_enabled = False
+        self._change_listeners = []
+        self._write_generation = 0
+        self._value_cache = {}
+        # (filter, sort terms, offset, data generation) -> sort key of the row before offset.
+        self._anchors = OrderedDict()
+        self._anchors_lock = threading.Lock()
+        self.max_anchors = 256
+        # (filter, sort terms, data generation) -> raw sort keys (fact table keys) of
+        # the rows at landmark_stride - 1, 2 * landmark_stride - 1, ...
+        self._landmarks = OrderedDict()
+        self.landmark_stride = 1000
+        self.max_landmark_sets = 32
+        # rider name -> (data generation, RiderProfile or None).
+        self._profiles = OrderedDict()
+        self.max_profiles = 256
+        self.connect()
+
+    def connect(self):
+        try:
+            self.pool = ConnectionPool(self.db_name)
+            self.conn = self.pool.writer
+            self.cursor = self.conn.cursor()
+        except sqlite3.Error as e:
+            raise DatabaseConnectionError(f"Could not connect to database: {e}") from e
+        try:
+            with self.pool.write_lock:
+                run_migrations(self.conn)
+        except sqlite3.Error as e:
+            raise MigrationError(f"Could not upgrade the database schema: {e}") from e
+        self.fts_enabled = has_search_index(self.conn)
+        # The reference tables are optional: a freshly seeded database has only the winners.
+        self.tables = {name for name, in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def _rollback(self):
+        with self.pool.write_lock:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+
+    def _read(self, sql, params=(), fetch="all"):
+        # Reads borrow a pooled connection for the statement, never the writer.
+        try:
+            with self.pool.reading() as conn:
+                return self.query_stats.execute(conn, sql, params, fetch=fetch)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error reading from the database: {e}") from e
+
+    def _read_one(self, sql, params=()):
+        return self._read(sql, params, fetch="one")
+
+    def _write(self, sql, params=()):
+        # Callers hold pool.write_lock.
+        return self.query_stats.execute(self.conn, sql, params, fetch=None)
+
+    def insert_entry(self, season, circuit, class_name, rider, constructor, country, race=1):
+        row = entry_row(season, circuit, class_name, rider, constructor, country, race)
+        try:
+            with self.pool.write_lock:
+                self._write(INSERT_ENTRY, row)
+                index_rider_names(self.conn, (rider,))
+                self.conn.commit()
+        except sqlite3.IntegrityError as e:
+            self._rollback()
+            raise DuplicateEntryError("An entry with this Season, Circuit, Class, Rider, and Race already exists. "
+                                      "Please ensure uniqueness.") from e
+        except sqlite3.Error as e:
+            self._rollback()
+            raise DatabaseError(f"Error adding entry: {e}") from e
+        self._notify("inserted", None, row)
+        return True
+
+    def _build_filter(self, search_term="", category_filter="All", terms=DEFAULT_ORDER):
+        return build_filter(search_term, category_filter, self.fts_enabled, terms)
+
+    def select_all_entries(self, search_term="", category_filter="All"):
+        where, params = self._build_filter(search_term, category_filter)
+        return self._read(SELECT_ENTRIES + where + ORDER_BY, tuple(params))
+
+    def window_query(self, search_term="", category_filter="All", limit=200, offset=0, order=(), after=None):
+        """SQL for one page in order; with `after` (a sort key) it seeks past that row instead of using OFFSET."""
+        terms = sort_terms(order)
+        where, params = self._build_filter(search_term, category_filter, terms)
+        if after is None:
+            return SELECT_ENTRIES + where + order_by(terms) + " LIMIT ? OFFSET ?", tuple(params) + (limit, offset)
+        seek, seek_params = seek_condition(terms, after)
+        where = (where + " AND " if where else " WHERE ") + seek
+        return SELECT_ENTRIES + where + order_by(terms) + " LIMIT ?", tuple(params + seek_params) + (limit,)
+
+    def sort_key_at(self, search_term="", category_filter="All", offset=0, order=()):
+        """Sort values of the row at offset, or None past the end.
+
+        Seeks past the nearest landmark before offset, so the sort index is walked
+        for fewer than landmark_stride rows; names are looked up for the one row
+        returned.
+        """
+        terms = sort_terms(order)
+        landmark = self._landmark_before(search_term, category_filter, terms, offset)
+        if landmark is False:
+            return None
+        position, landmark = landmark
+        where, params = self._build_filter(search_term, category_filter, terms)
+        if landmark is not None:
+            seek, seek_params = seek_condition(terms, landmark, lookup=_raw_key)
+            where = (where + " AND " if where else " WHERE ") + seek
+            params = params + seek_params
+        columns = ", ".join(name_of(column) for column, _ in terms)
+        return self._read_one(f"SELECT {columns}" + FROM_FACTS + where + order_by(terms) +
+                              " LIMIT 1 OFFSET ?", tuple(params) + (offset - position - 1,))
+
+    def _landmark_before(self, search_term, category_filter, terms, offset):
+        # (position, raw sort key) of the last landmark before offset, (-1, None) if there
+        # is none, or False if offset is past the last row.
+        needed = offset // self.landmark_stride
+        if not needed:
+            return -1, None
+        cache_key = (search_term, category_filter, terms, self.data_generation())
+        with self._anchors_lock:
+            landmarks = self._landmarks.setdefault(cache_key, [])
+            self._landmarks.move_to_end(cache_key)
+            while len(self._landmarks) > self.max_landmark_sets:
+                self._landmarks.popitem(last=False)
+            known = list(landmarks)
+        if len(known) < needed:
+            # Continue from the last known landmark with one scan of the rows up to the needed one.
+            where, params = self._build_filter(search_term, category_filter, terms)
+            if known:
+                seek, seek_params = seek_condition(terms, known[-1], lookup=_raw_key)
+                where = (where + " AND " if where else " WHERE ") + seek
+                params = params + seek_params
+            keys = [f"k{i}" for i in range(len(terms))]
+            columns = ", ".join(f"{sort_expression(column)} AS {key}" for (column, _), key in zip(terms, keys))
+            rows = self._read(f"""
+                SELECT {", ".join(keys)} FROM (
+                    SELECT {", ".join(keys)}, ROW_NUMBER() OVER () AS n
+                    FROM (SELECT {columns}{FROM_FACTS}{where}{order_by(terms)} LIMIT ?)
+                ) WHERE n % ? = 0
+            """, tuple(params) + ((needed - len(known)) * self.landmark_stride, self.landmark_stride))
+            known += rows
+            with self._anchors_lock:
+                if len(landmarks) < len(known):
+                    landmarks[:] = known
+        if len(known) < needed:
+            return False
+        return needed * self.landmark_stride - 1, known[needed - 1]
+
+    def count_query(self, search_term="", category_filter="All"):
+        where, params = self._build_filter(search_term, category_filter)
+        return "SELECT COUNT(*)" + FROM_FACTS + where, tuple(params)
+
+    def position_of(self, row, search_term="", category_filter="All", order=()):
+        # Number of filtered rows that sort before row.
+        terms = sort_terms(order)
+        where, params = self._build_filter(search_term, category_filter, terms)
+        before, before_params = seek_condition(terms, sort_values(row, terms), after=False, lookup=rank_of)
+        where = (where + " AND " if where else " WHERE ") + before
+        return self._read_one("SELECT COUNT(*)" + FROM_FACTS + where, tuple(params + before_params))[0]
+
+    def entry_matches(self, row, search_term="", category_filter="All"):
+        where, params = self._build_filter(search_term, category_filter)
+        key = " AND ".join(f"{sort_expression(column)} = {key_of(column)}" for column in KEY_COLUMNS)
+        where = (where + " AND " if where else " WHERE ") + key
+        params += list(entry_key(row))
+        return self._read_one("SELECT 1" + FROM_FACTS + where + " LIMIT 1", tuple(params)) is not None
+
+    def row_matches(self, row, search_term="", category_filter="All"):
+        # Whether row, stored or not, passes the filter.
+        return row_matches(row, search_term, category_filter, self.fts_enabled)
+
+    def value_exists(self, column, value):
+        return value in self._unique_values(column)[1]
+
+    def get_entry(self, season, circuit, class_name, rider, race=1):
+        with self.pool.write_lock:
+            return self.query_stats.execute(self.conn, """
+                SELECT Season, Circuit, Class, Rider, Constructor, Country, Race
+                FROM grand_prix_race_winners
+                WHERE Season = ? AND Circuit = ? AND Class = ? AND Rider = ? AND Race = ?
+            """, (season, circuit, class_name, rider, race), fetch="one")
+
+    def add_change_listener(self, listener):
+        """Register listener(change, old_row, new_row), called after every committed write.
+
+        change is "inserted", "updated" or "removed"; rows are
+        (Season, Circuit, Class, Rider, Constructor, Country, Race) tuples or None.
+        """
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        self._change_listeners.remove(listener)
+
+    def data_generation(self):
+        # Local writes bump _write_generation; data_version changes when another
+        # connection (worker thread, bulk import) commits to the same file.
+        with self.pool.write_lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._write_generation, data_version
+
+    def _unique_values(self, column):
+        table = DICTIONARY_TABLES[column]
+        generation = self.data_generation()
+        cached = self._value_cache.get(column)
+        if cached is None or cached[0] != generation:
+            values = [row[0] for row in self._read(f"SELECT value FROM {table} ORDER BY value ASC")]
+            cached = self._value_cache[column] = (generation, (values, frozenset(values)))
+        return cached[1]
+
+    def _notify(self, change, old_row, new_row):
+        self._write_generation += 1
+        for listener in list(self._change_listeners):
+            listener(change, old_row, new_row)
+
+    def select_ranked_entries(self, search_term, category_filter="All", limit=50):
+        """The best `limit` matches for search_term, by full-text rank (bm25) and then newest first.
+
+        Without a search index, or words to search for, this is the first page in the default order.
+        """
+        match = fts_query(search_term)
+        if not self.fts_enabled or not match:
+            return self.select_entries_window(search_term, category_filter, limit)
+        class_condition, params = "", [match]
+        if category_filter != "All":
+            class_condition = " AND w.Class = ?"
+            params.append(category_filter)
+        return self._read(f"""
+            SELECT w.Season, w.Circuit, w.Class, w.Rider, w.Constructor, w.Country, w.Race
+            FROM {SEARCH_TABLE} f
+            JOIN grand_prix_race_winners w ON w.rowid = f.rowid
+            WHERE {SEARCH_TABLE} MATCH ?{class_condition}
+            ORDER BY f.rank, w.Season DESC
+            LIMIT ?
+        """, tuple(params) + (limit,))
+
+    def select_entries_window(self, search_term="", category_filter="All", limit=200, offset=0, order=()):
+        """Rows [offset, offset + limit) in order, fetched with keyset pagination.
+
+        The page seeks past the sort key of the row before offset. Consecutive pages
+        take that key from the previous page; any other offset looks it up with
+        sort_key_at, a short scan from the nearest landmark.
+        """
+        terms = sort_terms(order)
+        if offset <= 0:
+            return self._read(*self.window_query(search_term, category_filter, limit, 0, terms))
+        generation = self.data_generation()
+        with self._anchors_lock:
+            anchor = self._anchors.get((search_term, category_filter, terms, offset, generation))
+        if anchor is None:
+            anchor = self.sort_key_at(search_term, category_filter, offset - 1, terms)
+            if anchor is None:
+                return []
+        rows = self._read(*self.window_query(search_term, category_filter, limit, order=terms, after=tuple(anchor)))
+        if len(rows) == limit:
+            with self._anchors_lock:
+                self._anchors[(search_term, category_filter, terms, offset + limit, generation)] = \
+                    sort_values(rows[-1], terms)
+                while len(self._anchors) > self.max_anchors:
+                    self._anchors.popitem(last=False)
+        return rows
+
+    def count_entries(self, search_term="", category_filter="All"):
+        return self._read_one(*self.count_query(search_term, category_filter))[0]
+
+    def update_entry(self, original_season, original_circuit, original_class_name, original_rider,
+                     new_season, new_circuit, new_class_name, new_rider, new_constructor, new_country,
+                     original_race=1, new_race=None):
+        # new_race None keeps the entry's race number.
+        key = (original_season, original_circuit, original_class_name, original_rider, original_race)
+        new_row = entry_row(new_season, new_circuit, new_class_name, new_rider, new_constructor, new_country,
+                            original_race if new_race is None else new_race)
+        try:
+            with self.pool.write_lock:
+                old_row = self.get_entry(*key)
+                self._write(UPDATE_ENTRY, new_row + key)
+                index_rider_names(self.conn, (new_rider,))
+                self.conn.commit()
+        except sqlite3.IntegrityError as e:
+            self._rollback()
+            raise DuplicateEntryError("An entry with the new Season, Circuit, Class, Rider, and Race already exists. "
+                                      "Please ensure uniqueness.") from e
+        except sqlite3.Error as e:
+            self._rollback()
+            raise DatabaseError(f"Error updating entry: {e}") from e
+        if old_row is not None:
+            self._notify("updated", old_row, new_row)
+        return True
+
+    def delete_entry(self, season, circuit, class_name, rider, race=1):
+        try:
+            with self.pool.write_lock:
+                old_row = self.get_entry(season, circuit, class_name, rider, race)
+                self._write(DELETE_ENTRY, (season, circuit, class_name, rider, race))
+                self.conn.commit()
+        except sqlite3.Error as e:
+            self._rollback()
+            raise DatabaseError(f"Error deleting entry: {e}") from e
+        if old_row is not None:
+            self._notify("removed", old_row, None)
+        return True
+
+    def get_unique_classes(self):
+        return list(self._unique_values("Class")[0])
+
+    def get_unique_countries(self):
+        return list(self._unique_values("Country")[0])
+
+    def get_unique_constructors(self):
+        return list(self._unique_values("Constructor")[0])
+
+    def get_unique_riders(self):
+        return list(self._unique_values("Rider")[0])
+
+    def get_seasons(self):
+        return [row[0] for row in self._read("""
+            SELECT DISTINCT Season FROM win_summary
+            WHERE dimension = 'circuit' AND Season != ? ORDER BY Season DESC
+        """, (ALL_SEASONS,))]
+
+    def get_circuits(self):
+        return [row[0] for row in self._read("""
+            SELECT value FROM win_summary
+            WHERE dimension = 'circuit' AND Season = ? AND Class = ? ORDER BY value ASC
+        """, (ALL_SEASONS, ALL_CLASSES))]
+
+    def get_leaderboard(self, dimension, season=ALL_SEASONS, class_name=ALL_CLASSES, limit=50):
+        return self._read("""
+            SELECT value, wins FROM win_summary
+            WHERE dimension = ? AND Season = ? AND Class = ?
+            ORDER BY wins DESC, value ASC
+            LIMIT ?
+        """, (dimension, season, class_name, limit))
+
+    def get_win_history(self, dimension, value):
+        return self._read("""
+            SELECT Season, Class, wins FROM win_summary
+            WHERE dimension = ? AND value = ? AND Season != ? AND Class != ?
+            ORDER BY Season DESC, Class ASC
+        """, (dimension, value, ALL_SEASONS, ALL_CLASSES))
+
+    def get_constructor_titles(self, constructor, class_name=ALL_CLASSES):
+        sql = "SELECT COUNT(*) FROM constructure_world_championship WHERE Constructor = ?"
+        params = (constructor,)
+        if class_name != ALL_CLASSES:
+            sql += " AND Class = ?"
+            params += (class_name,)
+        if "constructure_world_championship" not in self.tables:
+            return 0
+        return self._read_one(sql, params)[0]
+
+    def get_circuit_history(self, circuit):
+        return self._read("""
+            SELECT Season, Circuit, Class, Rider, Constructor, Country, Race
+            FROM grand_prix_race_winners
+            WHERE Circuit = ?
+            ORDER BY Season DESC, Class ASC, Race ASC
+        """, (circuit,))
+
+    def get_circuit_facts(self, circuit):
+        if not {"grand_prix_events_held", "same_nation_podium_lockouts"} <= self.tables:
+            return None, 0
+        times_held = self._read_one("SELECT Times FROM grand_prix_events_held WHERE Track = ?", (circuit,))
+        lockouts = self._read_one("SELECT COUNT(*) FROM same_nation_podium_lockouts WHERE Track = ?", (circuit,))
+        return (times_held[0] if times_held else None), lockouts[0]
+
+    def stored_entries(self, keys):
+        """{natural key: row} for those (Season, Circuit, Class, Rider, Race) keys that are stored.
+
+        Reads through the writer; callers hold pool.write_lock.
+        """
+        keys = list(dict.fromkeys(tuple(key) for key in keys))
+        stored = {}
+        for start in range(0, len(keys), KEYS_PER_QUERY):
+            chunk = keys[start:start + KEYS_PER_QUERY]
+            rows = self.query_stats.execute(self.conn, f"""
+                WITH staged (season, circuit, class, rider, race) AS (
+                    VALUES {", ".join(["(?, ?, ?, ?, ?)"] * len(chunk))})
+                SELECT w.season, ci.name, cl.name, r.name, co.name, cn.code, w.race
+                FROM staged s
+                CROSS JOIN circuits ci ON ci.name = s.circuit
+                CROSS JOIN classes cl ON cl.name = s.class
+                CROSS JOIN riders r ON r.name = s.rider
+                CROSS JOIN {FACT_TABLE} w ON w.season = s.season AND w.circuit_id = ci.circuit_id
+                    AND w.class_id = cl.class_id AND w.rider_id = r.rider_id AND w.race = s.race
+                LEFT JOIN constructors co ON co.constructor_id = w.constructor_id
+                LEFT JOIN countries cn ON cn.country_id = w.country_id
+            """, tuple(value for key in chunk for value in key))
+            stored.update((entry_key(row), row) for row in rows)
+        return stored
+
+    def _validate_changes(self, changes):
+        # Replays the changes over the stored keys; returns them with each old_row as stored.
+        stored = self.stored_entries(entry_key(row) for change in changes for row in change if row is not None)
+        validated, duplicates, missing = [], [], []
+        for old_row, new_row in changes:
+            if old_row is not None:
+                key = entry_key(old_row)
+                old_row = stored.pop(key, None)
+                if old_row is None:
+                    missing.append(key)
+                    continue
+            if new_row is not None:
+                key = entry_key(new_row)
+                if key in stored:
+                    duplicates.append(key)
+                    continue
+                stored[key] = new_row
+            validated.append((old_row, new_row))
+
+        def listed(keys):
+            return "; ".join(", ".join(str(value) for value in key) for key in keys[:5]) + (
+                f" and {len(keys) - 5} more" if len(keys) > 5 else "")
+        if duplicates:
+            raise DuplicateEntryError(
+                f"{len(duplicates)} changes would repeat an existing Season, Circuit, Class, Rider, and Race: "
+                f"{listed(duplicates)}")
+        if missing:
+            raise StaleEntryError(f"{len(missing)} changed entries no longer exist: {listed(missing)}")
+        return validated
+
+    def apply_changes(self, changes, reverts=None):
+        """Apply (old_row, new_row) changes in one transaction, journaled as an edit session.
+
+        old_row None inserts new_row, new_row None deletes old_row, otherwise the
+        entry with old_row's key becomes new_row. Every natural key is validated
+        first, in bulk and in order, and nothing is written if any change fails;
+        runs of the same kind of change are written with one executemany. Listeners
+        are notified per change after the commit. Returns the edit session id.
+        """
+        changes = [(None if old_row is None else tuple(old_row), None if new_row is None else tuple(new_row))
+                   for old_row, new_row in changes]
+        try:
+            with self.pool.write_lock:
+                self.conn.execute("BEGIN IMMEDIATE")
+                if reverts is not None:
+                    reverted = self.query_stats.execute(
+                        self.conn, "SELECT reverted_by FROM edit_sessions WHERE session_id = ?", (reverts,), fetch="one")
+                    if reverted is None or reverted[0] is not None:
+                        raise DatabaseError(f"Edit session {reverts} does not exist or was already rolled back.")
+                changes = self._validate_changes(changes)
+                session_id = self._write("INSERT INTO edit_sessions (reverts) VALUES (?)", (reverts,)).lastrowid
+                if reverts is not None:
+                    self._write("UPDATE edit_sessions SET reverted_by = ? WHERE session_id = ?", (session_id, reverts))
+                for kind, run in groupby(changes, key=lambda change: change_kind(*change)):
+                    self.query_stats.executemany(self.conn, CHANGE_SQL[kind],
+                                                 [_change_params(old_row, new_row) for old_row, new_row in run])
+                self.query_stats.executemany(self.conn, f"""
+                    INSERT INTO edit_journal (session_id, seq, {", ".join(JOURNAL_FIELDS)})
+                    VALUES ({", ".join(["?"] * (len(JOURNAL_FIELDS) + 2))})
+                """, [(session_id, seq) + (old_row or (None,) * 7) + (new_row or (None,) * 7)
+                      for seq, (old_row, new_row) in enumerate(changes)])
+                index_rider_names(self.conn, (new_row[3] for _, new_row in changes if new_row is not None))
+                self.conn.commit()
+        except DatabaseError:
+            self._rollback()
+            raise
+        except sqlite3.IntegrityError as e:
+            self._rollback()
+            raise DuplicateEntryError(
+                f"Changes would repeat an existing Season, Circuit, Class, Rider, and Race: {e}") from e
+        except sqlite3.Error as e:
+            self._rollback()
+            raise DatabaseError(f"Error applying changes: {e}") from e
+        for old_row, new_row in changes:
+            self._notify(change_kind(old_row, new_row), old_row, new_row)
+        return session_id
+
+    def get_edit_sessions(self, limit=50):
+        # (session_id, committed_at, changes, reverts, reverted_by), newest first.
+        return self._read("""
+            SELECT s.session_id, s.committed_at, COUNT(j.seq), s.reverts, s.reverted_by
+            FROM edit_sessions s LEFT JOIN edit_journal j ON j.session_id = s.session_id
+            GROUP BY s.session_id
+            ORDER BY s.session_id DESC
+            LIMIT ?
+        """, (limit,))
+
+    def rollback_session(self, session_id):
+        """Undo a committed edit session by applying its changes inverted, as a new session."""
+        journal = self._read(f"""
+            SELECT {", ".join(JOURNAL_FIELDS)} FROM edit_journal
+            WHERE session_id = ? ORDER BY seq DESC
+        """, (session_id,))
+        if not journal:
+            raise DatabaseError(f"Edit session {session_id} has no changes to roll back.")
+
+        def row(values):
+            # Sessions journaled before migration 10 have no race numbers; every entry was race 1.
+            return None if values[0] is None else tuple(values[:6]) + (values[6] or 1,)
+        return self.apply_changes([(row(entry[7:]), row(entry[:7])) for entry in journal], reverts=session_id)
+
+    def resolve_rider(self, name):
+        # rider_id for a name as spelled in any of the per-rider tables, or None.
+        row = self._read_one(f"SELECT rider_id FROM {RIDER_NAME_INDEX} WHERE name_key = ?", (rider_name_key(name),))
+        if row is None:
+            row = self._read_one("SELECT rider_id FROM riders WHERE name = ?", (name,))
+        return row[0] if row else None
+
+    def get_rider_profile(self, name):
+        """RiderProfile for name, or None for an unknown rider; memoized until the next write."""
+        generation = self.data_generation()
+        cached = self._profiles.get(name)
+        if cached is not None and cached[0] == generation:
+            self._profiles.move_to_end(name)
+            return cached[1]
+        profile = self._read_rider_profile(name)
+        self._profiles[name] = (generation, profile)
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return profile
+
+    def _read_rider_profile(self, name):
+        rider_id = self.resolve_rider(name)
+        if rider_id is None:
+            return None
+        canonical = self._read_one("SELECT name FROM riders WHERE rider_id = ?", (rider_id,))
+        profile = RiderProfile(rider_id, canonical[0] if canonical else name)
+
+        wins = self._read(f"""
+            SELECT w.season, ci.name, cl.name
+            FROM {FACT_TABLE} w
+            CROSS JOIN circuits ci ON ci.circuit_id = w.circuit_id
+            CROSS JOIN classes cl ON cl.class_id = w.class_id
+            WHERE w.rider_id = ?
+        """, (rider_id,))
+        profile.wins = len(wins)
+        by_season, by_circuit, by_class = (Counter(win[i] for win in wins) for i in range(3))
+        profile.wins_by_season = sorted(by_season.items(), reverse=True)
+        for counts, attribute in ((by_circuit, "wins_by_circuit"), (by_class, "wins_by_class")):
+            setattr(profile, attribute, sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+        if not {"riders_finishing_positions", RIDER_INFO_TABLE} <= self.tables:
+            return profile
+        finishing = self._read_one("""
+            SELECT Victories, NumberofSecond, NumberofThird, Numberof4th, Numberof5th, Numberof6th, Country
+            FROM riders_finishing_positions WHERE rider_id = ?
+            ORDER BY Victories DESC LIMIT 1
+        """, (rider_id,))
+        info = self._read_one(f"""
+            SELECT Victories, "2nd places", "3rd places", "Pole positions from '74 to 2022",
+                   "Race fastest lap to 2022", "World Championships"
+            FROM {RIDER_INFO_TABLE} WHERE rider_id = ?
+        """, (rider_id,))
+        if finishing:
+            profile.finishing_positions = tuple(finishing[:6])
+            profile.podiums = sum(finishing[:3])
+            profile.country = finishing[6]
+        if info:
+            victories, seconds, thirds, poles, fastest_laps, championships = (int(value or 0) for value in info)
+            profile.podiums = victories + seconds + thirds
+            profile.pole_positions = poles
+            profile.fastest_laps = fastest_laps
+            profile.championships = championships
+        return profile
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
@@ -0,0 +1,85 @@
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (
+    QDockWidget, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+
+class QueryStatsDock(QDockWidget):
+    """Live view of DatabaseManager.query_stats; toggled from the main window."""
+
+    COLUMNS = ["Statement", "Count", "Rows", "p50 ms", "p95 ms", "Max ms", "Total ms"]
+
+    def __init__(self, query_stats, parent=None):
+        super().__init__("Query Statistics", parent)
+        self.setObjectName("query_stats_dock")
+        self.query_stats = query_stats
+
+        contents = QWidget(self)
+        layout = QVBoxLayout(contents)
+        self.summary_label = QLabel(contents)
+        layout.addWidget(self.summary_label)
+
+        self.stats_table = QTableWidget(contents)
+        self.stats_table.setColumnCount(len(self.COLUMNS))
+        self.stats_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stats_table.setSortingEnabled(True)
+        layout.addWidget(self.stats_table)
+
+        buttons = QHBoxLayout()
+        self.reset_button = QPushButton("Reset", contents)
+        self.reset_button.clicked.connect(self.reset)
+        buttons.addWidget(self.reset_button)
+        self.save_button = QPushButton("Save JSON...", contents)
+        self.save_button.clicked.connect(self.save_json)
+        buttons.addWidget(self.save_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+        self.setWidget(contents)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._on_visibility_changed)
+
+    def _on_visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def refresh(self):
+        snapshot = self.query_stats.snapshot()
+        summary = self.query_stats.summary()
+        phases = ", ".join(f"{name}: p50 {stats['p50_ms']} ms" for name, stats in snapshot["phases"].items())
+        self.summary_label.setText(
+            f"{summary['queries']} queries, {summary['total_ms']:.1f} ms total, "
+            f"{summary['slow_queries']} slow (>= {snapshot['slow_query_ms']} ms)"
+            + (f" | {phases}" if phases else ""))
+
+        rows = sorted(snapshot["statements"].items(), key=lambda item: -item[1]["total_ms"])
+        self.stats_table.setSortingEnabled(False)
+        self.stats_table.setRowCount(len(rows))
+        for row_num, (sql, stats) in enumerate(rows):
+            values = (sql, stats["count"], stats["rows"], stats["p50_ms"], stats["p95_ms"],
+                      stats["max_ms"], stats["total_ms"])
+            for col_num, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                if col_num == 0:
+                    item.setToolTip(sql)
+                self.stats_table.setItem(row_num, col_num, item)
+        self.stats_table.setSortingEnabled(True)
+
+    def reset(self):
+        self.query_stats.reset()
+        self.refresh()
+
+    def save_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Query Statistics", "query_stats.json", "JSON (*.json)")
+        if path:
+            self.query_stats.dump_json(path)
@@ -0,0 +1,239 @@
+import bisect
+import functools
+
+from database import DuplicateEntryError, StaleEntryError, change_kind, entry_row
+from queries import entry_key, precedes, sort_terms
+
+
+class EditSession:
+    """Inserts, updates and deletes staged in memory and committed in one transaction.
+
+    The session overlays its changes on source (the DatabaseManager or a
+    ColumnarSnapshot) and has the same count_entries, select_entries_window,
+    position_of and entry_matches methods, so it can back RaceWinnersTableModel
+    while changes are pending. Writes take the DatabaseManager's arguments and
+    notify listeners the same way, so the grid is patched per change. Each
+    source row's filter match and position is read once per filter and order,
+    and read again once DatabaseManager.data_generation() changes.
+
+    commit() writes the net effect of the changes through
+    DatabaseManager.apply_changes, which journals it as a session that
+    DatabaseManager.rollback_session can undo later.
+    """
+
+    def __init__(self, db_manager, source=None):
+        self.db_manager = db_manager
+        self.source = source if source is not None else db_manager
+        self.changes = []
+        self.undone = []
+        self._listeners = []
+        # Source rows replaced or removed, and rows added or replacing them, by natural key.
+        self._removed = {}
+        self._added = {}
+        self._version = 0
+        self._layouts = {}
+        # (search_term, class_filter, sort terms) -> {row: (matches, source position)}.
+        self._source_rows = {}
+        self._source_generation = None
+
+    def __len__(self):
+        return len(self.changes)
+
+    def add_change_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, old_row, new_row):
+        for listener in list(self._listeners):
+            listener(change_kind(old_row, new_row), old_row, new_row)
+
+    # Staging
+
+    def _current(self, key):
+        if key in self._added:
+            return self._added[key]
+        if key in self._removed:
+            return None
+        return self.db_manager.get_entry(*key)
+
+    def _stage(self, old_row, new_row):
+        if new_row is not None and (old_row is None or entry_key(new_row) != entry_key(old_row)) \
+                and self._current(entry_key(new_row)) is not None:
+            raise DuplicateEntryError("An entry with this Season, Circuit, Class, Rider, and Race already exists. "
+                                      "Please ensure uniqueness.")
+        self.undone.clear()
+        self._apply(old_row, new_row)
+        return True
+
+    def _apply(self, old_row, new_row):
+        self.changes.append((old_row, new_row))
+        self._track(old_row, new_row)
+        self._notify(old_row, new_row)
+
+    def _track(self, old_row, new_row):
+        self._version += 1
+        if old_row is not None:
+            key = entry_key(old_row)
+            if self._added.pop(key, None) is None:
+                self._removed[key] = old_row
+        if new_row is not None:
+            key = entry_key(new_row)
+            if self._removed.get(key) == new_row:
+                del self._removed[key]
+            else:
+                self._added[key] = new_row
+
+    def insert_entry(self, season, circuit, class_name, rider, constructor, country, race=1):
+        return self._stage(None, entry_row(season, circuit, class_name, rider, constructor, country, race))
+
+    def update_entry(self, original_season, original_circuit, original_class_name, original_rider,
+                     new_season, new_circuit, new_class_name, new_rider, new_constructor, new_country,
+                     original_race=1, new_race=None):
+        old_row = self._current((int(original_season), original_circuit, original_class_name, original_rider,
+                                 int(original_race)))
+        if old_row is None:
+            raise StaleEntryError("The selected entry no longer exists.")
+        return self._stage(old_row, entry_row(new_season, new_circuit, new_class_name, new_rider, new_constructor,
+                                              new_country, original_race if new_race is None else new_race))
+
+    def delete_entry(self, season, circuit, class_name, rider, race=1):
+        old_row = self._current((int(season), circuit, class_name, rider, int(race)))
+        if old_row is None:
+            raise StaleEntryError("The selected entry no longer exists.")
+        return self._stage(old_row, None)
+
+    def undo(self):
+        if not self.changes:
+            return False
+        old_row, new_row = self.changes.pop()
+        self.undone.append((old_row, new_row))
+        self._removed.clear()
+        self._added.clear()
+        for change in self.changes:
+            self._track(*change)
+        self._notify(new_row, old_row)
+        return True
+
+    def redo(self):
+        if not self.undone:
+            return False
+        self._apply(*self.undone.pop())
+        return True
+
+    def net_changes(self):
+        # Deletes first, so no insert or key change meets a key the session frees.
+        deletes = [(row, None) for key, row in self._removed.items() if key not in self._added]
+        updates = [(row, self._added[key]) for key, row in self._removed.items() if key in self._added]
+        inserts = [(None, row) for key, row in self._added.items() if key not in self._removed]
+        return deletes + updates + inserts
+
+    def commit(self):
+        """Apply the net changes in one transaction; returns the edit session id, or None if there were none."""
+        changes = self.net_changes()
+        session_id = self.db_manager.apply_changes(changes) if changes else None
+        self.changes.clear()
+        self.undone.clear()
+        self._removed.clear()
+        self._added.clear()
+        self._version += 1
+        return session_id
+
+    # Table model source
+
+    def _layout(self, search_term, class_filter, order):
+        generation = self.db_manager.data_generation()
+        if generation != self._source_generation:
+            # The source was written to outside the session; positions read from it are stale.
+            self._layouts.clear()
+            self._source_rows.clear()
+            self._source_generation = generation
+        layout_key = (search_term, class_filter, sort_terms(order))
+        layout = self._layouts.get(layout_key)
+        if layout is not None and layout[0] == self._version:
+            return layout[1:]
+        source_rows = self._source_rows.setdefault(layout_key, {})
+
+        def matches(row, stored):
+            cached = source_rows.get(row)
+            if cached is None:
+                check = self.source.entry_matches if stored else self.source.row_matches
+                visible = check(row, search_term, class_filter)
+                cached = source_rows[row] = (
+                    visible, self.source.position_of(row, search_term, class_filter, order) if visible else None)
+            return cached
+
+        removed = sorted(position for visible, position in (matches(row, True) for row in self._removed.values())
+                         if visible)
+        terms = layout_key[2]
+        compare = functools.cmp_to_key(lambda a, b: -1 if precedes(a, b, terms) else int(precedes(b, a, terms)))
+        added = sorted((row for row in self._added.values() if matches(row, False)[0]),
+                       key=lambda row: source_rows[row][1])
+        # Rows between the same two source rows are put in order among themselves.
+        start = 0
+        for end in range(1, len(added) + 1):
+            if end == len(added) or source_rows[added[end]][1] != source_rows[added[start]][1]:
+                if end - start > 1:
+                    added[start:end] = sorted(added[start:end], key=compare)
+                start = end
+        # Position of each added row among the session's rows.
+        positions = []
+        for index, row in enumerate(added):
+            position = source_rows[row][1]
+            positions.append(index + position - bisect.bisect_left(removed, position))
+        self._layouts[layout_key] = (self._version, removed, added, positions)
+        return removed, added, positions
+
+    def count_entries(self, search_term="", category_filter="All"):
+        removed, added, _ = self._layout(search_term, category_filter, ())
+        return self.source.count_entries(search_term, category_filter) - len(removed) + len(added)
+
+    def select_entries_window(self, search_term="", category_filter="All", limit=200, offset=0, order=()):
+        removed, added, positions = self._layout(search_term, category_filter, order)
+        if not removed and not added:
+            return self.source.select_entries_window(search_term, category_filter, limit, offset, order)
+        end = min(offset + limit, self.count_entries(search_term, category_filter))
+        if offset >= end:
+            return []
+        # Source offset of the first source row in the window.
+        j = bisect.bisect_left(positions, offset)
+        start = offset - j
+        for position in removed:
+            if position > start:
+                break
+            start += 1
+        # Enough source rows to fill the window once the removed ones among them are dropped.
+        first = bisect.bisect_left(removed, start)
+        fetch = end - offset
+        while fetch - (bisect.bisect_left(removed, start + fetch) - first) < end - offset:
+            fetch = end - offset + bisect.bisect_left(removed, start + fetch) - first
+        source_rows = iter([row for row in self.source.select_entries_window(
+            search_term, category_filter, fetch, start, order) if entry_key(row) not in self._removed])
+
+        rows = []
+        for position in range(offset, end):
+            if j < len(positions) and positions[j] == position:
+                rows.append(added[j])
+                j += 1
+                continue
+            row = next(source_rows, None)
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def position_of(self, row, search_term="", category_filter="All", order=()):
+        removed, added, _ = self._layout(search_term, category_filter, order)
+        terms = sort_terms(order)
+        position = self.source.position_of(row, search_term, category_filter, order)
+        return (position - bisect.bisect_left(removed, position) +
+                sum(1 for other in added if precedes(other, row, terms)))
+
+    def entry_matches(self, row, search_term="", category_filter="All"):
+        key = entry_key(row)
+        if key in self._added:
+            return self.source.row_matches(self._added[key], search_term, category_filter)
+        if key in self._removed:
+            return False
+        return self.source.entry_matches(row, search_term, category_filter)
+
+    def row_matches(self, row, search_term="", category_filter="All"):
+        return self.source.row_matches(row, search_term, category_filter)
@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger("motogp.queries")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+SLOW_QUERY_ENV = "MOTOGP_SLOW_QUERY_MS"
+
+
+def default_slow_query_ms():
+    """The slow-query threshold set by MOTOGP_SLOW_QUERY_MS, else DEFAULT_SLOW_QUERY_MS.
+
+    Read when a QueryStats is created, so a bad value only costs a warning.
+    """
+    raw = os.environ.get(SLOW_QUERY_ENV, "").strip()
+    if not raw:
+        return DEFAULT_SLOW_QUERY_MS
+    try:
+        value = float(raw)
+    except ValueError:
+        value = None
+    if value is None or not value >= 0:
+        logger.warning("Ignoring %s=%r, which is not a number of milliseconds; using %s ms",
+                       SLOW_QUERY_ENV, raw, DEFAULT_SLOW_QUERY_MS)
+        return DEFAULT_SLOW_QUERY_MS
+    return value
+
+
+def normalize_sql(sql):
+    return " ".join(sql.split())
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def add(self, elapsed_ms, rows=0):
+        index = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the requested rank; max_ms for the open bucket.
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return round(min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms, 4)
+        return round(self.max_ms, 4)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 4) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {(f"<={bound}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"): count
+                        for i, (bound, count) in enumerate(zip(BUCKETS_MS + (None,), self.counts)) if count},
+        }
+
+
+class QueryStats:
+    """Per-statement latency histograms, UI phase timings and a slow-query log.
+
+    Statements slower than slow_query_ms (default: default_slow_query_ms()) are
+    logged to the "motogp.queries" logger with their parameters and EXPLAIN QUERY
+    PLAN output, and kept in slow_queries.
+    """
+
+    def __init__(self, slow_query_ms=None, max_slow_queries=100):
+        self.slow_query_ms = default_slow_query_ms() if slow_query_ms is None else slow_query_ms
+        self.max_slow_queries = max_slow_queries
+        self.enabled = True
+        self.statements = {}
+        self.phases = {}
+        self.slow_queries = []
+        self._lock = threading.Lock()
+
+    def execute(self, conn, sql, params=(), fetch="all"):
+        """Run sql on conn and record it; fetch is "all", "one" or None (return the cursor)."""
+        if not self.enabled:
+            cursor = conn.execute(sql, params)
+            return cursor if fetch is None else (cursor.fetchall() if fetch == "all" else cursor.fetchone())
+        started = time.perf_counter()
+        cursor = conn.execute(sql, params)
+        if fetch == "all":
+            result = cursor.fetchall()
+            rows = len(result)
+        elif fetch == "one":
+            result = cursor.fetchone()
+            rows = 0 if result is None else 1
+        else:
+            result = cursor
+            rows = max(cursor.rowcount, 0)
+        self.observe(sql, params, (time.perf_counter() - started) * 1000, rows, conn)
+        return result
+
+    def executemany(self, conn, sql, seq_of_params):
+        # Recorded as one statement, with a row per parameter set; not explained when slow.
+        seq_of_params = list(seq_of_params)
+        started = time.perf_counter()
+        cursor = conn.executemany(sql, seq_of_params)
+        if self.enabled:
+            self.observe(sql, (), (time.perf_counter() - started) * 1000, len(seq_of_params))
+        return cursor
+
+    def observe(self, sql, params, elapsed_ms, rows=0, conn=None):
+        key = normalize_sql(sql)
+        with self._lock:
+            histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = LatencyHistogram()
+            histogram.add(elapsed_ms, rows)
+        if elapsed_ms >= self.slow_query_ms:
+            self._log_slow(key, params, elapsed_ms, rows, conn)
+
+    def observe_phase(self, name, elapsed_ms, rows=0):
+        with self._lock:
+            histogram = self.phases.get(name)
+            if histogram is None:
+                histogram = self.phases[name] = LatencyHistogram()
+            histogram.add(elapsed_ms, rows)
+
+    def _log_slow(self, sql, params, elapsed_ms, rows, conn):
+        plan = []
+        if conn is not None and not sql.upper().startswith(("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK")):
+            try:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            except Exception as e:  # the plan is diagnostic only
+                plan = [f"unavailable: {e}"]
+        entry = {
+            "sql": sql,
+            "params": [repr(param) for param in params],
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows": rows,
+            "plan": plan,
+            "at": time.time(),
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+            del self.slow_queries[:-self.max_slow_queries]
+        logger.warning("Slow query (%.1f ms, %d rows): %s params=%s plan=%s",
+                       elapsed_ms, rows, sql, entry["params"], " | ".join(plan))
+
+    def summary(self):
+        with self._lock:
+            histograms = list(self.statements.values())
+        count = sum(histogram.count for histogram in histograms)
+        total_ms = sum(histogram.total_ms for histogram in histograms)
+        return {"queries": count, "total_ms": round(total_ms, 3), "slow_queries": len(self.slow_queries)}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "statements": {sql: histogram.to_dict() for sql, histogram in self.statements.items()},
+                "phases": {name: histogram.to_dict() for name, histogram in self.phases.items()},
+                "slow_queries": list(self.slow_queries),
+            }
+
+    def dump_json(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle, indent=2, ensure_ascii=False)
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.phases.clear()
+            self.slow_queries.clear()
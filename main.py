@@ -1,175 +1,239 @@
+import time
+STARTED = time.perf_counter()
+
 import sys
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QMessageBox, QTableWidgetItem
+    QApplication, QMainWindow, QMessageBox, QCompleter, QTableWidgetItem, QShortcut, QInputDialog
 )
-from PyQt5.QtGui import QIntValidator
-from PyQt5.QtCore import Qt, QDate
-import sqlite3
-import datetime
+from PyQt5.QtGui import QIntValidator, QKeySequence
+from PyQt5.QtCore import Qt, QEvent, QStringListModel, QThreadPool, QTimer, pyqtSignal
+import bisect
 
 
 from ui_motogp_viewer import Ui_MainWindow
+from table_model import COLUMNS, RaceWinnersTableModel
+from query_worker import DatabaseLoadTask, SearchScheduler
+from migrations import ALL_SEASONS, ALL_CLASSES
+from database import DatabaseError, DuplicateEntryError
+from edit_session import EditSession
+from startup import FirstPaintCache, StartupTimer
 
 
-class DatabaseManager:
-  
-
-    def __init__(self, db_name="motogp_database.db"):
-        self.db_name = db_name
-        self.conn = None
-        self.connect()
-
-    def connect(self):
-        try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.cursor = self.conn.cursor()
-        except sqlite3.Error as e:
-            QMessageBox.critical(None, "Database Connection Error",
-                                 f"Could not connect to database: {e}\n"
-                                 "The application will now exit.")
-            sys.exit(1)
-
-
+class MotoGPApp(QMainWindow, Ui_MainWindow):
+    """Main window.
 
-    def insert_entry(self, season, circuit, class_name, rider, constructor, country):
-        try:
-            self.cursor.execute("""
-                INSERT INTO grand_prix_race_winners (Season, Circuit, Class, Rider, Constructor, Country)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (season, circuit, class_name, rider, constructor, country))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(None, "Input Error",
-                                "An entry with this Season, Circuit, Class, and Rider already exists. Please ensure uniqueness.")
-            return False
-        except sqlite3.Error as e:
-            QMessageBox.critical(None, "Database Error", f"Error adding entry: {e}")
-            return False
-
-    def select_all_entries(self, search_term="", category_filter="All"):
-        query = """
-            SELECT Season, Circuit, Class, Rider, Constructor, Country
-            FROM grand_prix_race_winners
-        """
-        params = []
-        conditions = []
-
-        if search_term:
-            conditions.append('Circuit LIKE ?')
-            params.append('%' + search_term + '%')
-
-        if category_filter != "All":
-            conditions.append('Class = ?')
-            params.append(category_filter)
-
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-
-        query += " ORDER BY Season DESC, Circuit ASC"
-
-        self.cursor.execute(query, tuple(params))
-        return self.cursor.fetchall()
-
-    def update_entry(self, original_season, original_circuit, original_class_name, original_rider,
-                     new_season, new_circuit, new_class_name, new_rider, new_constructor, new_country):
-        try:
-            self.cursor.execute("""
-                UPDATE grand_prix_race_winners
-                SET Season = ?, Circuit = ?, Class = ?, Rider = ?, Constructor = ?, Country = ?
-                WHERE Season = ? AND Circuit = ? AND Class = ? AND Rider = ?
-            """, (new_season, new_circuit, new_class_name, new_rider, new_constructor, new_country,
-                  original_season, original_circuit, original_class_name, original_rider))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(None, "Input Error",
-                                "An entry with the new Season, Circuit, Class, and Rider already exists. Please ensure uniqueness.")
-            return False
-        except sqlite3.Error as e:
-            QMessageBox.critical(None, "Database Error", f"Error updating entry: {e}")
-            return False
-
-    def delete_entry(self, season, circuit, class_name, rider):
-        try:
-            self.cursor.execute("""
-                DELETE FROM grand_prix_race_winners
-                WHERE Season = ? AND Circuit = ? AND Class = ? AND Rider = ?
-            """, (season, circuit, class_name, rider))
-            self.conn.commit()
-            return True
-        except sqlite3.Error as e:
-            QMessageBox.critical(None, "Database Error", f"Error deleting entry: {e}")
-            return False
-
-    def get_unique_classes(self):
-        self.cursor.execute(
-            "SELECT DISTINCT Class FROM grand_prix_race_winners WHERE Class IS NOT NULL AND Class != '' ORDER BY Class ASC")
-        return [row[0] for row in self.cursor.fetchall()]
-
-    def get_unique_countries(self):
-        self.cursor.execute(
-            "SELECT DISTINCT Country FROM grand_prix_race_winners WHERE Country IS NOT NULL AND Country != '' ORDER BY Country ASC")
-        return [row[0] for row in self.cursor.fetchall()]
-
-    def close(self):
-        if self.conn:
-            self.conn.close()
+    The window comes up before the database is opened: the grid first shows the
+    last view persisted by FirstPaintCache, then DatabaseLoadTask opens the
+    database on a worker thread and on_database_loaded swaps in the live data.
+    """
 
-class MotoGPApp(QMainWindow, Ui_MainWindow):
+    ready = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, db_name="motogp_database.db", in_memory=False, startup_timer=None):
         super().__init__()
+        self.startup_timer = startup_timer or StartupTimer()
         self.setupUi(self)
-
-        self.db_manager = DatabaseManager()
+        self.startup_timer.mark("setup_ui")
 
         self.setStatusBar(self.statusbar)
 
-
+        self.db_name = db_name
+        self.in_memory = in_memory
+        self.db_manager = None
+        self.snapshot = None
+        self.search_scheduler = None
+        self.query_stats_dock = None
+        self.edit_session = None
+        # Set while a batch of writes is committed; the grid is then patched once.
+        self._applying_batch = False
         self._current_selected_key = None
-
+        self._profile_rider = None
+        # How long closing waits for worker threads before giving up on them.
+        self.shutdown_timeout_ms = 3000
+
+        self.table_model = RaceWinnersTableModel(None, parent=self)
+        self.data_table.setModel(self.table_model)
+        self.first_paint_cache = FirstPaintCache(db_name)
+        view = self.first_paint_cache.load()
+        self.paint_cached_view(view)
+        self.data_table.viewport().installEventFilter(self)
+
+        self.rider_completer_model = QStringListModel(self)
+        self.constructor_completer_model = QStringListModel(self)
+        for line_edit, model in ((self.rider_input, self.rider_completer_model),
+                                 (self.constructor_input, self.constructor_completer_model)):
+            completer = QCompleter(model, self)
+            completer.setCaseSensitivity(Qt.CaseInsensitive)
+            completer.setFilterMode(Qt.MatchContains)
+            line_edit.setCompleter(completer)
 
         self.season_input.setValidator(QIntValidator(1949, 2022))
-
+        # Writes and statistics wait for the database.
+        for widget in (self.add_entry_button, self.update_entry_button, self.delete_entry_button,
+                       self.statistics_tab):
+            widget.setEnabled(False)
+        self.update_session_buttons()
 
         self.add_entry_button.clicked.connect(self.add_entry)
         self.update_entry_button.clicked.connect(self.update_entry)
         self.delete_entry_button.clicked.connect(self.delete_entry)
         self.clear_form_button.clicked.connect(self.clear_form)
+        self.start_session_button.clicked.connect(self.start_edit_session)
+        self.commit_session_button.clicked.connect(self.commit_edit_session)
+        self.discard_session_button.clicked.connect(self.discard_edit_session)
+        self.undo_button.clicked.connect(self.undo_change)
+        self.redo_button.clicked.connect(self.redo_change)
+        self.rollback_session_button.clicked.connect(self.rollback_edit_session)
         self.search_input.textChanged.connect(self.search_data)
         self.class_filter_combo.currentIndexChanged.connect(self.filter_data_by_class)
         self.data_table.clicked.connect(self.load_entry_to_form)
-        self.load_all_data()
-        self.populate_filters()
 
+        self._statistics_stale = True
+        self.central_widget.currentChanged.connect(self.on_tab_changed)
+        self.stats_dimension_combo.currentIndexChanged.connect(self.show_leaderboard)
+        self.stats_season_combo.currentIndexChanged.connect(self.show_leaderboard)
+        self.stats_class_combo.currentIndexChanged.connect(self.show_leaderboard)
+        self.leaderboard_table.itemSelectionChanged.connect(self.show_win_history)
+        self.circuit_history_combo.currentIndexChanged.connect(self.show_circuit_history)
+
+        self.query_stats_shortcut = QShortcut(QKeySequence("F12"), self)
+        self.query_stats_shortcut.activated.connect(self.toggle_query_stats)
+        self.undo_shortcut = QShortcut(QKeySequence.Undo, self)
+        self.undo_shortcut.activated.connect(self.undo_change)
+        self.redo_shortcut = QShortcut(QKeySequence.Redo, self)
+        self.redo_shortcut.activated.connect(self.redo_change)
+
+        self._loaded_view = (self.search_input.text(), self.class_filter_combo.currentText(),
+                             self.table_model.order())
+        self._load_task = DatabaseLoadTask(db_name, *self._loaded_view, self.table_model.page_size,
+                                           self.startup_timer)
+        self._load_task.signals.loaded.connect(self.on_database_loaded)
+        self._load_task.signals.failed.connect(self.on_database_failed)
+        QThreadPool.globalInstance().start(self._load_task)
+        if view:
+            self.statusBar().showMessage(f"Opening database... (showing {view['total']} entries from the last session)")
+        else:
+            self.statusBar().showMessage("Opening database...")
+
+    def paint_cached_view(self, view):
+        # Restores the last search, filter and sort and shows its first rows read-only
+        # until the database is open. Signals are connected after this runs.
+        header = self.data_table.horizontalHeader()
+        if view and view["order"]:
+            column, descending = view["order"][0]
+            header.setSortIndicator(COLUMNS.index(column), Qt.DescendingOrder if descending else Qt.AscendingOrder)
+        else:
+            header.setSortIndicator(0, Qt.DescendingOrder)
+        # Sorting is done by the model in SQL; enabling it applies the indicator's order.
+        self.data_table.setSortingEnabled(True)
+        if not view:
+            return
+        self.table_model.set_order(view["order"])
+        self.search_input.setText(view["search_term"])
+        if view["class_filter"] != "All":
+            self.class_filter_combo.addItem(view["class_filter"])
+            self.class_filter_combo.setCurrentText(view["class_filter"])
+        self.table_model.apply_results(view["search_term"], view["class_filter"], len(view["rows"]), view["rows"])
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and watched is self.data_table.viewport():
+            watched.removeEventFilter(self)
+            self.startup_timer.mark("first_paint")
+        return super().eventFilter(watched, event)
+
+    def on_database_loaded(self, db_manager, total, first_page):
+        if not self._load_task.claim(db_manager):
+            return  # the window was closed while the database was opening
+        self.db_manager = db_manager
+        # In-memory mode filters a columnar copy of the table synchronously; the
+        # snapshot listener is registered first so it is patched before the model.
+        if self.in_memory:
+            from columnar_snapshot import ColumnarSnapshot
+            started = time.perf_counter()
+            self.snapshot = ColumnarSnapshot.from_database(self.db_manager)
+            self.db_manager.query_stats.observe_phase("load_snapshot", (time.perf_counter() - started) * 1000,
+                                                      len(self.snapshot))
+            self.db_manager.add_change_listener(self.snapshot.apply_change)
+            self.startup_timer.mark("load_snapshot")
+        self.table_model.source = self.snapshot if self.snapshot is not None else self.db_manager
+
+        self.search_scheduler = SearchScheduler(self.db_manager, page_size=self.table_model.page_size, parent=self)
+        self.search_scheduler.results_ready.connect(self.show_search_results)
+        self.search_scheduler.query_failed.connect(self.show_search_error)
+        self.db_manager.add_change_listener(self.on_entry_changed)
 
+        self.populate_filters()
+        search_term, class_filter = self.search_input.text(), self.class_filter_combo.currentText()
+        if (search_term, class_filter, self.table_model.order()) == self._loaded_view:
+            self.show_search_results(search_term, class_filter, self.table_model.order(), total, first_page)
+        else:
+            # The search, filter or sort changed while the database was opening.
+            self.load_all_data(search_term, class_filter)
+        for widget in (self.add_entry_button, self.update_entry_button, self.delete_entry_button,
+                       self.statistics_tab):
+            widget.setEnabled(True)
+        self.update_session_buttons()
+        if self.central_widget.currentWidget() is self.statistics_tab:
+            self.refresh_statistics()
+        self.startup_timer.mark("ready")
+        self.ready.emit()
+
+    def on_database_failed(self, message):
+        QMessageBox.critical(self, "Database Connection Error", f"{message}\nThe application will now exit.")
+        QApplication.exit(1)
 
     def load_all_data(self, search_term="", class_filter="All"):
-        entries = self.db_manager.select_all_entries(search_term, class_filter)
-        self.data_table.setRowCount(0)  # Clear existing rows
-        for row_num, entry in enumerate(entries):
-            self.data_table.insertRow(row_num)
-            for col_num, data in enumerate(entry):
-                self.data_table.setItem(row_num, col_num, QTableWidgetItem(str(data)))
-        self.statusBar().showMessage(f"Loaded {len(entries)} entries.", 3000)
+        self.search_scheduler.cancel()
+        started = time.perf_counter()
+        total = self.table_model.set_filter(search_term, class_filter)
+        self.db_manager.query_stats.observe_phase("load_all_data", (time.perf_counter() - started) * 1000, total)
+        self.statusBar().showMessage(f"Loaded {total} entries.", 3000)
 
     def search_data(self):
+        if self.db_manager is None:
+            return
         search_text = self.search_input.text()
         current_filter = self.class_filter_combo.currentText()
-        self.load_all_data(search_text, current_filter)
+        if self.snapshot is not None or self.edit_session is not None:
+            return self.load_all_data(search_text, current_filter)
+        self.search_scheduler.schedule(search_text, current_filter, order=self.table_model.order())
+        self.statusBar().showMessage("Searching...")
 
     def filter_data_by_class(self):
+        if self.db_manager is None:
+            return
         selected_class = self.class_filter_combo.currentText()
         search_text = self.search_input.text()  # Keep search text when filtering
-        self.load_all_data(search_text, selected_class)
+        if self.snapshot is not None or self.edit_session is not None:
+            return self.load_all_data(search_text, selected_class)
+        self.search_scheduler.schedule(search_text, selected_class, immediate=True,
+                                       order=self.table_model.order())
+        self.statusBar().showMessage("Searching...")
+
+    def show_search_results(self, search_term, class_filter, order, total, first_page):
+        if self.edit_session is not None:
+            # Issued before the session started; the results lack its changes.
+            return self.load_all_data(search_term, class_filter)
+        started = time.perf_counter()
+        if order != self.table_model.order():
+            # The sort changed while the query ran; let the model read the page itself.
+            first_page = None
+        self.table_model.apply_results(search_term, class_filter, total, first_page)
+        self.db_manager.query_stats.observe_phase("apply_search_results", (time.perf_counter() - started) * 1000,
+                                                  total)
+        self.statusBar().showMessage(f"Loaded {total} entries.", 3000)
+
+    def show_search_error(self, message):
+        self.statusBar().showMessage(f"Search failed: {message}", 5000)
 
     def populate_filters(self):
         classes = self.db_manager.get_unique_classes()
+        current = self.class_filter_combo.currentText()
         self.class_filter_combo.blockSignals(True)
         self.class_filter_combo.clear()
         self.class_filter_combo.addItem("All")
         self.class_filter_combo.addItems(sorted(classes))
+        self.class_filter_combo.setCurrentIndex(max(self.class_filter_combo.findText(current), 0))
         self.class_filter_combo.blockSignals(False)
 
         countries = self.db_manager.get_unique_countries()
@@ -179,17 +243,141 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
         self.country_input.addItems(sorted(countries))
         self.country_input.blockSignals(False)
 
+        self.update_completers()
+
+    def on_entry_changed(self, change, old_row, new_row):
+        if self._applying_batch:
+            return
+        self.table_model.apply_change(old_row, new_row)
+        self.update_filter_values(old_row, new_row)
+        self.update_completers(old_row, new_row)
+        self._statistics_stale = True
+        if self.central_widget.currentWidget() is self.statistics_tab:
+            self.refresh_statistics()
+        if self._profile_rider and any(row and row[3] == self._profile_rider for row in (old_row, new_row)):
+            self.show_rider_profile(self._profile_rider)
+
+    def toggle_query_stats(self):
+        if self.db_manager is None:
+            return
+        if self.query_stats_dock is None:
+            from debug_panel import QueryStatsDock
+            self.query_stats_dock = QueryStatsDock(self.db_manager.query_stats, self)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.query_stats_dock)
+            self.query_stats_dock.hide()
+        self.query_stats_dock.setVisible(not self.query_stats_dock.isVisible())
+
+    def on_tab_changed(self, index):
+        if self.db_manager is None:
+            return
+        if self.central_widget.widget(index) is self.statistics_tab and self._statistics_stale:
+            self.refresh_statistics()
+
+    def refresh_statistics(self):
+        self._statistics_stale = False
+        for combo, items in ((self.stats_season_combo, [str(season) for season in self.db_manager.get_seasons()]),
+                             (self.stats_class_combo, self.db_manager.get_unique_classes())):
+            current = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("All")
+            combo.addItems(items)
+            combo.setCurrentIndex(max(combo.findText(current), 0))
+            combo.blockSignals(False)
+
+        current = self.circuit_history_combo.currentText()
+        self.circuit_history_combo.blockSignals(True)
+        self.circuit_history_combo.clear()
+        self.circuit_history_combo.addItems(self.db_manager.get_circuits())
+        self.circuit_history_combo.setCurrentIndex(max(self.circuit_history_combo.findText(current), 0))
+        self.circuit_history_combo.blockSignals(False)
+
+        self.show_leaderboard()
+        self.show_circuit_history()
+
+    def show_leaderboard(self):
+        dimension = self.stats_dimension_combo.currentData()
+        season_text = self.stats_season_combo.currentText()
+        season = int(season_text) if season_text.isdigit() else ALL_SEASONS
+        class_name = self.stats_class_combo.currentText() or ALL_CLASSES
+        leaders = self.db_manager.get_leaderboard(dimension, season, class_name)
+
+        self.leaderboard_table.blockSignals(True)
+        self.leaderboard_table.setRowCount(len(leaders))
+        for row_num, (name, wins) in enumerate(leaders):
+            titles = self.db_manager.get_constructor_titles(name, class_name) if dimension == "constructor" else ""
+            for col_num, data in enumerate((name, wins, titles)):
+                self.leaderboard_table.setItem(row_num, col_num, QTableWidgetItem(str(data)))
+        self.leaderboard_table.blockSignals(False)
+        self.win_history_table.setRowCount(0)
+
+    def show_win_history(self):
+        selected_row = self.leaderboard_table.currentRow()
+        if selected_row < 0:
+            return
+        name = self.leaderboard_table.item(selected_row, 0).text()
+        history = self.db_manager.get_win_history(self.stats_dimension_combo.currentData(), name)
+        self.win_history_table.setRowCount(len(history))
+        for row_num, entry in enumerate(history):
+            for col_num, data in enumerate(entry):
+                self.win_history_table.setItem(row_num, col_num, QTableWidgetItem(str(data)))
+
+    def show_circuit_history(self):
+        circuit = self.circuit_history_combo.currentText()
+        history = self.db_manager.get_circuit_history(circuit) if circuit else []
+        self.circuit_history_table.setRowCount(len(history))
+        for row_num, entry in enumerate(history):
+            for col_num, data in enumerate(entry):
+                self.circuit_history_table.setItem(row_num, col_num, QTableWidgetItem("" if data is None else str(data)))
+
+        times_held, lockouts = self.db_manager.get_circuit_facts(circuit) if circuit else (None, 0)
+        facts = [f"{len(history)} recorded wins"]
+        if times_held is not None:
+            facts.append(f"Grand Prix held {times_held} times")
+        if lockouts:
+            facts.append(f"{lockouts} same-nation podium lockouts")
+        self.circuit_facts_label.setText(", ".join(facts))
+
+    def update_completers(self, old_row=None, new_row=None):
+        for model, getter, position in ((self.rider_completer_model, self.db_manager.get_unique_riders, 3),
+                                        (self.constructor_completer_model, self.db_manager.get_unique_constructors, 4)):
+            old_value = old_row[position] if old_row else None
+            new_value = new_row[position] if new_row else None
+            if (old_row is None and new_row is None) or old_value != new_value:
+                model.setStringList(getter())
+
+    def update_filter_values(self, old_row, new_row):
+        # Only touch the combos when a class or country value first appears or last disappears.
+        # Both combos keep a placeholder ("All" / "") at index 0.
+        class_filter_removed = False
+        for combo, column, position in ((self.class_filter_combo, "Class", 2),
+                                        (self.country_input, "Country", 5)):
+            old_value = old_row[position] if old_row else None
+            new_value = new_row[position] if new_row else None
+            if old_value == new_value:
+                continue
+            values = [combo.itemText(i) for i in range(1, combo.count())]
+            combo.blockSignals(True)
+            if new_value and new_value not in values:
+                combo.insertItem(1 + bisect.bisect_left(values, new_value), new_value)
+            if old_value and old_value in values and not self.db_manager.value_exists(column, old_value):
+                index = combo.findText(old_value, Qt.MatchExactly)
+                if combo.currentIndex() == index:
+                    combo.setCurrentIndex(0)
+                    class_filter_removed = combo is self.class_filter_combo
+                combo.removeItem(index)
+            combo.blockSignals(False)
+        if class_filter_removed:
+            self.filter_data_by_class()
+
     def load_entry_to_form(self):
-        selected_row = self.data_table.currentRow()
-        if selected_row >= 0:
-            season = self.data_table.item(selected_row, 0).text()
-            circuit = self.data_table.item(selected_row, 1).text()
-            class_name = self.data_table.item(selected_row, 2).text()
-            rider = self.data_table.item(selected_row, 3).text()
-            constructor = self.data_table.item(selected_row, 4).text()
-            country = self.data_table.item(selected_row, 5).text()
+        selected_row = self.data_table.currentIndex().row()
+        entry = self.table_model.row_at(selected_row)
+        if entry is not None:
+            season, circuit, class_name, rider, constructor, country, race = (
+                "" if value is None else str(value) for value in entry)
 
-            self._current_selected_key = (season, circuit, class_name, rider)
+            self._current_selected_key = (season, circuit, class_name, rider, int(race))
 
             self.season_input.setText(season)
             self.circuit_input.setText(circuit)
@@ -197,8 +385,53 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
             self.rider_input.setText(rider)
             self.constructor_input.setText(constructor)
             self.country_input.setCurrentText(country)
+            self.race_input.setValue(int(race))
+            self.show_rider_profile(rider)
             self.statusBar().showMessage(f"Loaded entry for: {rider} ({circuit})", 2000)
 
+    def show_rider_profile(self, rider):
+        self._profile_rider = rider
+        profile = self.db_manager.get_rider_profile(rider) if self.db_manager is not None and rider else None
+        self.rider_profile_table.setRowCount(0)
+        if profile is None:
+            self.rider_profile_group.setTitle("Rider Profile")
+            self.rider_profile_label.setText(f"No profile found for {rider}." if self.db_manager and rider else "")
+            return
+
+        self.rider_profile_group.setTitle(f"Rider Profile: {profile.name}")
+        facts = [profile.country] if profile.country else []
+        facts.append(f"{profile.wins} recorded wins")
+        if profile.podiums is not None:
+            facts.append(f"{profile.podiums} podiums")
+        if profile.championships:
+            facts.append(f"{profile.championships} world championships")
+        if profile.pole_positions:
+            facts.append(f"{profile.pole_positions} pole positions")
+        if profile.fastest_laps:
+            facts.append(f"{profile.fastest_laps} fastest laps")
+        self.rider_profile_label.setText(", ".join(facts))
+
+        rows = ([("Class", value, wins) for value, wins in profile.wins_by_class] +
+                [("Season", value, wins) for value, wins in profile.wins_by_season] +
+                [("Circuit", value, wins) for value, wins in profile.wins_by_circuit])
+        self.rider_profile_table.setRowCount(len(rows))
+        for row_num, entry in enumerate(rows):
+            for col_num, data in enumerate(entry):
+                self.rider_profile_table.setItem(row_num, col_num, QTableWidgetItem(str(data)))
+
+    def _writer(self):
+        # Writes are staged while an edit session is open.
+        return self.edit_session if self.edit_session is not None else self.db_manager
+
+    def _run_write(self, write, *args):
+        try:
+            return write(*args)
+        except DuplicateEntryError as e:
+            QMessageBox.warning(self, "Input Error", str(e))
+        except DatabaseError as e:
+            QMessageBox.critical(self, "Database Error", str(e))
+        return False
+
     def add_entry(self):
         season_str = self.season_input.text().strip()
         circuit = self.circuit_input.text().strip()
@@ -206,6 +439,7 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
         rider = self.rider_input.text().strip()
         constructor = self.constructor_input.text().strip()
         country = self.country_input.currentText()
+        race = self.race_input.value()
 
         if not season_str or not circuit or not rider:
             QMessageBox.warning(self, "Input Error", "Season, Circuit, and Rider cannot be empty.")
@@ -216,19 +450,18 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
         except ValueError:
             QMessageBox.warning(self, "Input Error", "Season must be a valid number.")
             return
-        if self.db_manager.insert_entry(season, circuit, class_name, rider, constructor, country):
-            QMessageBox.information(self, "Success", "Entry added successfully!")
+        if self._run_write(self._writer().insert_entry, season, circuit, class_name, rider, constructor, country,
+                           race):
             self.clear_form()
-            self.load_all_data()
-            self.populate_filters()
-            self.statusBar().showMessage(f"Entry for '{rider}' added.", 3000)
+            self.statusBar().showMessage(f"Entry for '{rider}' {self._written('added')}.", 3000)
 
     def update_entry(self):
         if not self._current_selected_key:
             QMessageBox.warning(self, "Selection Error", "Please select an entry to update from the table.")
             return
 
-        original_season, original_circuit, original_class_name, original_rider = self._current_selected_key
+        original_season, original_circuit, original_class_name, original_rider, original_race = \
+            self._current_selected_key
 
         new_season_str = self.season_input.text().strip()
         new_circuit = self.circuit_input.text().strip()
@@ -236,6 +469,7 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
         new_rider = self.rider_input.text().strip()
         new_constructor = self.constructor_input.text().strip()
         new_country = self.country_input.currentText()
+        new_race = self.race_input.value()
 
         if not new_season_str or not new_circuit or not new_rider:
             QMessageBox.warning(self, "Input Error", "Season, Circuit, and Rider cannot be empty for update.")
@@ -246,32 +480,143 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
         except ValueError:
             QMessageBox.warning(self, "Input Error", "Invalid Season format.")
             return
-        if self.db_manager.update_entry(original_season, original_circuit, original_class_name, original_rider,
-                                        new_season, new_circuit, new_class_name, new_rider, new_constructor,
-                                        new_country):
-            QMessageBox.information(self, "Success", "Entry updated successfully!")
+        if self._run_write(self._writer().update_entry,
+                           original_season, original_circuit, original_class_name, original_rider,
+                           new_season, new_circuit, new_class_name, new_rider, new_constructor, new_country,
+                           original_race, new_race):
             self.clear_form()
-            self.load_all_data()
-            self.populate_filters()
-            self.statusBar().showMessage(f"Entry for '{new_rider}' updated.", 3000)
+            self.statusBar().showMessage(f"Entry for '{new_rider}' {self._written('updated')}.", 3000)
 
     def delete_entry(self):
         if not self._current_selected_key:
             QMessageBox.warning(self, "Selection Error", "Please select an entry to delete from the table.")
             return
 
-        original_season, original_circuit, original_class_name, original_rider = self._current_selected_key
-
-        reply = QMessageBox.question(self, "Confirm Delete",
-                                     f"Are you sure you want to delete entry for: {original_rider} ({original_circuit}, {original_season})?",
-                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            if self.db_manager.delete_entry(original_season, original_circuit, original_class_name, original_rider):
-                QMessageBox.information(self, "Success", "Entry deleted successfully!")
-                self.clear_form()
-                self.load_all_data()
-                self.populate_filters()
-                self.statusBar().showMessage(f"Entry for {original_rider} deleted.", 3000)
+        original_season, original_circuit, original_class_name, original_rider, original_race = \
+            self._current_selected_key
+
+        # Staged deletes can be undone, so only immediate ones are confirmed.
+        if self.edit_session is None:
+            reply = QMessageBox.question(self, "Confirm Delete",
+                                         f"Are you sure you want to delete entry for: {original_rider} ({original_circuit}, {original_season})?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        if self._run_write(self._writer().delete_entry,
+                           original_season, original_circuit, original_class_name, original_rider, original_race):
+            self.clear_form()
+            self.statusBar().showMessage(f"Entry for {original_rider} {self._written('deleted')}.", 3000)
+
+    def _written(self, verb):
+        return f"{verb} (staged)" if self.edit_session is not None else verb
+
+    # Edit sessions
+
+    def update_session_buttons(self):
+        ready = self.db_manager is not None
+        session = self.edit_session
+        self.start_session_button.setEnabled(ready and session is None)
+        self.rollback_session_button.setEnabled(ready and session is None)
+        self.commit_session_button.setEnabled(session is not None)
+        self.discard_session_button.setEnabled(session is not None)
+        self.undo_button.setEnabled(bool(session and session.changes))
+        self.redo_button.setEnabled(bool(session and session.undone))
+        self.session_status_label.setText(
+            "" if session is None else f"Edit session: {len(session.changes)} staged changes")
+
+    def start_edit_session(self):
+        if self.db_manager is None or self.edit_session is not None:
+            return
+        self.edit_session = EditSession(self.db_manager, self.table_model.source)
+        self.edit_session.add_change_listener(self.on_staged_change)
+        self.table_model.source = self.edit_session
+        self.update_session_buttons()
+
+    def on_staged_change(self, change, old_row, new_row):
+        self.table_model.apply_change(old_row, new_row)
+        self.update_session_buttons()
+
+    def undo_change(self):
+        if self.edit_session is not None and self.edit_session.undo():
+            self.statusBar().showMessage("Change undone.", 2000)
+
+    def redo_change(self):
+        if self.edit_session is not None and self.edit_session.redo():
+            self.statusBar().showMessage("Change redone.", 2000)
+
+    def _end_edit_session(self):
+        self.table_model.source = self.edit_session.source
+        self.edit_session = None
+        self.update_session_buttons()
+
+    def _after_batch_write(self):
+        # One refresh of everything on_entry_changed patches per write.
+        self.populate_filters()
+        self._statistics_stale = True
+        if self.central_widget.currentWidget() is self.statistics_tab:
+            self.refresh_statistics()
+        if self._profile_rider:
+            self.show_rider_profile(self._profile_rider)
+
+    def commit_edit_session(self):
+        session = self.edit_session
+        if session is None:
+            return
+        count = len(session.net_changes())
+        self._applying_batch = True
+        try:
+            session_id = self._run_write(session.commit)
+        finally:
+            self._applying_batch = False
+        if session_id is False:
+            return
+        # The grid already shows the committed rows.
+        self._end_edit_session()
+        self._after_batch_write()
+        if session_id is None:
+            self.statusBar().showMessage("Edit session closed; nothing to commit.", 3000)
+        else:
+            self.statusBar().showMessage(f"Committed {count} changes as edit session {session_id}.", 3000)
+
+    def discard_edit_session(self):
+        session = self.edit_session
+        if session is None:
+            return
+        if session.changes:
+            reply = QMessageBox.question(self, "Discard Changes",
+                                         f"Discard {len(session.changes)} staged changes?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        self._end_edit_session()
+        if session.changes:
+            self.table_model.refresh()
+        self.statusBar().showMessage("Staged changes discarded.", 3000)
+
+    def rollback_edit_session(self):
+        if self.db_manager is None or self.edit_session is not None:
+            return
+        sessions = [session for session in self.db_manager.get_edit_sessions() if session[4] is None]
+        if not sessions:
+            self.statusBar().showMessage("No edit sessions to roll back.", 3000)
+            return
+        labels = [f"Session {session_id}: {changes} changes, {committed_at}" + (
+                  f" (rollback of session {reverts})" if reverts else "")
+                  for session_id, committed_at, changes, reverts, _ in sessions]
+        label, ok = QInputDialog.getItem(self, "Roll Back Session", "Edit session to roll back:", labels, 0, False)
+        if not ok:
+            return
+        session_id = sessions[labels.index(label)][0]
+        self._applying_batch = True
+        try:
+            rollback_id = self._run_write(self.db_manager.rollback_session, session_id)
+        finally:
+            self._applying_batch = False
+        if rollback_id is False:
+            return
+        self.table_model.refresh()
+        self._after_batch_write()
+        self.statusBar().showMessage(f"Edit session {session_id} rolled back.", 3000)
 
     def clear_form(self):
         self._current_selected_key = None
@@ -281,15 +626,54 @@ class MotoGPApp(QMainWindow, Ui_MainWindow):
         self.rider_input.clear()
         self.constructor_input.clear()
         self.country_input.setCurrentIndex(0)
+        self.race_input.setValue(1)
+        self.show_rider_profile(None)
         self.statusBar().showMessage("Form cleared.", 1000)
 
     def closeEvent(self, event):
-        self.db_manager.close()
+        if self.edit_session is not None and self.edit_session.changes:
+            reply = QMessageBox.question(self, "Uncommitted Changes",
+                                         f"Commit {len(self.edit_session.changes)} staged changes before closing?",
+                                         QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Cancel)
+            if reply == QMessageBox.Cancel:
+                event.ignore()
+                return
+            if reply == QMessageBox.Yes:
+                self.commit_edit_session()
+                if self.edit_session is not None:  # the commit failed
+                    event.ignore()
+                    return
+        if self.edit_session is not None:
+            discarded = bool(self.edit_session.changes)
+            self._end_edit_session()
+            if discarded:
+                self.table_model.refresh()
+        # A database still opening is closed by its task; one already delivered but
+        # not yet received is closed here.
+        late_manager = self._load_task.cancel()
+        if late_manager is not None:
+            late_manager.close()
+        QThreadPool.globalInstance().waitForDone(self.shutdown_timeout_ms)
+        if self.db_manager is not None:
+            self.search_scheduler.shutdown(self.shutdown_timeout_ms)
+            model = self.table_model
+            rows = [model.row_at(row) for row in range(min(model.total_rows(), self.first_paint_cache.max_rows))]
+            view = (self.search_input.text(), self.class_filter_combo.currentText(), model.order(),
+                    model.total_rows(), [row for row in rows if row is not None])
+            self.db_manager.close()
+            self.db_manager = None
+            self.first_paint_cache.save(*view)
         event.accept()
 
 
 if __name__ == "__main__":
+    # --startup-timing: print each startup phase once the data is loaded, then quit.
+    startup_timer = StartupTimer(STARTED)
+    startup_timer.mark("imports")
     app = QApplication(sys.argv)
-    window = MotoGPApp()
+    window = MotoGPApp(in_memory="--in-memory" in sys.argv, startup_timer=startup_timer)
     window.show()
+    startup_timer.mark("show")
+    if "--startup-timing" in sys.argv:
+        window.ready.connect(lambda: QTimer.singleShot(0, lambda: (startup_timer.report(), window.close())))
     sys.exit(app.exec_())
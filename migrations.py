@@ -0,0 +1,830 @@
+import logging
+import re
+import sqlite3
+import unicodedata
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+
+SEARCH_TABLE = "grand_prix_race_winners_fts"
+# Winners rows set aside by migrations 2 and 4 until migration 10 numbers races.
+REPEATED_TABLE = "repeated_race_wins"
+
+logger = logging.getLogger("motogp.migrations")
+
+# win_summary dimension name -> grand_prix_race_winners column.
+SUMMARY_DIMENSIONS = {
+    "rider": "Rider",
+    "constructor": "Constructor",
+    "country": "Country",
+    "circuit": "Circuit",
+}
+ALL_SEASONS = 0
+ALL_CLASSES = "All"
+
+DICTIONARY_TABLES = {
+    "Class": "class_values",
+    "Country": "country_values",
+    "Constructor": "constructor_values",
+    "Rider": "rider_values",
+}
+
+
+def _create_winners_table(conn):
+    # The shipped (version 0) schema, so a fresh database file can be seeded by bulk_io.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS grand_prix_race_winners (
+            "Circuit" TEXT,
+            "Class" TEXT,
+            "Constructor" TEXT,
+            "Country" TEXT,
+            "Rider" TEXT,
+            "Season" INTEGER
+        )
+    """)
+
+
+def _create_search_index(conn):
+    # External-content FTS5 index over the text columns, kept in sync by triggers.
+    # Skipped when SQLite was built without FTS5; DatabaseManager falls back to LIKE.
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+                Circuit, Rider, Constructor, Country,
+                content='grand_prix_race_winners', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        if "fts5" in str(e):
+            return
+        raise
+    _create_search_triggers(conn, "grand_prix_race_winners", _table_value)
+    conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def _table_value(row, column):
+    return f"{row}.{column}"
+
+
+def _table_column(column):
+    return column
+
+
+def _create_search_triggers(conn, table, value, when=None):
+    # value(row, column) is the SQL for a winners column of the trigger's new/old row;
+    # when, if given, gates the update trigger.
+    def values(row):
+        return ", ".join(value(row, column) for column in ("Circuit", "Rider", "Constructor", "Country"))
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, Circuit, Rider, Constructor, Country)
+            VALUES (new.rowid, {values("new")});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, Circuit, Rider, Constructor, Country)
+            VALUES ('delete', old.rowid, {values("old")});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table}{f" WHEN {when}" if when else ""} BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, Circuit, Rider, Constructor, Country)
+            VALUES ('delete', old.rowid, {values("old")});
+            INSERT INTO {SEARCH_TABLE}(rowid, Circuit, Rider, Constructor, Country)
+            VALUES (new.rowid, {values("new")});
+        END
+    """)
+
+
+def _hold_rows(conn, where):
+    # Moves winners rows out of the way of a unique key into REPEATED_TABLE, in
+    # rowid order; _add_race_numbers puts them back as further races.
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {REPEATED_TABLE} (
+            "Circuit" TEXT,
+            "Class" TEXT,
+            "Constructor" TEXT,
+            "Country" TEXT,
+            "Rider" TEXT,
+            "Season" INTEGER
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO {REPEATED_TABLE} (Circuit, Class, Constructor, Country, Rider, Season)
+        SELECT Circuit, Class, Constructor, Country, Rider, Season FROM grand_prix_race_winners
+        WHERE {where} ORDER BY rowid
+    """)
+    conn.execute(f"DELETE FROM grand_prix_race_winners WHERE {where}")
+
+
+def _add_keys_and_indexes(conn):
+    # The natural key was never enforced, and the shipped data repeats
+    # (Season, Circuit, Class, Rider) for double-headers: the same rider winning
+    # two races at one venue in a season. All but the first are held until the
+    # key gets a race number (migration 10).
+    _hold_rows(conn, """rowid NOT IN (
+            SELECT MIN(rowid) FROM grand_prix_race_winners
+            GROUP BY Season, Circuit, Class, Rider
+        )""")
+    conn.execute("""
+        CREATE UNIQUE INDEX idx_winners_natural_key
+        ON grand_prix_race_winners (Season, Circuit, Class, Rider)
+    """)
+    # Covers the default "ORDER BY Season DESC, Circuit ASC" listing.
+    conn.execute("""
+        CREATE INDEX idx_winners_season_circuit
+        ON grand_prix_race_winners (Season DESC, Circuit, Class, Rider, Constructor, Country)
+    """)
+    # Covers "WHERE Class = ?" with the same ordering.
+    conn.execute("""
+        CREATE INDEX idx_winners_class_season_circuit
+        ON grand_prix_race_winners (Class, Season DESC, Circuit, Rider, Constructor, Country)
+    """)
+    conn.execute("ANALYZE")
+
+
+def _create_dictionary_tables(conn):
+    # Distinct values per column with a reference count, maintained by triggers so
+    # filter combos and completers never scan grand_prix_race_winners.
+    for column, table in DICTIONARY_TABLES.items():
+        conn.execute(f"""
+            CREATE TABLE {table} (
+                value TEXT PRIMARY KEY,
+                ref_count INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"""
+            INSERT INTO {table} (value, ref_count)
+            SELECT {column}, COUNT(*) FROM grand_prix_race_winners
+            WHERE {column} IS NOT NULL AND {column} != ''
+            GROUP BY {column}
+        """)
+    _create_dictionary_triggers(conn, "grand_prix_race_winners", _table_value, _table_column)
+
+
+def _create_dictionary_triggers(conn, source, value, source_column, when=None):
+    for column, table in DICTIONARY_TABLES.items():
+        new_value, old_value = value("new", column), value("old", column)
+        increment = f"""
+            INSERT INTO {table} (value, ref_count)
+            SELECT {new_value}, 1 WHERE {new_value} IS NOT NULL AND {new_value} != ''
+            ON CONFLICT (value) DO UPDATE SET ref_count = ref_count + 1;
+        """
+        decrement = f"""
+            UPDATE {table} SET ref_count = ref_count - 1 WHERE value = {old_value};
+            DELETE FROM {table} WHERE value = {old_value} AND ref_count <= 0;
+        """
+        changed = source_column(column)
+        conn.execute(f"""
+            CREATE TRIGGER {table}_ai AFTER INSERT ON {source} BEGIN
+                {increment}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {table}_ad AFTER DELETE ON {source} BEGIN
+                {decrement}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {table}_au AFTER UPDATE OF {changed} ON {source}
+            WHEN old.{changed} IS NOT new.{changed}{f" AND {when}" if when else ""} BEGIN
+                {decrement}
+                {increment}
+            END
+        """)
+
+
+def _normalize_class_names(conn):
+    # The source data mixes "MotoGP™" with the plain "MotoGP" names the app offers.
+    # Rows whose plain-name key already exists are held like migration 2's repeats,
+    # and come back (and are reported) as further races in migration 10.
+    conn.execute("""
+        UPDATE OR IGNORE grand_prix_race_winners SET Class = trim(replace(Class, '™', ''))
+        WHERE Class LIKE '%™%'
+    """)
+    _hold_rows(conn, "Class LIKE '%™%'")
+    for table in ("constructure_world_championship", "same_nation_podium_lockouts"):
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+            conn.execute(f"UPDATE {table} SET Class = trim(replace(Class, '™', '')) WHERE Class LIKE '%™%'")
+
+
+def _summary_rollup(dimension, column, where):
+    # Wins per value for every (Season, Class) combination, plus the all-seasons
+    # (Season 0) and all-classes ("All") roll-ups, for the rows matching where.
+    rows = f"SELECT {column} AS value, Season, COALESCE(Class, '') AS Class FROM grand_prix_race_winners WHERE {where}"
+    return f"""
+        INSERT INTO win_summary (dimension, value, Season, Class, wins)
+        SELECT '{dimension}', value, Season, Class, COUNT(*) FROM (
+            SELECT value, Season, Class FROM ({rows})
+            UNION ALL SELECT value, Season, '{ALL_CLASSES}' FROM ({rows})
+            UNION ALL SELECT value, {ALL_SEASONS}, Class FROM ({rows})
+            UNION ALL SELECT value, {ALL_SEASONS}, '{ALL_CLASSES}' FROM ({rows})
+        )
+        WHERE value IS NOT NULL AND value != ''
+        GROUP BY value, Season, Class
+        ON CONFLICT (dimension, value, Season, Class) DO UPDATE SET wins = wins + excluded.wins
+    """
+
+
+def _create_win_summary(conn):
+    # Wins per rider/constructor/country/circuit by season and class, kept current
+    # by triggers so leaderboards and histories are index lookups.
+    conn.execute("""
+        CREATE TABLE win_summary (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            Season INTEGER NOT NULL,
+            Class TEXT NOT NULL,
+            wins INTEGER NOT NULL,
+            PRIMARY KEY (dimension, value, Season, Class)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX idx_win_summary_leaderboard
+        ON win_summary (dimension, Season, Class, wins DESC)
+    """)
+    for dimension, column in SUMMARY_DIMENSIONS.items():
+        conn.execute(_summary_rollup(dimension, column, "1"))
+    _create_win_summary_triggers(conn, "grand_prix_race_winners", _table_value, _table_column)
+
+    # Per-circuit history straight from the fact table.
+    conn.execute("""
+        CREATE INDEX idx_winners_circuit
+        ON grand_prix_race_winners (Circuit, Season DESC, Class, Rider, Constructor, Country)
+    """)
+    reference_indexes = {
+        "constructure_world_championship": "(Constructor, Class, Season)",
+        "grand_prix_events_held": "(Track)",
+        "same_nation_podium_lockouts": "(Track, Season)",
+    }
+    for table, columns in reference_indexes.items():
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+            conn.execute(f"CREATE INDEX idx_{table}_lookup ON {table} {columns}")
+    conn.execute("ANALYZE")
+
+
+def _create_win_summary_triggers(conn, source, value, source_column, when=None):
+    increment = []
+    decrement = []
+    for dimension, column in SUMMARY_DIMENSIONS.items():
+        new_value, old_value = value("new", column), value("old", column)
+        new_class, old_class = value("new", "Class"), value("old", "Class")
+        increment.append(f"""
+            INSERT INTO win_summary (dimension, value, Season, Class, wins)
+            SELECT '{dimension}', {new_value}, Season, Class, 1 FROM (
+                SELECT {value("new", "Season")} AS Season, COALESCE({new_class}, '') AS Class
+                UNION ALL SELECT {value("new", "Season")}, '{ALL_CLASSES}'
+                UNION ALL SELECT {ALL_SEASONS}, COALESCE({new_class}, '')
+                UNION ALL SELECT {ALL_SEASONS}, '{ALL_CLASSES}'
+            )
+            WHERE {new_value} IS NOT NULL AND {new_value} != ''
+            ON CONFLICT (dimension, value, Season, Class) DO UPDATE SET wins = wins + 1;
+        """)
+        decrement.append(f"""
+            UPDATE win_summary SET wins = wins - 1
+            WHERE dimension = '{dimension}' AND value = {old_value}
+              AND Season IN ({value("old", "Season")}, {ALL_SEASONS})
+              AND Class IN (COALESCE({old_class}, ''), '{ALL_CLASSES}');
+            DELETE FROM win_summary
+            WHERE dimension = '{dimension}' AND value = {old_value} AND wins <= 0;
+        """)
+    changed = " OR ".join(f"old.{source_column(column)} IS NOT new.{source_column(column)}"
+                          for column in ("Season", "Class", "Rider", "Constructor", "Country", "Circuit"))
+    conn.execute(f"""
+        CREATE TRIGGER win_summary_ai AFTER INSERT ON {source} BEGIN
+            {"".join(increment)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER win_summary_ad AFTER DELETE ON {source} BEGIN
+            {"".join(decrement)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER win_summary_au AFTER UPDATE ON {source}
+        WHEN ({changed}){f" AND {when}" if when else ""} BEGIN
+            {"".join(decrement)}
+            {"".join(increment)}
+        END
+    """)
+
+
+def _add_sort_indexes(conn):
+    # Header sorting orders by the column, then the rest of the natural key (see
+    # queries.sort_terms). Season, Class and Circuit are covered by the indexes above;
+    # the nullable columns are indexed as IFNULL(column, '') to match their ORDER BY.
+    conn.execute("""
+        CREATE INDEX idx_winners_sort_rider
+        ON grand_prix_race_winners (Rider, Season DESC, Circuit, Class)
+    """)
+    for column in ("Constructor", "Country"):
+        conn.execute(f"""
+            CREATE INDEX idx_winners_sort_{column.lower()}
+            ON grand_prix_race_winners (IFNULL({column}, ''), Season DESC, Circuit, Class, Rider)
+        """)
+    conn.execute("ANALYZE")
+
+
+# Winners column -> (dimension table, integer key, name column), from migration 7 on.
+DIMENSIONS = {
+    "Circuit": ("circuits", "circuit_id", "name"),
+    "Class": ("classes", "class_id", "name"),
+    "Rider": ("riders", "rider_id", "name"),
+    "Constructor": ("constructors", "constructor_id", "name"),
+    "Country": ("countries", "country_id", "code"),
+}
+# A missing Constructor or Country is stored as key 0, which no dimension row uses.
+OPTIONAL_DIMENSIONS = ("Constructor", "Country")
+FACT_TABLE = "race_wins"
+# Keys are handed out in name order, KEY_SPACING apart, so ordering by key is
+# ordering by name and the fact table's integer indexes serve the sorted listing.
+KEY_SPACING = 1 << 20
+REKEY_TABLE = "dimension_rekey"
+# Reference table columns naming the same things; they get the dimension key alongside.
+REFERENCE_KEYS = {
+    ("grand_prix_events_held", "Track"): "Circuit",
+    ("grand_prix_events_held", "Country"): "Country",
+    ("same_nation_podium_lockouts", "Track"): "Circuit",
+    ("same_nation_podium_lockouts", "Riders` Nation"): "Country",
+    ("constructure_world_championship", "Constructor"): "Constructor",
+    ("riders_finishing_positions", "Rider"): "Rider",
+    ("riders_finishing_positions", "Country"): "Country",
+}
+
+
+def _dimension_name(column, value):
+    # Optional values are stored without a name when empty; required ones never are.
+    return f"NULLIF({value}, '')" if column in OPTIONAL_DIMENSIONS else f"IFNULL({value}, '')"
+
+
+def _dimension_key(column, value):
+    table, key, name = DIMENSIONS[column]
+    lookup = f"(SELECT {key} FROM {table} WHERE {name} = {_dimension_name(column, value)})"
+    return f"IFNULL({lookup}, 0)" if column in OPTIONAL_DIMENSIONS else lookup
+
+
+def _fact_value(row, column):
+    if column == "Season":
+        return f"{row}.season"
+    table, key, name = DIMENSIONS[column]
+    return f"(SELECT {name} FROM {table} WHERE {key} = {row}.{key})"
+
+
+def _fact_column(column):
+    return "season" if column == "Season" else DIMENSIONS[column][1]
+
+
+def _quoted(column):
+    return '"' + column + '"'
+
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _add_dimension_value(column, value, references):
+    # Trigger statements giving a new name the key halfway between its neighbours'.
+    # When they are adjacent integers the whole dimension is first respaced through
+    # REKEY_TABLE; the fact table's derived-data triggers skip those updates. The
+    # respacing statements are written to cost an index probe when nothing moves:
+    # the ranking is driven by a row that only exists when needed, and moved keys
+    # are selected as a range, since the planner has no statistics for the (usually
+    # empty) REKEY_TABLE and would scan the fact table for an IN list.
+    table, key, name = DIMENSIONS[column]
+    value = _dimension_name(column, value)
+    before = f"IFNULL((SELECT {key} FROM {table} WHERE {name} < {value} ORDER BY {name} DESC LIMIT 1), 0)"
+    after = f"(SELECT {key} FROM {table} WHERE {name} > {value} ORDER BY {name} LIMIT 1)"
+    missing = f"{value} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} WHERE {name} = {value})"
+    rekeyed = f"{key} BETWEEN (SELECT MIN(old_key) FROM {REKEY_TABLE}) AND (SELECT MAX(old_key) FROM {REKEY_TABLE})"
+    statements = [
+        f"""INSERT INTO {REKEY_TABLE} (old_key, new_key)
+            SELECT {key}, ROW_NUMBER() OVER (ORDER BY {name}) * {KEY_SPACING}
+            FROM (SELECT 1 WHERE {missing} AND {after} - {before} < 2) CROSS JOIN {table}""",
+    ]
+    # Negated first, so no row collides with a key that has not moved yet.
+    for target in [FACT_TABLE, table]:
+        statements += [
+            f"""UPDATE {target} SET {key} = -(
+                    SELECT new_key FROM {REKEY_TABLE} WHERE old_key = {target}.{key})
+                WHERE {rekeyed}""",
+            f"UPDATE {target} SET {key} = -{key} WHERE {key} < 0",
+        ]
+    for reference, dimension in references:
+        if dimension == column:
+            statements.append(f"""UPDATE {reference} SET {key} = (
+                    SELECT new_key FROM {REKEY_TABLE} WHERE old_key = {reference}.{key})
+                WHERE {rekeyed}""")
+    statements += [
+        f"DELETE FROM {REKEY_TABLE}",
+        f"""INSERT INTO {table} ({key}, {name})
+            SELECT IFNULL(({before} + {after}) / 2, {before} + {KEY_SPACING}), {value} WHERE {missing}""",
+    ]
+    return "".join(f"\n            {statement};" for statement in statements)
+
+
+def _existing_references(conn):
+    return {key: column for key, column in REFERENCE_KEYS.items() if _table_exists(conn, key[0])}
+
+
+def _create_view_write_triggers(conn, references, race=False):
+    # references: (table, dimension) pairs whose key columns follow a respaced dimension.
+    # race: the view has a Race column (migration 10 on); a missing race number is 1.
+    add_values = "".join(_add_dimension_value(column, f"new.{column}", references) for column in DIMENSIONS)
+    keys = {column: _dimension_key(column, f"new.{column}") for column in DIMENSIONS}
+    race_column, race_value = (", race", ", IFNULL(new.Race, 1)") if race else ("", "")
+    conn.execute(f"""
+        CREATE TRIGGER grand_prix_race_winners_insert INSTEAD OF INSERT ON grand_prix_race_winners BEGIN
+            {add_values}
+            INSERT INTO {FACT_TABLE} (season, circuit_id, class_id, rider_id, constructor_id, country_id{race_column})
+            VALUES (new.Season, {keys["Circuit"]}, {keys["Class"]}, {keys["Rider"]},
+                    {keys["Constructor"]}, {keys["Country"]}{race_value});
+        END
+    """)
+    set_race = ", race = IFNULL(new.Race, 1)" if race else ""
+    conn.execute(f"""
+        CREATE TRIGGER grand_prix_race_winners_update INSTEAD OF UPDATE ON grand_prix_race_winners BEGIN
+            {add_values}
+            UPDATE {FACT_TABLE}
+            SET season = new.Season, circuit_id = {keys["Circuit"]}, class_id = {keys["Class"]},
+                rider_id = {keys["Rider"]}, constructor_id = {keys["Constructor"]}, country_id = {keys["Country"]}{set_race}
+            WHERE win_id = old.rowid;
+        END
+    """)
+
+
+def _normalize_dimensions(conn):
+    # grand_prix_race_winners becomes a view over an integer-keyed fact table and
+    # one table per dimension. Writes to the view go through INSTEAD OF triggers; the
+    # search, dictionary and win_summary triggers move to the fact table. Fact rows
+    # keep their rowids, so the external-content search index stays valid.
+    references = _existing_references(conn)
+    if conn.execute("SELECT 1 FROM grand_prix_race_winners WHERE Season IS NULL").fetchone():
+        raise sqlite3.IntegrityError("grand_prix_race_winners has rows without a Season")
+    for column, (table, key, name) in DIMENSIONS.items():
+        conn.execute(f"""
+            CREATE TABLE {table} (
+                {key} INTEGER PRIMARY KEY,
+                {name} TEXT NOT NULL UNIQUE
+            )
+        """)
+        sources = [("grand_prix_race_winners", column)] + [
+            reference for reference, dimension in references.items() if dimension == column]
+        union = " UNION ".join(f"SELECT {_dimension_name(column, _quoted(source_column))} AS value FROM {source}"
+                               for source, source_column in sources)
+        conn.execute(f"""
+            INSERT INTO {table} ({key}, {name})
+            SELECT ROW_NUMBER() OVER (ORDER BY value) * {KEY_SPACING}, value
+            FROM (SELECT DISTINCT value FROM ({union}) WHERE value IS NOT NULL)
+        """)
+
+    conn.execute(f"""
+        CREATE TABLE {FACT_TABLE} (
+            win_id INTEGER PRIMARY KEY,
+            season INTEGER NOT NULL,
+            circuit_id INTEGER NOT NULL REFERENCES circuits,
+            class_id INTEGER NOT NULL REFERENCES classes,
+            rider_id INTEGER NOT NULL REFERENCES riders,
+            constructor_id INTEGER NOT NULL DEFAULT 0,
+            country_id INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    keys = {column: _dimension_key(column, f"w.{column}") for column in DIMENSIONS}
+    conn.execute(f"""
+        INSERT INTO {FACT_TABLE} (win_id, season, circuit_id, class_id, rider_id, constructor_id, country_id)
+        SELECT w.rowid, w.Season, {keys["Circuit"]}, {keys["Class"]}, {keys["Rider"]},
+               {keys["Constructor"]}, {keys["Country"]}
+        FROM grand_prix_race_winners w
+    """)
+    conn.execute("DROP TABLE grand_prix_race_winners")
+
+    # The natural key, the default listing and one index per sort column; each
+    # continues with the tie-breakers of queries.sort_terms.
+    conn.execute(f"""
+        CREATE UNIQUE INDEX idx_race_wins_natural_key
+        ON {FACT_TABLE} (season DESC, circuit_id, class_id, rider_id)
+    """)
+    sort_indexes = {
+        "circuit_id": "circuit_id, season DESC, class_id, rider_id",
+        "class_id": "class_id, season DESC, circuit_id, rider_id",
+        "rider_id": "rider_id, season DESC, circuit_id, class_id",
+        "constructor_id": "constructor_id, season DESC, circuit_id, class_id, rider_id",
+        "country_id": "country_id, season DESC, circuit_id, class_id, rider_id",
+    }
+    for key, columns in sort_indexes.items():
+        conn.execute(f"CREATE INDEX idx_race_wins_{key} ON {FACT_TABLE} ({columns})")
+
+    for (table, column), dimension in references.items():
+        key = DIMENSIONS[dimension][1]
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {key} INTEGER")
+        conn.execute(f"UPDATE {table} SET {key} = {_dimension_key(dimension, table + '.' + _quoted(column))}")
+        conn.execute(f"CREATE INDEX idx_{table}_{key} ON {table} ({key})")
+
+    conn.execute(f"""
+        CREATE VIEW grand_prix_race_winners AS
+        SELECT w.win_id AS rowid, w.season AS Season, ci.name AS Circuit, cl.name AS Class,
+               r.name AS Rider, co.name AS Constructor, cn.code AS Country
+        FROM {FACT_TABLE} w
+        JOIN circuits ci ON ci.circuit_id = w.circuit_id
+        JOIN classes cl ON cl.class_id = w.class_id
+        JOIN riders r ON r.rider_id = w.rider_id
+        LEFT JOIN constructors co ON co.constructor_id = w.constructor_id
+        LEFT JOIN countries cn ON cn.country_id = w.country_id
+    """)
+    conn.execute(f"""
+        CREATE TABLE {REKEY_TABLE} (
+            old_key INTEGER PRIMARY KEY,
+            new_key INTEGER NOT NULL
+        )
+    """)
+    _create_view_write_triggers(conn, [(table, dimension) for (table, _), dimension in references.items()])
+    conn.execute(f"""
+        CREATE TRIGGER grand_prix_race_winners_delete INSTEAD OF DELETE ON grand_prix_race_winners BEGIN
+            DELETE FROM {FACT_TABLE} WHERE win_id = old.rowid;
+        END
+    """)
+
+    not_rekeying = f"NOT EXISTS (SELECT 1 FROM {REKEY_TABLE})"
+    if _table_exists(conn, SEARCH_TABLE):
+        _create_search_triggers(conn, FACT_TABLE, _fact_value, not_rekeying)
+        conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    _create_dictionary_triggers(conn, FACT_TABLE, _fact_value, _fact_column, not_rekeying)
+    _create_win_summary_triggers(conn, FACT_TABLE, _fact_value, _fact_column, not_rekeying)
+
+    conn.execute("ANALYZE")
+
+
+RIDER_NAME_INDEX = "rider_name_index"
+RIDER_INFO_TABLE = "riders_info"
+RIDER_INFO_NAME = "Riders All Time in All Classes"
+
+
+def rider_name_key(name):
+    # Accent-, case- and word-order-insensitive form: "NIETO Ángel" -> "angel nieto".
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return " ".join(sorted(re.findall(r"\w+", folded)))
+
+
+def index_rider_names(conn, names=None):
+    """Add rider_name_index keys for riders (all of them, or those named) not indexed yet.
+
+    A key already taken keeps its rider; over all riders, the one with the most
+    wins is indexed first. riders_info rows still without a rider are resolved
+    again whenever keys were added. Returns the number of keys added.
+    """
+    if names is None:
+        riders = conn.execute(f"""
+            SELECT rider_id, name FROM riders r
+            ORDER BY (SELECT COUNT(*) FROM {FACT_TABLE} w WHERE w.rider_id = r.rider_id) DESC, name
+        """).fetchall()
+    else:
+        riders = [row for name in set(names)
+                  for row in conn.execute("SELECT rider_id, name FROM riders WHERE name = ?", (name,))]
+    added = 0
+    for rider_id, name in riders:
+        key = rider_name_key(name)
+        if key:
+            added += conn.execute(f"INSERT OR IGNORE INTO {RIDER_NAME_INDEX} (name_key, rider_id) VALUES (?, ?)",
+                                  (key, rider_id)).rowcount
+    if added and _table_exists(conn, RIDER_INFO_TABLE):
+        unresolved = conn.execute(
+            f"SELECT rowid, {_quoted(RIDER_INFO_NAME)} FROM {RIDER_INFO_TABLE} WHERE rider_id IS NULL").fetchall()
+        conn.executemany(f"""
+            UPDATE {RIDER_INFO_TABLE} SET rider_id = (SELECT rider_id FROM {RIDER_NAME_INDEX} WHERE name_key = ?)
+            WHERE rowid = ?
+        """, [(rider_name_key(name), rowid) for rowid, name in unresolved])
+    return added
+
+
+def _create_rider_name_index(conn):
+    # The per-rider reference tables spell names their own way ("AGOSTINI Giacomo"
+    # in riders_info); rider_name_index maps the folded form of every rider name to
+    # its rider_id, and riders_info is resolved through it. Both follow respacing of
+    # the riders dimension, so the view's write triggers are recreated to update them.
+    conn.execute(f"""
+        CREATE TABLE {RIDER_NAME_INDEX} (
+            name_key TEXT PRIMARY KEY,
+            rider_id INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"CREATE INDEX idx_{RIDER_NAME_INDEX}_rider_id ON {RIDER_NAME_INDEX} (rider_id)")
+    rider_tables = [RIDER_NAME_INDEX]
+    if _table_exists(conn, RIDER_INFO_TABLE):
+        conn.execute(f"ALTER TABLE {RIDER_INFO_TABLE} ADD COLUMN rider_id INTEGER")
+        conn.execute(f"CREATE INDEX idx_{RIDER_INFO_TABLE}_rider_id ON {RIDER_INFO_TABLE} (rider_id)")
+        rider_tables.append(RIDER_INFO_TABLE)
+    index_rider_names(conn)
+
+    references = [(table, dimension) for (table, _), dimension in _existing_references(conn).items()]
+    conn.execute("DROP TRIGGER grand_prix_race_winners_insert")
+    conn.execute("DROP TRIGGER grand_prix_race_winners_update")
+    _create_view_write_triggers(conn, references + [(table, "Rider") for table in rider_tables])
+    conn.execute("ANALYZE")
+
+
+# An entry's columns as journaled; Race was added by migration 10.
+JOURNAL_COLUMNS = ("Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race")
+
+
+def _create_edit_journal(conn):
+    # Every committed edit session and its changes in order, by name: dimension keys
+    # move when a dimension is respaced. A row's old_* (new_*) columns are all NULL
+    # for an insert (delete). reverts/reverted_by link a rollback and its session.
+    conn.execute("""
+        CREATE TABLE edit_sessions (
+            session_id INTEGER PRIMARY KEY,
+            committed_at TEXT NOT NULL DEFAULT (datetime('now')),
+            reverts INTEGER REFERENCES edit_sessions,
+            reverted_by INTEGER REFERENCES edit_sessions
+        )
+    """)
+    columns = ",\n".join(f"            {side}_{column.lower()} {'INTEGER' if column == 'Season' else 'TEXT'}"
+                          for side in ("old", "new") for column in JOURNAL_COLUMNS if column != "Race")
+    conn.execute(f"""
+        CREATE TABLE edit_journal (
+            session_id INTEGER NOT NULL REFERENCES edit_sessions,
+            seq INTEGER NOT NULL,
+{columns},
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID
+    """)
+
+
+def _add_race_numbers(conn):
+    # A meeting can hold two races of a class, so the natural key becomes
+    # (Season, Circuit, Class, Rider, Race) with Race 1 for every stored row. The
+    # rows migrations 2 and 4 held back are then inserted as the next race of
+    # their key and reported.
+    conn.execute(f"ALTER TABLE {FACT_TABLE} ADD COLUMN race INTEGER NOT NULL DEFAULT 1")
+    conn.execute("DROP INDEX idx_race_wins_natural_key")
+    conn.execute(f"""
+        CREATE UNIQUE INDEX idx_race_wins_natural_key
+        ON {FACT_TABLE} (season DESC, circuit_id, class_id, rider_id, race)
+    """)
+    sort_indexes = {
+        "circuit_id": "circuit_id, season DESC, class_id, rider_id, race",
+        "class_id": "class_id, season DESC, circuit_id, rider_id, race",
+        "rider_id": "rider_id, season DESC, circuit_id, class_id, race",
+        "constructor_id": "constructor_id, season DESC, circuit_id, class_id, rider_id, race",
+        "country_id": "country_id, season DESC, circuit_id, class_id, rider_id, race",
+    }
+    for key, columns in sort_indexes.items():
+        conn.execute(f"DROP INDEX idx_race_wins_{key}")
+        conn.execute(f"CREATE INDEX idx_race_wins_{key} ON {FACT_TABLE} ({columns})")
+    conn.execute(f"CREATE INDEX idx_race_wins_race ON {FACT_TABLE} (race, season DESC, circuit_id, class_id, rider_id)")
+
+    # Dropping the view drops its write triggers.
+    conn.execute("DROP VIEW grand_prix_race_winners")
+    conn.execute(f"""
+        CREATE VIEW grand_prix_race_winners AS
+        SELECT w.win_id AS rowid, w.season AS Season, ci.name AS Circuit, cl.name AS Class,
+               r.name AS Rider, co.name AS Constructor, cn.code AS Country, w.race AS Race
+        FROM {FACT_TABLE} w
+        JOIN circuits ci ON ci.circuit_id = w.circuit_id
+        JOIN classes cl ON cl.class_id = w.class_id
+        JOIN riders r ON r.rider_id = w.rider_id
+        LEFT JOIN constructors co ON co.constructor_id = w.constructor_id
+        LEFT JOIN countries cn ON cn.country_id = w.country_id
+    """)
+    references = [(table, dimension) for (table, _), dimension in _existing_references(conn).items()]
+    references += [(table, "Rider") for table in (RIDER_NAME_INDEX, RIDER_INFO_TABLE) if _table_exists(conn, table)]
+    _create_view_write_triggers(conn, references, race=True)
+    conn.execute(f"""
+        CREATE TRIGGER grand_prix_race_winners_delete INSTEAD OF DELETE ON grand_prix_race_winners BEGIN
+            DELETE FROM {FACT_TABLE} WHERE win_id = old.rowid;
+        END
+    """)
+    for side in ("old", "new"):
+        conn.execute(f"ALTER TABLE edit_journal ADD COLUMN {side}_race INTEGER")
+
+    if _table_exists(conn, REPEATED_TABLE):
+        # Rows held by migration 2 may still have the class names migration 4 renamed.
+        held = conn.execute(f"""
+            SELECT Season, Circuit, trim(replace(Class, '™', '')), Rider, Constructor, Country
+            FROM {REPEATED_TABLE} ORDER BY rowid
+        """).fetchall()
+        restored = []
+        for row in held:
+            race = conn.execute("""
+                SELECT IFNULL(MAX(Race), 0) + 1 FROM grand_prix_race_winners
+                WHERE Season = ? AND Circuit = ? AND Class = ? AND Rider = ?
+            """, row[:4]).fetchone()[0]
+            conn.execute("""
+                INSERT INTO grand_prix_race_winners (Season, Circuit, Class, Rider, Constructor, Country, Race)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, row + (race,))
+            restored.append(row[:4] + (race,))
+        conn.execute(f"DROP TABLE {REPEATED_TABLE}")
+        index_rider_names(conn, (row[3] for row in held))
+        if restored:
+            logger.warning("Restored %d winners rows that repeat a Season, Circuit, Class and Rider as "
+                           "further races: %s", len(restored),
+                           "; ".join(", ".join(str(value) for value in key) for key in restored))
+    conn.execute("ANALYZE")
+
+
+MIGRATIONS = [
+    _create_search_index,
+    _add_keys_and_indexes,
+    _create_dictionary_tables,
+    _normalize_class_names,
+    _create_win_summary,
+    _add_sort_indexes,
+    _normalize_dimensions,
+    _create_rider_name_index,
+    _create_edit_journal,
+    _add_race_numbers,
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Apply every migration newer than PRAGMA user_version, each in its own transaction."""
+    current = schema_version(conn)
+    if current == 0 and not _table_exists(conn, "grand_prix_race_winners"):
+        _create_winners_table(conn)
+    for version, migration in enumerate(migrations, start=1):
+        if version <= current:
+            continue
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    # Migrations that rebuild tables leave free pages behind. VACUUM rewrites the whole
+    # file, so it is left to `bulk_io.py vacuum` instead of holding up startup.
+    if schema_version(conn) > current:
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages * 4 > conn.execute("PRAGMA page_count").fetchone()[0]:
+            logger.info("Migrations left %d free pages; run `python bulk_io.py vacuum` to reclaim them.", free_pages)
+    return schema_version(conn)
+
+
+def vacuum(conn):
+    """Rebuild the database file without its free pages; returns how many were released."""
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute("VACUUM")
+    return free_pages
+
+
+def _catch_up_inserts(conn, after_rowid):
+    # Set-based equivalent of every AFTER INSERT trigger for rows with rowid > after_rowid.
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,)).fetchone():
+        conn.execute(f"""
+            INSERT INTO {SEARCH_TABLE}(rowid, Circuit, Rider, Constructor, Country)
+            SELECT rowid, Circuit, Rider, Constructor, Country FROM grand_prix_race_winners WHERE rowid > ?
+        """, (after_rowid,))
+    for column, table in DICTIONARY_TABLES.items():
+        conn.execute(f"""
+            INSERT INTO {table} (value, ref_count)
+            SELECT {column}, COUNT(*) FROM grand_prix_race_winners
+            WHERE rowid > ? AND {column} IS NOT NULL AND {column} != ''
+            GROUP BY {column}
+            ON CONFLICT (value) DO UPDATE SET ref_count = ref_count + excluded.ref_count
+        """, (after_rowid,))
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'win_summary'").fetchone():
+        for dimension, column in SUMMARY_DIMENSIONS.items():
+            conn.execute(_summary_rollup(dimension, column, "rowid > ?"), (after_rowid,) * 4)
+
+
+@contextmanager
+def deferred_insert_triggers(conn):
+    """Suspend the AFTER INSERT triggers on the winners (fact) table for a bulk insert.
+
+    Must run inside a transaction. The triggers are dropped, the block runs, their
+    effect is applied once for all new rows and the triggers are recreated, so other
+    connections never see the schema without them. Yields a namespace whose
+    `inserted` is set to the number of new rows when the block ends (inserts
+    through the view do not show up in cursor.rowcount).
+    """
+    table = FACT_TABLE if _table_exists(conn, FACT_TABLE) else "grand_prix_race_winners"
+    triggers = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'trigger' AND tbl_name = ? AND name LIKE '%\\_ai' ESCAPE '\\'
+    """, (table,)).fetchall()
+    after_rowid = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    result = SimpleNamespace(inserted=0)
+    try:
+        yield result
+        result.inserted = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid > ?",
+                                       (after_rowid,)).fetchone()[0]
+        _catch_up_inserts(conn, after_rowid)
+    finally:
+        # Also on failure, so the triggers are back even if the caller commits what it has.
+        for _, sql in triggers:
+            conn.execute(sql)
+
+
+def query_plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
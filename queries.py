@@ -0,0 +1,215 @@
+import re
+import unicodedata
+
+from migrations import DIMENSIONS, FACT_TABLE, OPTIONAL_DIMENSIONS, SEARCH_TABLE
+
+SORT_COLUMNS = ("Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race")
+# (column, descending) terms of ORDER_BY; together they are the natural key.
+DEFAULT_ORDER = (("Season", True), ("Circuit", False), ("Class", False), ("Rider", False), ("Race", False))
+KEY_COLUMNS = tuple(column for column, _ in DEFAULT_ORDER)
+# Stored as themselves in the fact table rather than as dimension keys.
+NUMBER_COLUMNS = ("Season", "Race")
+# A missing value sorts as '' (key 0), before every name.
+NULLABLE_SORT_COLUMNS = OPTIONAL_DIMENSIONS
+
+# Listing queries read the fact table directly: filters, ORDER BY and seeks compare
+# its order-preserving integer keys, and the names are joined in per returned row.
+# CROSS JOIN keeps the fact table as the outer loop, so the sort index drives it.
+SELECT_ENTRIES = f"""
+    SELECT w.season, ci.name, cl.name, r.name, co.name, cn.code, w.race
+    FROM {FACT_TABLE} w
+    CROSS JOIN circuits ci ON ci.circuit_id = w.circuit_id
+    CROSS JOIN classes cl ON cl.class_id = w.class_id
+    CROSS JOIN riders r ON r.rider_id = w.rider_id
+    LEFT JOIN constructors co ON co.constructor_id = w.constructor_id
+    LEFT JOIN countries cn ON cn.country_id = w.country_id
+"""
+FROM_FACTS = f" FROM {FACT_TABLE} w"
+
+
+def entry_key(row):
+    # row is a (Season, Circuit, Class, Rider, Constructor, Country, Race) tuple.
+    return tuple(row[SORT_COLUMNS.index(column)] for column in KEY_COLUMNS)
+
+
+def fold(text):
+    # Case- and accent-insensitive form, matching FTS5 unicode61 remove_diacritics.
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+# A word as the unicode61 tokenizer sees it: a run of letters and digits.
+WORD = re.compile(r"[^\W_]+")
+
+
+def words(text):
+    return WORD.findall(fold(text)) if text else []
+
+
+def matches_search(values, tokens):
+    # Python equivalent of the fts_query match: every token starts a word of values.
+    found = set()
+    for value in values:
+        found.update(words(value))
+    return all(any(word.startswith(token) for word in found) for token in tokens)
+
+
+def fts_query(search_term):
+    # Every word becomes a quoted prefix term, so "marq hond" matches "Márquez ... Honda".
+    tokens = WORD.findall(search_term)
+    return " ".join('"' + token + '"*' for token in tokens)
+
+
+def build_filter(search_term="", category_filter="All", fts_enabled=True, terms=DEFAULT_ORDER):
+    # terms is the sort order the filter is used with. Only the Season order has
+    # a class index in its order; for the others the class test is kept off the
+    # class index (unary +), so the sort column's index drives the scan and LIMIT
+    # stops it early instead of every row of the class being sorted.
+    params = []
+    conditions = []
+
+    if search_term and fts_enabled:
+        match = fts_query(search_term)
+        if match:
+            conditions.append(f'w.win_id IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?)')
+            params.append(match)
+    elif search_term:
+        conditions.append('w.circuit_id IN (SELECT circuit_id FROM circuits WHERE name LIKE ?)')
+        params.append('%' + search_term + '%')
+
+    if category_filter != "All":
+        lead = "w.class_id" if terms[0][0] == "Season" else "+w.class_id"
+        conditions.append(f'{lead} = {key_of("Class")}')
+        params.append(category_filter)
+
+    where = ""
+    if conditions:
+        where = " WHERE " + " AND ".join(conditions)
+    return where, params
+
+
+def row_matches(row, search_term="", category_filter="All", fts_enabled=True):
+    # Python equivalent of build_filter for a row that need not be in the database.
+    if category_filter != "All" and row[2] != category_filter:
+        return False
+    if search_term and fts_enabled:
+        return matches_search((row[1], row[3], row[4], row[5]), words(search_term))
+    if search_term:
+        return search_term.lower() in (row[1] or "").lower()
+    return True
+
+
+def sort_terms(order=()):
+    """Complete (column, descending) terms for a requested order.
+
+    The requested terms come first, then the natural key columns not already in
+    it. Tie-breakers follow DEFAULT_ORDER, reversed when the first term runs
+    against its default direction, so sorting by one column is a forward or
+    backward scan of that column's index and every row has a unique position.
+    """
+    order = tuple((column, bool(descending)) for column, descending in order or ())
+    if not order:
+        return DEFAULT_ORDER
+    for column, _ in order:
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {column!r}")
+    first_column, first_descending = order[0]
+    flip = first_descending != (first_column == "Season")
+    seen = {column for column, _ in order}
+    return order + tuple((column, descending != flip) for column, descending in DEFAULT_ORDER
+                         if column not in seen)
+
+
+def sort_expression(column):
+    return "w." + (column.lower() if column in NUMBER_COLUMNS else DIMENSIONS[column][1])
+
+
+def key_of(column):
+    # SQL for the key of the name bound to the next parameter.
+    if column in NUMBER_COLUMNS:
+        return "?"
+    table, key, name = DIMENSIONS[column]
+    lookup = f"(SELECT {key} FROM {table} WHERE {name} = ?)"
+    return f"IFNULL({lookup}, 0)" if column in NULLABLE_SORT_COLUMNS else lookup
+
+
+def name_of(column):
+    # SQL for a fact row's sort value, in sort_values() form.
+    if column in NUMBER_COLUMNS:
+        return sort_expression(column)
+    table, key, name = DIMENSIONS[column]
+    lookup = f"(SELECT {name} FROM {table} WHERE {key} = w.{key})"
+    return f"IFNULL({lookup}, '')" if column in NULLABLE_SORT_COLUMNS else lookup
+
+
+def rank_of(column):
+    # Like key_of, but a name missing from the dimension ranks just after the name
+    # before it (its key + 0.5), so rows can be positioned before they are written.
+    if column in NUMBER_COLUMNS:
+        return "?"
+    table, key, name = DIMENSIONS[column]
+    return f"""(SELECT IFNULL(p.{key}, 0) + (IFNULL(p.{name}, '') IS NOT v.value) * 0.5
+        FROM (SELECT IFNULL(?, '') AS value) v
+        LEFT JOIN {table} p ON p.{name} = (SELECT MAX({name}) FROM {table} WHERE {name} <= v.value))"""
+
+
+def order_by(terms):
+    return " ORDER BY " + ", ".join(
+        f"{sort_expression(column)} {'DESC' if descending else 'ASC'}" for column, descending in terms)
+
+
+ORDER_BY = order_by(DEFAULT_ORDER)
+
+
+def sort_values(row, terms):
+    values = []
+    for column, _ in terms:
+        value = row[SORT_COLUMNS.index(column)]
+        if column in NUMBER_COLUMNS:
+            value = int(value)
+        elif column in NULLABLE_SORT_COLUMNS:
+            value = value or ""
+        values.append(value)
+    return tuple(values)
+
+
+def precedes(row, other, terms):
+    for (_, descending), value, other_value in zip(terms, sort_values(row, terms), sort_values(other, terms)):
+        if value != other_value:
+            return value > other_value if descending else value < other_value
+    return False
+
+
+def seek_condition(terms, key, after=True, lookup=key_of):
+    """WHERE fragment for the rows strictly after (or before) key in terms order.
+
+    key holds sort_values() (names); they are compared as dimension keys, looked up
+    with key_of, or rank_of when key need not be a stored row. The redundant bound
+    on the leading column lets SQLite start an index range scan at key instead of
+    walking the index from the start.
+    """
+    def operator(descending):
+        return ">" if after != descending else "<"
+
+    condition, params = None, []
+    for (column, descending), value in reversed(list(zip(terms, key))):
+        expression = sort_expression(column)
+        strict = f"{expression} {operator(descending)} {lookup(column)}"
+        if condition is None:
+            condition, params = strict, [value]
+        else:
+            condition = f"({strict} OR ({expression} = {lookup(column)} AND {condition}))"
+            params = [value, value] + params
+    first_column, first_descending = terms[0]
+    lead = f"{sort_expression(first_column)} {operator(first_descending)}= {lookup(first_column)}"
+    return f"{lead} AND {condition}", [key[0]] + params
+
+
+def select_query(search_term="", category_filter="All", fts_enabled=True):
+    where, params = build_filter(search_term, category_filter, fts_enabled)
+    return SELECT_ENTRIES + where + ORDER_BY, tuple(params)
+
+
+def has_search_index(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,)).fetchone() is not None
@@ -0,0 +1,306 @@
+"""Local read-only HTTP/JSON query service over the MotoGP database.
+
+    python query_service.py [--db motogp_database.db] [--host 127.0.0.1] [--port 8765]
+
+GET /entries?search=&class=All&sort=Rider,-Season&limit=50&offset=0
+GET /search?q=marq hond&class=All&limit=50      (best full-text matches first)
+GET /classes, /countries, /constructors, /riders, /seasons
+GET /leaderboard?dimension=rider&season=0&class=All&limit=50
+GET /history?dimension=rider&value=Valentino Rossi
+GET /circuit?name=TT Circuit Assen
+
+Responses are cached per query and data generation and carry an ETag, so
+unchanged results are answered with 304 Not Modified. Requests are answered
+by a fixed set of worker threads, one per pooled read connection.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from database import DatabaseError, DatabaseManager
+from migrations import ALL_CLASSES, ALL_SEASONS, SUMMARY_DIMENSIONS
+from queries import SORT_COLUMNS
+
+
+logger = logging.getLogger("motogp.query_service")
+
+COLUMNS = ["Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race"]
+MAX_LIMIT = 1000
+
+
+class QueryError(ValueError):
+    pass
+
+
+class NotFoundError(QueryError):
+    pass
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _int_param(params, name, default, minimum=0, maximum=None):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise QueryError(f"{name} out of range")
+    return value
+
+
+def _dimension_param(params):
+    dimension = params.get("dimension", "rider")
+    if dimension not in SUMMARY_DIMENSIONS:
+        raise QueryError(f"dimension must be one of: {', '.join(SUMMARY_DIMENSIONS)}")
+    return dimension
+
+
+def _sort_param(params):
+    # "Rider,-Season": comma separated columns, "-" for descending.
+    order = []
+    for item in filter(None, (part.strip() for part in params.get("sort", "").split(","))):
+        column = item.lstrip("+-")
+        matches = [name for name in SORT_COLUMNS if name.lower() == column.lower()]
+        if not matches:
+            raise QueryError(f"sort columns must be among: {', '.join(SORT_COLUMNS)}")
+        order.append((matches[0], item.startswith("-")))
+    return tuple(order)
+
+
+class QueryService:
+
+    def __init__(self, db_manager, cache_size=512):
+        self.db_manager = db_manager
+        self.cache = ResponseCache(cache_size)
+        self.routes = {
+            "/entries": self.entries,
+            "/search": self.search,
+            "/classes": lambda params: {"values": self.db_manager.get_unique_classes()},
+            "/countries": lambda params: {"values": self.db_manager.get_unique_countries()},
+            "/constructors": lambda params: {"values": self.db_manager.get_unique_constructors()},
+            "/riders": lambda params: {"values": self.db_manager.get_unique_riders()},
+            "/seasons": lambda params: {"values": self.db_manager.get_seasons()},
+            "/leaderboard": self.leaderboard,
+            "/history": self.history,
+            "/circuit": self.circuit,
+        }
+
+    def entries(self, params):
+        search_term = params.get("search", "")
+        class_filter = params.get("class", "All")
+        limit = _int_param(params, "limit", 50, 1, MAX_LIMIT)
+        offset = _int_param(params, "offset", 0)
+        order = _sort_param(params)
+        rows = self.db_manager.select_entries_window(search_term, class_filter, limit, offset, order)
+        return {
+            "total": self.db_manager.count_entries(search_term, class_filter),
+            "limit": limit,
+            "offset": offset,
+            "entries": [dict(zip(COLUMNS, row)) for row in rows],
+        }
+
+    def search(self, params):
+        search_term = params.get("q", "")
+        if not search_term.strip():
+            raise QueryError("q is required")
+        class_filter = params.get("class", "All")
+        limit = _int_param(params, "limit", 50, 1, MAX_LIMIT)
+        rows = self.db_manager.select_ranked_entries(search_term, class_filter, limit)
+        return {"search": search_term, "class": class_filter, "limit": limit,
+                "entries": [dict(zip(COLUMNS, row)) for row in rows]}
+
+    def leaderboard(self, params):
+        dimension = _dimension_param(params)
+        season = _int_param(params, "season", ALL_SEASONS)
+        class_name = params.get("class", ALL_CLASSES)
+        limit = _int_param(params, "limit", 50, 1, MAX_LIMIT)
+        leaders = self.db_manager.get_leaderboard(dimension, season, class_name, limit)
+        return {"dimension": dimension, "season": season, "class": class_name,
+                "leaders": [{"name": name, "wins": wins} for name, wins in leaders]}
+
+    def history(self, params):
+        dimension = _dimension_param(params)
+        value = params.get("value")
+        if not value:
+            raise QueryError("value is required")
+        history = self.db_manager.get_win_history(dimension, value)
+        return {"dimension": dimension, "value": value,
+                "history": [{"season": season, "class": class_name, "wins": wins}
+                            for season, class_name, wins in history]}
+
+    def circuit(self, params):
+        name = params.get("name")
+        if not name:
+            raise QueryError("name is required")
+        times_held, lockouts = self.db_manager.get_circuit_facts(name)
+        return {"circuit": name, "times_held": times_held, "same_nation_podium_lockouts": lockouts,
+                "entries": [dict(zip(COLUMNS, row)) for row in self.db_manager.get_circuit_history(name)]}
+
+    def respond(self, path, params):
+        """Return (etag, body) for a GET, served from the cache while the data is unchanged."""
+        handler = self.routes.get(path)
+        if handler is None:
+            raise NotFoundError(f"Unknown path: {path}")
+        key = (path, tuple(sorted(params.items())), self.db_manager.data_generation())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        body = json.dumps(handler(params), ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.cache.put(key, (etag, body))
+        return etag, body
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    # Seconds a connection may sit idle; workers are few, so a silent client must not keep one.
+    timeout = 5.0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        try:
+            etag, body = self.service.respond(url.path.rstrip("/") or "/", params)
+        except NotFoundError as e:
+            return self._send_json(404, {"error": str(e)})
+        except QueryError as e:
+            return self._send_json(400, {"error": str(e)})
+        except DatabaseError as e:
+            return self._send_json(500, {"error": str(e)})
+        except Exception:
+            logger.exception("Unhandled error answering %s", self.path)
+            return self._send_json(500, {"error": "Internal server error"})
+
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send_body(200, body, etag)
+
+    def _method_not_allowed(self):
+        self._send_json(405, {"error": "This service is read-only"})
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = _method_not_allowed
+
+    def _send_json(self, status, payload):
+        self._send_body(status, json.dumps(payload).encode("utf-8"))
+
+    def _send_body(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that answers requests on `workers` long-lived threads.
+
+    Accepted connections queue up until a worker is free, so the number of
+    threads (and of read connections they borrow) stays fixed however many
+    clients connect.
+    """
+
+    def __init__(self, server_address, handler_class, workers=4):
+        super().__init__(server_address, handler_class)
+        self._requests = queue.Queue()
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        self._requests.put((request, client_address))
+
+    def _work(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+def make_server(db_manager, host="127.0.0.1", port=8765, cache_size=512, request_timeout=5.0):
+    handler = type("BoundQueryRequestHandler", (QueryRequestHandler,),
+                   {"service": QueryService(db_manager, cache_size), "timeout": request_timeout})
+    return PooledHTTPServer((host, port), handler, workers=db_manager.pool.max_readers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read-only JSON query service for the MotoGP database.")
+    parser.add_argument("--db", default="motogp_database.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=512)
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager(args.db)
+    server = make_server(db_manager, args.host, args.port, args.cache_size)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import sqlite3
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from database import DatabaseError, DatabaseManager
+
+
+class _QuerySignals(QObject):
+    finished = pyqtSignal(int, str, str, object, int, list)
+    failed = pyqtSignal(int, str)
+    done = pyqtSignal(int)
+
+
+class SearchQueryTask(QRunnable):
+
+    def __init__(self, db_manager, generation, search_term, class_filter, page_size, order=()):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.db_manager = db_manager
+        self.generation = generation
+        self.search_term = search_term
+        self.class_filter = class_filter
+        self.page_size = page_size
+        self.order = order
+        self.signals = _QuerySignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            with self.db_manager.pool.reading() as conn:
+                self._query(conn)
+        except sqlite3.Error as e:
+            if not self._cancelled:
+                self.signals.failed.emit(self.generation, str(e))
+        finally:
+            self.signals.done.emit(self.generation)
+
+    def _query(self, conn):
+        stats = self.db_manager.query_stats
+        # Returning non-zero from the progress handler aborts the running statement.
+        conn.set_progress_handler(lambda: self._cancelled, 1000)
+        try:
+            if self._cancelled:
+                return
+            sql, params = self.db_manager.count_query(self.search_term, self.class_filter)
+            total = stats.execute(conn, sql, params, fetch="one")[0]
+            if self._cancelled:
+                return
+            sql, params = self.db_manager.window_query(self.search_term, self.class_filter, self.page_size, 0,
+                                                       self.order)
+            first_page = stats.execute(conn, sql, params)
+            if not self._cancelled:
+                self.signals.finished.emit(self.generation, self.search_term, self.class_filter, self.order,
+                                           total, first_page)
+        finally:
+            conn.set_progress_handler(None, 0)
+
+
+class _LoadSignals(QObject):
+    loaded = pyqtSignal(object, int, list)
+    failed = pyqtSignal(str)
+
+
+class DatabaseLoadTask(QRunnable):
+    """Opens the database and reads the first screen of a view off the GUI thread.
+
+    Also warms the DISTINCT value caches used by the filter combos and completers.
+    The loaded manager belongs to the receiver once it calls claim(); until then
+    cancel() hands it back, and a manager opened after cancel() is closed here.
+    """
+
+    def __init__(self, db_name, search_term="", class_filter="All", order=(), page_size=200, startup_timer=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.db_name = db_name
+        self.search_term = search_term
+        self.class_filter = class_filter
+        self.order = order
+        self.page_size = page_size
+        self.startup_timer = startup_timer
+        self.signals = _LoadSignals()
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._unclaimed = None
+
+    def cancel(self):
+        """Stops the load; returns a manager that was emitted but not claimed, which the caller must close."""
+        with self._lock:
+            self._cancelled = True
+            db_manager, self._unclaimed = self._unclaimed, None
+        return db_manager
+
+    def claim(self, db_manager):
+        """True if db_manager, as received from `loaded`, is the caller's; False if cancel() already took it."""
+        with self._lock:
+            if self._unclaimed is not db_manager:
+                return False
+            self._unclaimed = None
+        return True
+
+    def _mark(self, name):
+        if self.startup_timer is not None:
+            self.startup_timer.mark(name)
+
+    def run(self):
+        try:
+            db_manager = DatabaseManager(self.db_name)
+        except DatabaseError as e:
+            if not self._cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        self._mark("open_database")
+        try:
+            total = db_manager.count_entries(self.search_term, self.class_filter)
+            first_page = db_manager.select_entries_window(self.search_term, self.class_filter, self.page_size, 0,
+                                                          self.order)
+            self._mark("load_first_page")
+            db_manager.get_unique_classes()
+            db_manager.get_unique_countries()
+            db_manager.get_unique_riders()
+            db_manager.get_unique_constructors()
+            self._mark("load_filter_values")
+        except (DatabaseError, sqlite3.Error) as e:
+            db_manager.close()
+            if not self._cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        with self._lock:
+            if self._cancelled:
+                db_manager.close()
+                return
+            self._unclaimed = db_manager
+        self.signals.loaded.emit(db_manager, total, first_page)
+
+
+class SearchScheduler(QObject):
+    """Debounces search requests and runs them on a worker thread.
+
+    Every request bumps a generation counter; a newer request cancels the running
+    query and results from older generations are dropped.
+    """
+
+    results_ready = pyqtSignal(str, str, object, int, list)
+    query_failed = pyqtSignal(str)
+
+    def __init__(self, db_manager, debounce_ms=250, page_size=200, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.page_size = page_size
+        self._generation = 0
+        self._pending = None
+        self._active = {}
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._run_pending)
+
+    def schedule(self, search_term="", class_filter="All", immediate=False, order=()):
+        self._pending = (search_term, class_filter, order)
+        if immediate:
+            self._timer.stop()
+            self._run_pending()
+        else:
+            self._timer.start()
+
+    def cancel(self):
+        self._timer.stop()
+        self._pending = None
+        self._generation += 1
+        for task in self._active.values():
+            task.cancel()
+
+    def shutdown(self, timeout_ms=-1):
+        """Cancels all work; True if the running queries finished within timeout_ms."""
+        self.cancel()
+        return self._pool.waitForDone(timeout_ms)
+
+    def _run_pending(self):
+        if self._pending is None:
+            return
+        search_term, class_filter, order = self._pending
+        self._pending = None
+
+        self.cancel()
+        generation = self._generation
+        task = SearchQueryTask(self.db_manager, generation, search_term, class_filter, self.page_size, order)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        task.signals.done.connect(self._on_done)
+        self._active[generation] = task
+        self._pool.start(task)
+
+    def _on_finished(self, generation, search_term, class_filter, order, total, first_page):
+        if generation == self._generation:
+            self.results_ready.emit(search_term, class_filter, order, total, first_page)
+
+    def _on_failed(self, generation, message):
+        if generation == self._generation:
+            self.query_failed.emit(message)
+
+    def _on_done(self, generation):
+        self._active.pop(generation, None)
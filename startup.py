@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import threading
+import time
+
+
+class StartupTimer:
+    """Startup phases measured from `started` (the first line of main.py).
+
+    Phases may be marked from any thread; each records the time since the
+    previous mark and since start.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []
+        self._last = self.started
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            self.phases.append((name, (now - self._last) * 1000, (now - self.started) * 1000))
+            self._last = now
+
+    def elapsed_ms(self, name):
+        with self._lock:
+            return next((elapsed for phase, _, elapsed in self.phases if phase == name), None)
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        with self._lock:
+            phases = list(self.phases)
+        print(f"{'phase':<24} {'delta ms':>10} {'elapsed ms':>11}", file=stream)
+        for name, delta_ms, elapsed_ms in phases:
+            print(f"{name:<24} {delta_ms:>10.1f} {elapsed_ms:>11.1f}", file=stream)
+
+
+class FirstPaintCache:
+    """The first screenful of the last view, persisted next to the database.
+
+    The file stores the view's search text, class filter, sort order, total and
+    first rows together with the mtime and size of the database (and its WAL), so
+    it is only used while the database is unchanged since it was written.
+    """
+
+    def __init__(self, db_name, max_rows=100):
+        self.db_name = db_name
+        self.path = db_name + ".view.json"
+        self.max_rows = max_rows
+
+    def _fingerprint(self):
+        fingerprint = []
+        for path in (self.db_name, self.db_name + "-wal"):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                fingerprint.append(None)
+                continue
+            fingerprint.append([stat.st_mtime_ns, stat.st_size])
+        return fingerprint
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                view = json.load(handle)
+            if view["fingerprint"] != self._fingerprint():
+                return None
+            return {
+                "search_term": view["search_term"],
+                "class_filter": view["class_filter"],
+                "order": tuple((column, bool(descending)) for column, descending in view["order"]),
+                "total": int(view["total"]),
+                "rows": [tuple(row) for row in view["rows"]],
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, search_term, class_filter, order, total, rows):
+        # Call after the database is closed so the fingerprint is final.
+        view = {
+            "fingerprint": self._fingerprint(),
+            "search_term": search_term,
+            "class_filter": class_filter,
+            "order": [list(term) for term in order],
+            "total": total,
+            "rows": [list(row) for row in rows[:self.max_rows]],
+        }
+        try:
+            with open(self.path + ".tmp", "w", encoding="utf-8") as handle:
+                json.dump(view, handle, ensure_ascii=False)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError:
+            pass
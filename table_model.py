@@ -0,0 +1,219 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QGuiApplication
+
+from queries import precedes, sort_terms
+
+
+COLUMNS = ["Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race"]
+
+
+class RaceWinnersTableModel(QAbstractTableModel):
+    """Lazy table model over grand_prix_race_winners.
+
+    Rows are exposed to the view in fetch_size steps through canFetchMore/fetchMore
+    and read from the database in page_size windows. Only max_pages windows are
+    kept in memory, so scrolling a large table never holds more than
+    page_size * max_pages rows.
+
+    source is the DatabaseManager or anything with the same count_entries,
+    select_entries_window, position_of and entry_matches methods, such as a
+    ColumnarSnapshot. Header sorting is passed to the source as (column,
+    descending) terms; shift-clicking a header adds it as a secondary sort.
+    """
+
+    def __init__(self, source, page_size=200, max_pages=8, fetch_size=500, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.fetch_size = fetch_size
+
+        self._search_term = ""
+        self._class_filter = "All"
+        self._order = ()
+        self._total_rows = 0
+        self._loaded_rows = 0
+        self._pages = OrderedDict()
+        # Set between begin/endInsertRows or begin/endRemoveRows.
+        self._changing_rows = False
+
+    def set_filter(self, search_term="", class_filter="All"):
+        total = self.source.count_entries(search_term, class_filter)
+        return self.apply_results(search_term, class_filter, total)
+
+    def apply_results(self, search_term, class_filter, total, first_page=None):
+        self.beginResetModel()
+        self._search_term = search_term
+        self._class_filter = class_filter
+        self._pages.clear()
+        if first_page is not None:
+            self._pages[0] = first_page
+        self._total_rows = total
+        self._loaded_rows = min(self._total_rows, self.fetch_size)
+        self.endResetModel()
+        return self._total_rows
+
+    def order(self):
+        return self._order
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        term = (COLUMNS[column], order == Qt.DescendingOrder)
+        shift = QGuiApplication.keyboardModifiers() & Qt.ShiftModifier
+        if shift and self._order and self._order[0][0] != term[0]:
+            self.set_order(tuple(t for t in self._order if t[0] != term[0]) + (term,))
+        else:
+            self.set_order((term,))
+
+    def set_order(self, order):
+        order = tuple(order)
+        if order == self._order:
+            return
+        self.beginResetModel()
+        self._order = order
+        self._pages.clear()
+        self._loaded_rows = min(self._total_rows, self.fetch_size)
+        self.endResetModel()
+
+    def refresh(self):
+        return self.set_filter(self._search_term, self._class_filter)
+
+    def apply_change(self, old_row, new_row):
+        """Patch the model after a single committed write instead of reloading it.
+
+        Positions come from indexed COUNT queries against the current filter, so
+        only the affected row is removed/inserted and pages from that point on
+        are re-read lazily.
+        """
+        db = self.source
+        search_term, class_filter, order = self._search_term, self._class_filter, self._order
+        new_visible = new_row is not None and db.entry_matches(new_row, search_term, class_filter)
+        new_total = db.count_entries(search_term, class_filter)
+        old_visible = old_row is not None and new_total - int(new_visible) < self._total_rows
+
+        old_position = new_position = None
+        if old_visible:
+            old_position = db.position_of(old_row, search_term, class_filter, order)
+            if new_visible and precedes(new_row, old_row, sort_terms(order)):
+                old_position -= 1
+        if new_visible:
+            new_position = db.position_of(new_row, search_term, class_filter, order)
+
+        if old_visible and new_visible and old_position == new_position:
+            self._invalidate_from(old_position)
+            if old_position < self._loaded_rows:
+                self.dataChanged.emit(self.index(old_position, 0),
+                                      self.index(old_position, self.columnCount() - 1))
+            return
+        if old_visible:
+            self._remove_row(old_position)
+        if new_visible:
+            self._insert_row(new_position)
+
+    def _invalidate_from(self, position):
+        first_page = position // self.page_size
+        for page_number in [n for n in self._pages if n >= first_page]:
+            del self._pages[page_number]
+
+    def _remove_row(self, position):
+        # Pages are dropped inside begin/end so slots see the rows before, then after, the change.
+        if position < self._loaded_rows:
+            self._changing_rows = True
+            self.beginRemoveRows(QModelIndex(), position, position)
+            self._invalidate_from(position)
+            self._total_rows -= 1
+            self._loaded_rows -= 1
+            self.endRemoveRows()
+            self._changing_rows = False
+        else:
+            self._invalidate_from(position)
+            self._total_rows -= 1
+
+    def _insert_row(self, position):
+        # Rows past the fetched range only grow the total; fetchMore exposes them later.
+        if position < self._loaded_rows or self._loaded_rows == self._total_rows:
+            self._changing_rows = True
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._invalidate_from(position)
+            self._total_rows += 1
+            self._loaded_rows += 1
+            self.endInsertRows()
+            self._changing_rows = False
+        else:
+            self._invalidate_from(position)
+            self._total_rows += 1
+
+    def total_rows(self):
+        return self._total_rows
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded_rows < self._total_rows
+
+    def fetchMore(self, parent=QModelIndex()):
+        # Not from a slot connected to a row change under way, which would nest the inserts.
+        if parent.isValid() or self._changing_rows:
+            return
+        remaining = self._total_rows - self._loaded_rows
+        count = min(self.fetch_size, remaining)
+        if count <= 0:
+            return
+        self._changing_rows = True
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
+        self._changing_rows = False
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return QVariant()
+        entry = self.row_at(index.row())
+        if entry is None:
+            return QVariant()
+        value = entry[index.column()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return str(section + 1)
+
+    def row_at(self, row):
+        if row < 0 or row >= self._total_rows:
+            return None
+        page_number, offset = divmod(row, self.page_size)
+        page = self._page(page_number)
+        if offset >= len(page):
+            return None
+        return page[offset]
+
+    def _page(self, page_number):
+        page = self._pages.get(page_number)
+        if page is not None:
+            self._pages.move_to_end(page_number)
+            return page
+        if self.source is None:
+            # Before the database is open only the first-paint rows exist; a sort
+            # clears them and the view stays empty until on_database_loaded.
+            return []
+
+        page = self.source.select_entries_window(self._search_term, self._class_filter,
+                                                 self.page_size, page_number * self.page_size, self._order)
+        self._pages[page_number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
@@ -0,0 +1,70 @@
+import os
+import shutil
+import sqlite3
+import sys
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import DatabaseManager  # noqa: E402
+from migrations import (  # noqa: E402
+    ALL_CLASSES, ALL_SEASONS, DICTIONARY_TABLES, SEARCH_TABLE, SUMMARY_DIMENSIONS, run_migrations,
+)
+
+SHIPPED_DATABASE = os.path.join(ROOT, "motogp_database.db")
+
+
+@pytest.fixture(scope="session")
+def migrated_database(tmp_path_factory):
+    """Path of a copy of the shipped database, migrated once per test run."""
+    path = tmp_path_factory.mktemp("migrated") / "motogp_database.db"
+    shutil.copyfile(SHIPPED_DATABASE, path)
+    conn = sqlite3.connect(path)
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
+    return path
+
+
+@pytest.fixture
+def db(migrated_database, tmp_path):
+    path = tmp_path / "motogp_database.db"
+    shutil.copyfile(migrated_database, path)
+    manager = DatabaseManager(str(path))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def assert_derived_data_current(conn):
+    """The dictionary tables, win_summary and the search index agree with the winners rows."""
+    for column, table in DICTIONARY_TABLES.items():
+        recomputed = conn.execute(f"""
+            SELECT {column}, COUNT(*) FROM grand_prix_race_winners
+            WHERE {column} IS NOT NULL AND {column} != '' GROUP BY {column} ORDER BY {column}
+        """).fetchall()
+        assert conn.execute(f"SELECT value, ref_count FROM {table} ORDER BY value").fetchall() == recomputed, table
+
+    expected = Counter()
+    rows = conn.execute(f"SELECT Season, IFNULL(Class, ''), {', '.join(SUMMARY_DIMENSIONS.values())} "
+                        "FROM grand_prix_race_winners")
+    for season, class_name, *values in rows:
+        for dimension, value in zip(SUMMARY_DIMENSIONS, values):
+            if value:
+                for summary_season in (season, ALL_SEASONS):
+                    for summary_class in (class_name, ALL_CLASSES):
+                        expected[dimension, value, summary_season, summary_class] += 1
+    stored = conn.execute("SELECT dimension, value, Season, Class, wins FROM win_summary").fetchall()
+    assert {row[:4]: row[4] for row in stored} == dict(expected)
+
+    conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('integrity-check', 1)")
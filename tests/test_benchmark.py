@@ -0,0 +1,33 @@
+import os
+import sqlite3
+
+import pytest
+
+from benchmark import SOURCE_CSV, compare, generate_dataset
+from conftest import ROOT
+
+RESULTS = {"10k": {"database": {"count_all": {"median_ms": 10.0}, "search": {"median_ms": 1.0}}}}
+BASELINE = {"10k": {"database": {"count_all": {"median_ms": 1.0}, "search": {"median_ms": 1.0}}}}
+
+
+@pytest.mark.parametrize("baseline", [BASELINE, {"seed": 1949, "results": BASELINE}], ids=["saved", "output"])
+def test_compare_reads_both_baseline_files(baseline):
+    [regression] = compare(RESULTS, baseline, 0.25)
+    assert regression.startswith("10k database.count_all")
+
+
+def test_compare_fails_when_nothing_matches():
+    [failure] = compare(RESULTS, {"100k": BASELINE["10k"]}, 0.25)
+    assert "no operation" in failure
+
+
+def test_generated_riders_are_name_indexed(tmp_path):
+    path = tmp_path / "winners.db"
+    generate_dataset(str(path), 2000, csv_path=os.path.join(ROOT, SOURCE_CSV))
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM race_wins").fetchone()[0] == 2000
+    assert conn.execute("""
+        SELECT COUNT(*) FROM riders r
+        WHERE NOT EXISTS (SELECT 1 FROM rider_name_index i WHERE i.rider_id = r.rider_id)
+    """).fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,156 @@
+import csv
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import bulk_io
+from bulk_io import export_csv, import_csv, normalize_row
+from conftest import ROOT, assert_derived_data_current
+from migrations import FACT_TABLE, deferred_insert_triggers
+
+HEADER = ["Circuit", "Class", "Constructor", "Country", "Rider", "Season"]
+
+
+@pytest.fixture
+def conn(migrated_database, tmp_path):
+    path = tmp_path / "motogp_database.db"
+    shutil.copyfile(migrated_database, path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def write_csv(path, rows, header=HEADER):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def triggers(conn):
+    return conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' ORDER BY name").fetchall()
+
+
+def stored(conn, season):
+    return conn.execute("""
+        SELECT Season, Circuit, Class, Rider, Constructor, Country, Race FROM grand_prix_race_winners
+        WHERE Season = ? ORDER BY Circuit, Class, Rider, Race
+    """, (season,)).fetchall()
+
+
+@pytest.mark.parametrize("record, reason", [
+    ({"Season": "", "Circuit": "Mugello", "Class": "MotoGP", "Rider": "A"}, "cannot be empty"),
+    ({"Season": "20x1", "Circuit": "Mugello", "Class": "MotoGP", "Rider": "A"}, "Invalid Season"),
+    ({"Season": "2031", "Circuit": "Mugello", "Class": " ™ ", "Rider": "A"}, "Class cannot be empty"),
+    ({"Season": "2031", "Circuit": "Mugello", "Class": "MotoGP", "Rider": "A", "Race": "x"}, "Invalid Race"),
+    ({"Season": "2031", "Circuit": "Mugello", "Class": "MotoGP", "Rider": "A", "Race": "0"}, "Invalid Race"),
+])
+def test_invalid_records_are_rejected(record, reason):
+    with pytest.raises(ValueError, match=reason):
+        normalize_row(record)
+
+
+def test_values_are_normalized():
+    record = {"Season": " 2031 ", "Circuit": " Mugello ", "Class": " MotoGP™ ", "Rider": "Rider A",
+              "Constructor": "", "Country": "it"}
+    assert normalize_row(record) == (2031, "Mugello", "MotoGP", "Rider A", None, "IT", None)
+
+
+def test_import_reports_rejected_rows_and_numbers_double_headers(conn, tmp_path):
+    path = write_csv(tmp_path / "in.csv", [
+        ["Mugello", "MotoGP™", "Ducati", "it", "Rider A", "2031"],
+        ["Mugello", "Moto2 ", "", "", "Rider B", "2031"],
+        ["Mugello", "MotoGP", "Ducati", "IT", "Rider A", "2031"],
+        ["Mugello", "MotoGP", "Ducati", "IT", "", "2031"],
+        ["Assen", "MotoGP", "Yamaha", "IT", "Rider A", "twenty"],
+    ])
+    report = import_csv(conn, path, batch_size=2)
+    assert (report.rows_read, report.inserted, report.duplicates) == (5, 3, 0)
+    assert [(line, reason) for line, _, reason in report.rejected] == [
+        (5, "Season, Circuit, and Rider cannot be empty"), (6, "Invalid Season: 'twenty'")]
+    assert stored(conn, 2031) == [
+        (2031, "Mugello", "Moto2", "Rider B", None, None, 1),
+        (2031, "Mugello", "MotoGP", "Rider A", "Ducati", "IT", 1),
+        (2031, "Mugello", "MotoGP", "Rider A", "Ducati", "IT", 2),
+    ]
+    rejected = tmp_path / "rejected.csv"
+    bulk_io.write_rejected(report, rejected)
+    with open(rejected, newline="", encoding="utf-8") as handle:
+        assert [row[:2] for row in csv.reader(handle)][1:] == [["5", report.rejected[0][2]],
+                                                               ["6", report.rejected[1][2]]]
+
+
+def test_explicit_race_numbers_are_kept(conn, tmp_path):
+    path = write_csv(tmp_path / "in.csv", [["Mugello", "MotoGP", "", "", "Rider A", "2031", "3"],
+                                           ["Mugello", "MotoGP", "", "", "Rider A", "2031", ""]],
+                     HEADER + ["Race"])
+    import_csv(conn, path)
+    assert [row[6] for row in stored(conn, 2031)] == [3, 4]
+
+
+def test_missing_columns_are_an_error(conn, tmp_path):
+    path = write_csv(tmp_path / "in.csv", [["Mugello", "2031"]], ["Circuit", "Season"])
+    with pytest.raises(ValueError, match="missing columns"):
+        import_csv(conn, path)
+
+
+def test_reimporting_is_idempotent_and_keeps_derived_data_current(conn, tmp_path):
+    rows = [["Mugello", "MotoGP™", "Ducati", "IT", "Rider A", "2031"],
+            ["Mugello", "MotoGP", "Ducati", "IT", "Rider A", "2031"],
+            ["Assen", "Moto3", "KTM", "ES", "Rider C", "2031"]]
+    path = write_csv(tmp_path / "in.csv", rows)
+    total = conn.execute(f"SELECT COUNT(*) FROM {FACT_TABLE}").fetchone()[0]
+    assert import_csv(conn, path).inserted == 3
+    before = triggers(conn)
+    report = import_csv(conn, path)
+    assert (report.inserted, report.duplicates) == (0, 3)
+    assert conn.execute(f"SELECT COUNT(*) FROM {FACT_TABLE}").fetchone()[0] == total + 3
+    assert triggers(conn) == before
+    assert_derived_data_current(conn)
+    assert conn.execute("""
+        SELECT COUNT(*) FROM grand_prix_race_winners_fts WHERE grand_prix_race_winners_fts MATCH 'rider'
+    """).fetchone()[0] == 3
+
+
+def test_shipped_csv_imports_into_an_empty_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "empty.db")
+    report = import_csv(conn, os.path.join(ROOT, "grand-prix-race-winners.csv"))
+    assert report.rejected == []
+    assert report.inserted == report.rows_read
+    assert conn.execute("SELECT COUNT(*) FROM grand_prix_race_winners WHERE Race > 1").fetchone()[0] == 9
+    assert_derived_data_current(conn)
+    out = tmp_path / "out.csv"
+    assert export_csv(conn, out) == report.inserted
+    conn.close()
+
+
+def test_failed_import_restores_the_triggers(conn, tmp_path, monkeypatch):
+    before = triggers(conn)
+    batches = []
+
+    def fail_second_batch(conn, names):
+        batches.append(list(names))
+        if len(batches) == 2:
+            raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(bulk_io, "index_rider_names", fail_second_batch)
+    path = write_csv(tmp_path / "in.csv", [["Mugello", "MotoGP", "", "", f"Rider {n}", "2031"] for n in range(4)])
+    with pytest.raises(sqlite3.OperationalError):
+        import_csv(conn, path, batch_size=2)
+    assert triggers(conn) == before
+    assert len(stored(conn, 2031)) == 2
+    assert_derived_data_current(conn)
+
+
+def test_triggers_are_recreated_when_the_block_raises(conn):
+    before = triggers(conn)
+    conn.execute("BEGIN")
+    with pytest.raises(RuntimeError):
+        with deferred_insert_triggers(conn):
+            raise RuntimeError("stop")
+    assert triggers(conn) == before
+    conn.execute("ROLLBACK")
+    assert triggers(conn) == before
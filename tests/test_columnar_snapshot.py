@@ -0,0 +1,42 @@
+import pytest
+
+from columnar_snapshot import ColumnarSnapshot
+from queries import entry_key
+
+SEARCHES = ["", "ross", "valentino rossi", "MARQ hond", "marquez", "márquez", "de", "r", "aragon", "ktm es",
+            "it", "assen tt", "o'", "lowes kalex", "no such rider"]
+CLASSES = ["All", "MotoGP", "Moto3", "125cc"]
+
+
+@pytest.fixture
+def snapshot(db):
+    snapshot = ColumnarSnapshot.from_database(db)
+    db.add_change_listener(snapshot.apply_change)
+    return snapshot
+
+
+@pytest.mark.parametrize("category_filter", CLASSES)
+@pytest.mark.parametrize("search_term", SEARCHES)
+def test_search_matches_the_database(db, snapshot, search_term, category_filter):
+    expected = db.select_entries_window(search_term, category_filter, 5000, 0)
+    assert snapshot.select_entries_window(search_term, category_filter, 5000, 0) == expected
+    assert snapshot.count_entries(search_term, category_filter) == len(expected)
+    for row in expected[:20]:
+        assert snapshot.entry_matches(row, search_term, category_filter)
+        assert db.entry_matches(row, search_term, category_filter)
+
+
+@pytest.mark.parametrize("search_term", ["ross", "ktm es"])
+def test_sorted_search_matches_the_database_after_writes(db, snapshot, search_term):
+    db.insert_entry(2031, "Mugello", "MotoGP", "Valentina Rossiter", "KTM", "ES")
+    db.delete_entry(*entry_key(db.select_entries_window(search_term, "All", 1, 3)[0]))
+    order = (("Rider", False),)
+    assert snapshot.select_entries_window(search_term, "All", 5000, 0, order) == \
+        db.select_entries_window(search_term, "All", 5000, 0, order)
+
+
+def test_sorted_orders_are_cached_up_to_a_bound(db):
+    snapshot = ColumnarSnapshot.from_database(db, sorted_cache_size=3)
+    for column in ("Circuit", "Rider", "Constructor", "Country", "Class"):
+        snapshot.select_entries_window("", "All", 10, 0, ((column, False),))
+    assert len(snapshot._sorted) == 3
@@ -0,0 +1,48 @@
+import sqlite3
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool
+
+
+def test_readers_are_returned_and_reused(migrated_database):
+    pool = ConnectionPool(str(migrated_database), max_readers=2)
+    with pool.reading() as first:
+        pass
+    with pool.reading() as second:
+        assert second is first
+    pool.close()
+
+
+def test_threads_share_a_bounded_set_of_readers(migrated_database):
+    pool = ConnectionPool(str(migrated_database), max_readers=3)
+    seen, in_use, peak, lock = set(), [0], [0], threading.Lock()
+
+    def read():
+        with pool.reading() as conn:
+            with lock:
+                seen.add(id(conn))
+                in_use[0] += 1
+                peak[0] = max(peak[0], in_use[0])
+            conn.execute("SELECT COUNT(*) FROM grand_prix_race_winners").fetchone()
+            with lock:
+                in_use[0] -= 1
+
+    threads = [threading.Thread(target=read) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 3
+    assert len(seen) <= 3
+    assert pool._idle.qsize() <= 3
+    pool.close()
+
+
+def test_close_closes_readers_returned_later(migrated_database):
+    pool = ConnectionPool(str(migrated_database))
+    with pool.reading() as conn:
+        pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
@@ -0,0 +1,52 @@
+from conftest import assert_derived_data_current
+from migrations import REKEY_TABLE
+
+
+def ref_count(db, table, value):
+    row = db.pool.writer.execute(f"SELECT ref_count FROM {table} WHERE value = ?", (value,)).fetchone()
+    return row[0] if row else None
+
+
+def test_value_is_removed_when_its_last_row_goes(db):
+    db.insert_entry(2031, "Mugello", "MotoGP", "Rider A", "Newco", "ZZ")
+    db.insert_entry(2032, "Mugello", "MotoGP", "Rider A", "Newco", "ZZ")
+    assert ref_count(db, "constructor_values", "Newco") == 2
+    assert "Newco" in db.get_unique_constructors()
+
+    db.update_entry(2031, "Mugello", "MotoGP", "Rider A", 2031, "Mugello", "MotoGP", "Rider A", "Oldco", "ZZ")
+    assert ref_count(db, "constructor_values", "Newco") == 1
+    db.delete_entry(2032, "Mugello", "MotoGP", "Rider A")
+    assert ref_count(db, "constructor_values", "Newco") is None
+    assert "Newco" not in db.get_unique_constructors()
+    assert ref_count(db, "country_values", "ZZ") == 1
+    db.delete_entry(2031, "Mugello", "MotoGP", "Rider A")
+    assert ref_count(db, "rider_values", "Rider A") is None
+    assert ref_count(db, "country_values", "ZZ") is None
+    assert_derived_data_current(db.pool.writer)
+
+
+def test_respacing_a_dimension_keeps_counts_and_keys_consistent(db):
+    conn = db.pool.writer
+
+    def rider_names():
+        # Each table keyed by rider, read back as names.
+        return [conn.execute(f"""
+            SELECT t.rowid, r.name FROM {table} t LEFT JOIN riders r USING (rider_id) ORDER BY t.rowid
+        """).fetchall() for table in ("riders_info", "riders_finishing_positions")] + [
+            conn.execute("SELECT name_key, r.name FROM rider_name_index JOIN riders r USING (rider_id)").fetchall()]
+
+    keys, references = dict(conn.execute("SELECT name, rider_id FROM riders")), rider_names()
+    first, following = sorted(keys)[:2]
+    names = [first + " " + "a" * count for count in range(1, 31)]
+    assert names[-1] < following
+    for name in names:
+        db.insert_entry(2031, "Mugello", "MotoGP", name, "", "")
+
+    moved = dict(conn.execute("SELECT name, rider_id FROM riders"))
+    assert any(moved[name] != key for name, key in keys.items())
+    assert sorted(moved, key=moved.get) == sorted(moved)
+    assert conn.execute(f"SELECT COUNT(*) FROM {REKEY_TABLE}").fetchone()[0] == 0
+    assert [ref_count(db, "rider_values", name) for name in names] == [1] * len(names)
+    assert rider_names()[:2] == references[:2]
+    assert set(references[2]) <= set(rider_names()[2])
+    assert_derived_data_current(conn)
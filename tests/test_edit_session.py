@@ -0,0 +1,84 @@
+import pytest
+
+from database import DuplicateEntryError, StaleEntryError
+from edit_session import EditSession
+
+
+def test_insert_then_delete_nets_to_nothing(db):
+    session = EditSession(db)
+    session.insert_entry(2031, "Mugello", "MotoGP", "Rider A", "Ducati", "IT")
+    session.delete_entry(2031, "Mugello", "MotoGP", "Rider A")
+    assert len(session) == 2
+    assert session.net_changes() == []
+    assert session.commit() is None
+    assert db.get_entry(2031, "Mugello", "MotoGP", "Rider A") is None
+
+
+def test_key_changing_update_nets_to_a_delete_and_an_insert(db):
+    row = db.select_entries_window("", "All", 1, 0)[0]
+    session = EditSession(db)
+    session.update_entry(*row[:4], 2031, *row[1:4], "Ducati", "IT", original_race=row[6])
+    session.update_entry(2031, *row[1:4], 2032, *row[1:4], "Ducati", "IT", original_race=row[6])
+    moved = (2032,) + row[1:4] + ("Ducati", "IT", row[6])
+    assert session.net_changes() == [(row, None), (None, moved)]
+    session.undo()
+    session.undo()
+    assert session.net_changes() == []
+    session.redo()
+    assert session.net_changes() == [(row, None), (None, (2031,) + moved[1:])]
+
+
+def test_deleted_key_can_be_reused(db):
+    row = db.select_entries_window("", "All", 1, 0)[0]
+    session = EditSession(db)
+    with pytest.raises(DuplicateEntryError):
+        session.insert_entry(*row)
+    session.delete_entry(*row[:4], race=row[6])
+    session.insert_entry(*row[:4], "Ducati", "IT", row[6])
+    assert session.net_changes() == [(row, row[:4] + ("Ducati", "IT", row[6]))]
+    session.commit()
+    assert db.get_entry(*row[:4], row[6]) == row[:4] + ("Ducati", "IT", row[6])
+
+
+def test_apply_changes_writes_nothing_if_any_change_fails(db):
+    first, second = db.select_entries_window("", "All", 2, 0)
+    total = db.count_entries()
+    inserted = (2031, "Mugello", "MotoGP", "Rider A", None, None, 1)
+    with pytest.raises(DuplicateEntryError):
+        db.apply_changes([(None, inserted), (first, second)])
+    with pytest.raises(StaleEntryError):
+        db.apply_changes([(None, inserted), (inserted[:6] + (2,), None)])
+    assert db.count_entries() == total
+    assert db.get_entry(*inserted[:4]) is None
+    # Changes are replayed in order, so a key freed earlier in the batch can be taken.
+    db.apply_changes([(first, None), (None, first[:4] + ("Ducati", "IT", first[6]))])
+    assert db.get_entry(*first[:4], first[6]) == first[:4] + ("Ducati", "IT", first[6])
+
+
+def test_rollback_session_restores_the_committed_rows(db):
+    before = db.select_entries_window("", "All", 50, 0)
+    first, second = before[:2]
+    session = EditSession(db)
+    session.delete_entry(*first[:4], race=first[6])
+    session.update_entry(*second[:4], *second[:4], "Ducati", "IT", original_race=second[6])
+    session.insert_entry(2031, "Mugello", "MotoGP", "Rider A", "", "")
+    session_id = session.commit()
+    assert db.get_entry(*first[:4], first[6]) is None
+    db.rollback_session(session_id)
+    assert db.select_entries_window("", "All", 50, 0) == before
+    assert db.get_entry(2031, "Mugello", "MotoGP", "Rider A") is None
+    with pytest.raises(Exception):
+        db.rollback_session(session_id)
+
+
+def test_layout_is_rebuilt_when_the_source_changes(db):
+    session = EditSession(db)
+    session.insert_entry(2031, "Mugello", "MotoGP", "Rider A", "", "")
+    total = db.count_entries()
+    assert session.count_entries() == total + 1
+    assert session.select_entries_window("", "All", 1, 0)[0][3] == "Rider A"
+    db.insert_entry(2032, "Mugello", "MotoGP", "Rider B", "", "")
+    assert session.count_entries() == total + 2
+    assert [row[:4] for row in session.select_entries_window("", "All", 2, 0)] == [
+        (2032, "Mugello", "MotoGP", "Rider B"), (2031, "Mugello", "MotoGP", "Rider A")]
+    assert session.position_of((2031, "Mugello", "MotoGP", "Rider A", None, None, 1)) == 1
@@ -0,0 +1,25 @@
+import logging
+
+import pytest
+
+from instrumentation import DEFAULT_SLOW_QUERY_MS, SLOW_QUERY_ENV, QueryStats, default_slow_query_ms
+
+
+def test_slow_query_threshold_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv(SLOW_QUERY_ENV, "25.5")
+    assert default_slow_query_ms() == 25.5
+    assert QueryStats().slow_query_ms == 25.5
+    assert QueryStats(slow_query_ms=7).slow_query_ms == 7
+
+
+def test_unset_threshold_uses_the_default(monkeypatch):
+    monkeypatch.delenv(SLOW_QUERY_ENV, raising=False)
+    assert QueryStats().slow_query_ms == DEFAULT_SLOW_QUERY_MS
+
+
+@pytest.mark.parametrize("raw", ["fast", "-5", "nan", "100ms"])
+def test_bad_threshold_falls_back_with_a_warning(monkeypatch, caplog, raw):
+    monkeypatch.setenv(SLOW_QUERY_ENV, raw)
+    with caplog.at_level(logging.WARNING, logger="motogp.queries"):
+        assert QueryStats().slow_query_ms == DEFAULT_SLOW_QUERY_MS
+    assert SLOW_QUERY_ENV in caplog.text
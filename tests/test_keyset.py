@@ -0,0 +1,50 @@
+import pytest
+
+from queries import SORT_COLUMNS, sort_terms, sort_values
+
+ORDERS = [((column, descending),) for column in SORT_COLUMNS for descending in (False, True)]
+FILTERS = [("", "All"), ("", "MotoGP"), ("rossi", "All"), ("hond", "All")]
+ORDER_IDS = ["-".join(f"{column}{' desc' if descending else ''}" for column, descending in order) for order in ORDERS]
+
+
+def offset_rows(db, search_term, category_filter, limit, offset, order):
+    return db._read(*db.window_query(search_term, category_filter, limit, offset, order))
+
+
+@pytest.fixture
+def small_stride(db):
+    db.landmark_stride = 7
+    return db
+
+
+@pytest.mark.parametrize("search_term, category_filter", FILTERS)
+@pytest.mark.parametrize("order", ORDERS, ids=ORDER_IDS)
+def test_seek_matches_offset(small_stride, search_term, category_filter, order):
+    db = small_stride
+    total = db.count_entries(search_term, category_filter)
+    terms = sort_terms(order)
+    # Far jumps first, so landmarks are extended both from scratch and from the last one known.
+    for offset in sorted({total - 1, total // 2, 6, 7, 8, 20, total, total + 5}, reverse=True):
+        expected = offset_rows(db, search_term, category_filter, 1, offset, order)
+        key = db.sort_key_at(search_term, category_filter, offset, order)
+        assert key == (tuple(sort_values(expected[0], terms)) if expected else None), offset
+        assert db.select_entries_window(search_term, category_filter, 5, offset, order) == \
+            offset_rows(db, search_term, category_filter, 5, offset, order), offset
+
+
+def test_landmarks_follow_data_changes(small_stride):
+    db = small_stride
+    order = (("Rider", False),)
+    before = db.select_entries_window("", "All", 3, 500, order)
+    first = db.select_entries_window("", "All", 1, 0, order)[0]
+    db.delete_entry(*first[:4], race=first[6])
+    assert db.select_entries_window("", "All", 3, 500, order) == offset_rows(db, "", "All", 3, 500, order)
+    assert db.select_entries_window("", "All", 3, 500, order)[0] == before[1]
+
+
+def test_landmark_sets_are_bounded(small_stride):
+    db = small_stride
+    db.max_landmark_sets = 3
+    for column in SORT_COLUMNS:
+        db.sort_key_at("", "All", 100, ((column, False),))
+    assert len(db._landmarks) == 3
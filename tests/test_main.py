@@ -0,0 +1,33 @@
+import sqlite3
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from main import MotoGPApp
+from migrations import run_migrations
+
+
+def opened(qapp, db_name, in_memory=False):
+    window = MotoGPApp(db_name, in_memory=in_memory)
+    loop = QEventLoop()
+    window.ready.connect(loop.quit)
+    QTimer.singleShot(10000, loop.quit)
+    loop.exec_()
+    assert window.db_manager is not None
+    return window
+
+
+def test_empty_snapshot_backs_the_grid(qapp, tmp_path):
+    db_name = str(tmp_path / "empty.db")
+    conn = sqlite3.connect(db_name)
+    run_migrations(conn)
+    conn.close()
+    window = opened(qapp, db_name, in_memory=True)
+    try:
+        assert len(window.snapshot) == 0
+        assert window.table_model.source is window.snapshot
+        window.db_manager.insert_entry(2031, "Mugello", "MotoGP", "Rider A", "", "")
+        assert len(window.snapshot) == 1
+        assert window.table_model.total_rows() == 1
+        assert window.table_model.row_at(0)[3] == "Rider A"
+    finally:
+        window.close()
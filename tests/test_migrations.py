@@ -0,0 +1,155 @@
+import shutil
+import sqlite3
+
+import bulk_io
+from conftest import SHIPPED_DATABASE
+from database import DatabaseManager
+from migrations import (
+    FACT_TABLE, MIGRATIONS, REKEY_TABLE, REPEATED_TABLE, SEARCH_TABLE, _create_winners_table, run_migrations,
+    schema_version,
+)
+
+
+def seeded(path, rows):
+    conn = sqlite3.connect(path)
+    _create_winners_table(conn)
+    conn.executemany("""
+        INSERT INTO grand_prix_race_winners (Season, Circuit, Class, Rider, Constructor, Country)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    return conn
+
+
+def test_fresh_file_starts_from_the_shipped_schema(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    assert run_migrations(conn) == len(MIGRATIONS)
+    assert conn.execute("SELECT COUNT(*) FROM grand_prix_race_winners").fetchone()[0] == 0
+
+
+def test_class_name_collisions_are_kept_as_further_races(tmp_path):
+    conn = seeded(tmp_path / "collide.db", [
+        (2020, "Mugello", "MotoGP", "Rider A", "Ducati", "IT"),
+        (2020, "Mugello", "MotoGP™", "Rider A", "Ducati", "IT"),
+        (2020, "Mugello", "Moto2™", "Rider B", None, None),
+    ])
+    run_migrations(conn)
+    assert schema_version(conn) == len(MIGRATIONS)
+    assert conn.execute("""
+        SELECT Season, Circuit, Class, Rider, Race FROM grand_prix_race_winners ORDER BY Class, Race
+    """).fetchall() == [
+        (2020, "Mugello", "Moto2", "Rider B", 1),
+        (2020, "Mugello", "MotoGP", "Rider A", 1),
+        (2020, "Mugello", "MotoGP", "Rider A", 2),
+    ]
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (REPEATED_TABLE,)).fetchone() is None
+
+
+def test_empty_constructor_and_country_are_stored_as_null(db):
+    changes = []
+    db.add_change_listener(lambda change, old_row, new_row: changes.append(new_row))
+    db.insert_entry(2031, "Mugello", "MotoGP", "Rider A", "", "")
+    db.update_entry(2031, "Mugello", "MotoGP", "Rider A", 2031, "Mugello", "MotoGP", "Rider B", "", "")
+    stored = db.get_entry(2031, "Mugello", "MotoGP", "Rider B")
+    assert stored == (2031, "Mugello", "MotoGP", "Rider B", None, None, 1)
+    assert changes[-1] == stored
+    assert db.select_entries_window("", "All", 1, 0)[0] == stored
+
+
+def winners(rows):
+    # (Season, Circuit, Class, Rider, Constructor, Country), as stored from migration 7 on.
+    return sorted((season, circuit, class_name.replace("™", "").strip(), rider, constructor or None, country or None)
+                  for season, circuit, class_name, rider, constructor, country in rows)
+
+
+def test_view_returns_the_rows_from_before_normalization(tmp_path):
+    path = tmp_path / "motogp_database.db"
+    shutil.copyfile(SHIPPED_DATABASE, path)
+    conn = sqlite3.connect(path)
+    run_migrations(conn, MIGRATIONS[:6])
+    columns = "Season, Circuit, Class, Rider, Constructor, Country"
+    before = winners(conn.execute(f"SELECT {columns} FROM grand_prix_race_winners"))
+    searched = winners(conn.execute(f"""
+        SELECT {columns} FROM grand_prix_race_winners
+        WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH 'rossi*')
+    """))
+    held = winners(conn.execute(f"SELECT {columns} FROM {REPEATED_TABLE}"))
+    conn.close()
+
+    db = DatabaseManager(str(path))
+    try:
+        rows = db.select_all_entries()
+        assert winners(row[:6] for row in rows if row[6] == 1) == before
+        assert winners(row[:6] for row in rows if row[6] > 1) == held
+        assert winners(row[:6] for row in db.select_all_entries("rossi") if row[6] == 1) == searched
+    finally:
+        db.close()
+
+
+def test_view_writes_reach_the_fact_and_dimension_tables(db):
+    conn = db.pool.writer
+    db.insert_entry(2031, "New Circuit", "MotoGP", "Xavi Quill", "New Constructor", "NC")
+    fact = conn.execute(f"""
+        SELECT c.name, r.name, k.name, n.code FROM {FACT_TABLE} w
+        JOIN circuits c USING (circuit_id) JOIN riders r USING (rider_id)
+        JOIN constructors k USING (constructor_id) JOIN countries n USING (country_id)
+        WHERE w.season = 2031
+    """).fetchall()
+    assert fact == [("New Circuit", "Xavi Quill", "New Constructor", "NC")]
+    assert [row[:4] for row in db.select_all_entries("quill")] == [(2031, "New Circuit", "MotoGP", "Xavi Quill")]
+
+    db.update_entry(2031, "New Circuit", "MotoGP", "Xavi Quill", 2031, "New Circuit", "MotoGP", "Yann Quark", "", "")
+    assert db.get_entry(2031, "New Circuit", "MotoGP", "Yann Quark") == \
+        (2031, "New Circuit", "MotoGP", "Yann Quark", None, None, 1)
+    assert conn.execute(f"SELECT constructor_id, country_id FROM {FACT_TABLE} WHERE season = 2031").fetchall() == \
+        [(0, 0)]
+    assert db.select_all_entries("quill") == []
+
+    db.delete_entry(2031, "New Circuit", "MotoGP", "Yann Quark")
+    assert conn.execute(f"SELECT COUNT(*) FROM {FACT_TABLE} WHERE season = 2031").fetchone()[0] == 0
+    assert db.select_all_entries("quark") == []
+
+
+def test_bisecting_one_gap_respaces_the_dimension(db):
+    conn = db.pool.writer
+
+    def circuit_keys():
+        return dict(conn.execute("SELECT name, circuit_id FROM circuits"))
+
+    def reference_names():
+        return conn.execute("""
+            SELECT rowid, (SELECT name FROM circuits c WHERE c.circuit_id = e.circuit_id)
+            FROM grand_prix_events_held e ORDER BY rowid
+        """).fetchall()
+
+    keys, references = circuit_keys(), reference_names()
+    rows = db.select_all_entries()
+    first, following = sorted(keys)[:2]
+    # Every new name sorts just after the previous one, halving the remaining gap.
+    names = [first + " " + "a" * count for count in range(1, 31)]
+    assert names[-1] < following
+    for name in names:
+        db.insert_entry(2031, name, "MotoGP", "Rider A", "", "")
+
+    moved = circuit_keys()
+    assert any(moved[name] != key for name, key in keys.items())
+    assert sorted(moved, key=moved.get) == sorted(moved)
+    assert reference_names() == references
+    assert [row for row in db.select_all_entries() if row[0] != 2031] == rows
+    assert sorted(row[1] for row in db.select_all_entries("", "All") if row[0] == 2031) == names
+    assert conn.execute(f"SELECT COUNT(*) FROM {REKEY_TABLE}").fetchone()[0] == 0
+    assert [row[1] for row in db.select_all_entries(names[-1])] == [names[-1]]
+
+
+def test_migrations_leave_vacuum_to_bulk_io(tmp_path):
+    path = tmp_path / "motogp_database.db"
+    shutil.copyfile(SHIPPED_DATABASE, path)
+    conn = sqlite3.connect(path)
+    run_migrations(conn)
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    assert free_pages > 0
+    conn.close()
+    assert bulk_io.main(["--db", str(path), "vacuum"]) == 0
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,47 @@
+import pytest
+
+from migrations import query_plan
+from queries import SORT_COLUMNS, sort_terms, sort_values
+
+ORDERS = [((column, descending),) for column in SORT_COLUMNS for descending in (False, True)]
+FILTERS = [("", "All"), ("", "MotoGP")]
+SEARCHES = [("rossi", "All"), ("marq hond", "MotoGP")]
+ORDER_IDS = ["-".join(f"{column}{' desc' if descending else ''}" for column, descending in order) for order in ORDERS]
+
+
+def assert_indexed(db, sql, params):
+    plan = query_plan(db.pool.writer, sql, params)
+    assert any("USING" in step and "INDEX" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert not any(step.startswith("SCAN w") and "INDEX" not in step for step in plan), plan
+
+
+def test_migration_keeps_every_shipped_row(db):
+    assert db.count_entries() == 3085
+    assert db.pool.writer.execute("SELECT COUNT(*) FROM grand_prix_race_winners WHERE Race > 1").fetchone()[0] == 9
+
+
+@pytest.mark.parametrize("search_term, category_filter", FILTERS)
+@pytest.mark.parametrize("order", ORDERS, ids=ORDER_IDS)
+def test_listing_and_seek_use_an_index(db, search_term, category_filter, order):
+    assert_indexed(db, *db.window_query(search_term, category_filter, 200, 0, order))
+    row = db.select_entries_window(search_term, category_filter, 1, 0, order)
+    if row:
+        after = sort_values(row[0], sort_terms(order))
+        assert_indexed(db, *db.window_query(search_term, category_filter, 200, order=order, after=after))
+
+
+@pytest.mark.parametrize("search_term, category_filter", SEARCHES)
+@pytest.mark.parametrize("order", ORDERS, ids=ORDER_IDS)
+def test_search_is_driven_by_the_full_text_index(db, search_term, category_filter, order):
+    # Only the matching rows are looked up and sorted, never the whole table.
+    plan = query_plan(db.pool.writer, *db.window_query(search_term, category_filter, 200, 0, order))
+    assert any("VIRTUAL TABLE INDEX" in step for step in plan), plan
+    assert "SEARCH w USING INTEGER PRIMARY KEY (rowid=?)" in plan, plan
+
+
+@pytest.mark.parametrize("search_term, category_filter", FILTERS + SEARCHES)
+def test_count_uses_an_index(db, search_term, category_filter):
+    plan = query_plan(db.pool.writer, *db.count_query(search_term, category_filter))
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert any("INDEX" in step for step in plan), plan
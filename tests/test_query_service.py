@@ -0,0 +1,93 @@
+import json
+import socket
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from database import DatabaseManager
+from query_service import make_server
+
+
+@pytest.fixture
+def service(db):
+    server = make_server(db, port=0, request_timeout=0.5)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def get(server, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}{path}") as response:
+        return response.status, json.load(response)
+
+
+def test_concurrent_requests_share_fixed_workers_and_connections(service, db):
+    threads_before = threading.active_count()
+    totals = []
+
+    def request(offset):
+        totals.append(get(service, f"/entries?search=rossi&sort=Rider&limit=5&offset={offset}")[1]["total"])
+
+    clients = [threading.Thread(target=request, args=(offset,)) for offset in range(60)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    assert totals == [totals[0]] * 60
+    assert threading.active_count() == threads_before
+    assert db.pool._idle.qsize() <= db.pool.max_readers
+
+
+def test_idle_connections_do_not_starve_requests(service, db):
+    idle = [socket.create_connection(("127.0.0.1", service.server_port)) for _ in range(db.pool.max_readers + 1)]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{service.server_port}/entries?limit=1", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        for connection in idle:
+            connection.close()
+
+
+def test_search_returns_ranked_entries(service, db):
+    status, body = get(service, "/search?q=rossi&class=MotoGP&limit=5")
+    assert status == 200
+    assert body["limit"] == 5
+    assert [tuple(entry.values()) for entry in body["entries"]] == db.select_ranked_entries("rossi", "MotoGP", 5)
+    assert error_of(service, "/search?q=")[0] == 400
+
+
+def error_of(server, path):
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        get(server, path)
+    return raised.value.code, json.load(raised.value)
+
+
+def test_sqlite_errors_are_answered_as_database_errors(service, db, monkeypatch):
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db.query_stats, "execute", fail)
+    status, body = error_of(service, "/classes")
+    assert status == 500
+    assert "disk I/O error" in body["error"]
+
+
+def test_unexpected_errors_are_answered_with_500(service, monkeypatch):
+    def fail(params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(service.RequestHandlerClass.service.routes, "/classes", fail)
+    assert error_of(service, "/classes") == (500, {"error": "Internal server error"})
+
+
+def test_reference_tables_are_optional(tmp_path):
+    db = DatabaseManager(str(tmp_path / "fresh.db"))
+    assert db.get_circuit_facts("Mugello") == (None, 0)
+    assert db.get_constructor_titles("Honda") == 0
+    db.close()
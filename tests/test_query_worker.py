@@ -0,0 +1,70 @@
+import shutil
+import sqlite3
+
+import pytest
+
+import query_worker
+from database import DatabaseManager
+from query_worker import DatabaseLoadTask
+
+
+@pytest.fixture
+def database_path(migrated_database, tmp_path):
+    path = tmp_path / "motogp_database.db"
+    shutil.copyfile(migrated_database, path)
+    return str(path)
+
+
+def is_closed(db_manager):
+    try:
+        db_manager.pool.writer.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def run_load(task):
+    loaded = []
+    task.signals.loaded.connect(lambda db_manager, total, first_page: loaded.append(db_manager))
+    task.run()
+    return loaded
+
+
+def test_claimed_manager_belongs_to_the_receiver(database_path):
+    task = DatabaseLoadTask(database_path)
+    [db_manager] = run_load(task)
+    assert task.claim(db_manager)
+    assert task.cancel() is None
+    assert not is_closed(db_manager)
+    db_manager.close()
+
+
+def test_cancel_hands_back_an_unclaimed_manager(database_path):
+    task = DatabaseLoadTask(database_path)
+    [db_manager] = run_load(task)
+    assert task.cancel() is db_manager
+    assert not task.claim(db_manager)
+    db_manager.close()
+
+
+def test_manager_opened_after_cancel_is_closed(database_path, monkeypatch):
+    opened = []
+
+    def open_manager(db_name):
+        opened.append(DatabaseManager(db_name))
+        return opened[-1]
+
+    monkeypatch.setattr(query_worker, "DatabaseManager", open_manager)
+    task = DatabaseLoadTask(database_path)
+    assert task.cancel() is None
+    assert run_load(task) == []
+    assert is_closed(opened[0])
+
+
+def test_cancelled_load_does_not_report_failures(tmp_path):
+    task = DatabaseLoadTask(str(tmp_path / "missing" / "motogp_database.db"))
+    failures = []
+    task.signals.failed.connect(failures.append)
+    task.cancel()
+    task.run()
+    assert failures == []
@@ -0,0 +1,62 @@
+import pytest
+
+from migrations import rider_name_key
+
+
+def test_name_key_folds_accents_case_and_word_order():
+    assert rider_name_key("Marc Márquez") == rider_name_key("marc marquez") == rider_name_key("MARQUEZ Marc")
+    assert rider_name_key("Alex Márquez") != rider_name_key("Marc Márquez")
+    assert rider_name_key(None) == ""
+
+
+@pytest.mark.parametrize("name", ["Marc Márquez", "marc marquez", "MARQUEZ Marc", "Marc Marquez"])
+def test_spellings_resolve_to_the_same_rider(db, name):
+    rider_id = db.resolve_rider("Marc Marquez")
+    assert rider_id is not None
+    assert db.resolve_rider(name) == rider_id
+    assert db.resolve_rider("Alex Marquez") != rider_id
+    assert db.get_rider_profile(name).name == "Marc Marquez"
+
+
+def test_unknown_rider_has_no_profile(db):
+    assert db.resolve_rider("Nobody Atall") is None
+    assert db.get_rider_profile("Nobody Atall") is None
+
+
+def test_riders_info_spelling_gives_the_career_figures(db):
+    profile = db.get_rider_profile("AGOSTINI Giacomo")
+    assert profile.name == "Giacomo Agostini"
+    assert profile.championships == 15
+    assert profile.wins == db.count_entries("Giacomo Agostini")
+
+
+def test_rider_only_in_riders_info_is_resolved_by_a_first_win(db):
+    db.pool.writer.execute("""
+        INSERT INTO riders_info ("Riders All Time in All Classes", Victories, "World Championships")
+        VALUES ('NÉWMAN Paul', 1, 2)
+    """)
+    db.pool.writer.commit()
+    assert db.get_rider_profile("NÉWMAN Paul") is None
+    db.apply_changes([(None, (2031, "Mugello", "MotoGP", "Paul Newman", None, None, 1))])
+    profile = db.get_rider_profile("NÉWMAN Paul")
+    assert (profile.name, profile.wins, profile.championships) == ("Paul Newman", 1, 2)
+
+
+def test_profile_memo_follows_applied_changes(db):
+    profile = db.get_rider_profile("Marc Marquez")
+    assert db.get_rider_profile("Marc Marquez") is profile
+    wins = profile.wins
+    inserted = (2031, "Mugello", "MotoGP", "Marc Marquez", "Honda", "ES", 1)
+
+    db.apply_changes([(None, inserted)])
+    assert db.get_rider_profile("Marc Marquez").wins == wins + 1
+    assert dict(db.get_rider_profile("Marc Marquez").wins_by_season)[2031] == 1
+
+    moved = inserted[:3] + ("Alex Marquez",) + inserted[4:]
+    alex_wins = db.get_rider_profile("Alex Marquez").wins
+    db.apply_changes([(inserted, moved)])
+    assert db.get_rider_profile("Marc Marquez").wins == wins
+    assert db.get_rider_profile("Alex Marquez").wins == alex_wins + 1
+
+    db.apply_changes([(moved, None)])
+    assert db.get_rider_profile("Alex Marquez").wins == alex_wins
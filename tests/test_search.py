@@ -0,0 +1,24 @@
+def test_ranked_search_returns_the_matches_best_first(db):
+    matches = db.select_all_entries("valentino")
+    ranked = db.select_ranked_entries("valentino", limit=len(matches) + 10)
+    assert sorted(ranked) == sorted(matches)
+    assert len(db.select_ranked_entries("valentino", limit=3)) == 3
+    # A row naming "valentino" in three columns outranks the rows naming it once.
+    db.insert_entry(2031, "Valentino Circuit", "MotoGP", "Valentino Valentino", "Valentino", "")
+    assert db.select_ranked_entries("valentino", limit=1)[0][:4] == \
+        (2031, "Valentino Circuit", "MotoGP", "Valentino Valentino")
+
+
+def test_ranked_search_folds_accents_and_prefixes(db):
+    assert sorted(db.select_ranked_entries("márq", limit=1000)) == sorted(db.select_all_entries("marq"))
+    assert db.select_ranked_entries("márq", limit=1000)
+
+
+def test_ranked_search_keeps_to_the_class(db):
+    ranked = db.select_ranked_entries("marquez", "Moto2", limit=1000)
+    assert ranked
+    assert sorted(ranked) == sorted(db.select_all_entries("marquez", "Moto2"))
+
+
+def test_ranked_search_without_words_is_the_first_page(db):
+    assert db.select_ranked_entries(" ", limit=5) == db.select_entries_window("", "All", 5, 0)
@@ -0,0 +1,50 @@
+import os
+
+from startup import FirstPaintCache
+
+VIEW = ("rossi", "MotoGP", (("Rider", True),), 3, [(2009, "Mugello", "MotoGP", "Valentino Rossi", "Yamaha", "IT", 1)])
+
+
+def test_saved_view_is_loaded(tmp_path):
+    db_name = str(tmp_path / "motogp_database.db")
+    with open(db_name, "wb") as handle:
+        handle.write(b"data")
+    FirstPaintCache(db_name).save(*VIEW)
+    assert FirstPaintCache(db_name).load() == {
+        "search_term": "rossi",
+        "class_filter": "MotoGP",
+        "order": (("Rider", True),),
+        "total": 3,
+        "rows": VIEW[4],
+    }
+
+
+def test_rows_are_capped(tmp_path):
+    db_name = str(tmp_path / "motogp_database.db")
+    cache = FirstPaintCache(db_name, max_rows=2)
+    cache.save("", "All", (), 5, [(season,) for season in range(5)])
+    assert cache.load()["rows"] == [(0,), (1,)]
+
+
+def test_view_is_dropped_once_the_database_changes(tmp_path):
+    db_name = str(tmp_path / "motogp_database.db")
+    with open(db_name, "wb") as handle:
+        handle.write(b"data")
+    cache = FirstPaintCache(db_name)
+    cache.save(*VIEW)
+    with open(db_name, "ab") as handle:
+        handle.write(b"more")
+    assert cache.load() is None
+    cache.save(*VIEW)
+    with open(db_name + "-wal", "wb") as handle:
+        handle.write(b"wal")
+    assert cache.load() is None
+
+
+def test_missing_or_corrupt_file_loads_nothing(tmp_path):
+    cache = FirstPaintCache(str(tmp_path / "motogp_database.db"))
+    assert cache.load() is None
+    with open(cache.path, "w", encoding="utf-8") as handle:
+        handle.write("{not json")
+    assert cache.load() is None
+    assert not os.path.exists(cache.path + ".tmp")
@@ -0,0 +1,83 @@
+import pytest
+from PyQt5.QtCore import Qt
+
+from columnar_snapshot import ColumnarSnapshot
+from table_model import RaceWinnersTableModel
+
+
+def test_sorting_before_a_source_is_attached(qapp, db):
+    cached = db.select_entries_window("", "All", 3, 0)
+    model = RaceWinnersTableModel(None, page_size=2)
+    model.apply_results("", "All", len(cached), cached[:2])
+    assert model.row_at(1) == cached[1]
+    assert model.row_at(2) is None
+    model.sort(3, Qt.AscendingOrder)
+    assert model.order() == (("Rider", False),)
+    assert model.data(model.index(0, 0)) is not None
+    assert model.row_at(0) is None
+    model.source = db
+    model.refresh()
+    assert [model.row_at(row) for row in range(3)] == db.select_entries_window("", "All", 3, 0, model.order())
+
+
+VIEWS = [
+    ("", "All", ()),
+    ("rossi", "All", (("Season", False),)),
+    ("", "MotoGP", (("Rider", True), ("Circuit", False))),
+    ("mugello", "All", (("Constructor", False),)),
+]
+ROSSI = (2031, "Mugello", "MotoGP", "Valentino Rossi", "Yamaha", "IT")
+
+
+def changes(db, row):
+    # (description, write) pairs applied in order.
+    return [
+        ("insert", lambda: db.insert_entry(*ROSSI)),
+        ("insert elsewhere", lambda: db.insert_entry(1950, "Assen", "Moto2", "Rider A", "", "")),
+        ("move", lambda: db.update_entry(*ROSSI[:4], 1960, *ROSSI[1:])),
+        ("change in place", lambda: db.update_entry(1960, *ROSSI[1:4], 1960, *ROSSI[1:4], "Honda", "IT")),
+        ("move out of view", lambda: db.update_entry(1960, *ROSSI[1:4], 1960, "Assen", "Moto3", "Rider B", "", "")),
+        ("move into view", lambda: db.update_entry(1950, "Assen", "Moto2", "Rider A", 1950, *ROSSI[1:])),
+        ("delete", lambda: db.delete_entry(*row[:4], race=row[6])),
+        ("delete last", lambda: db.delete_entry(1950, *ROSSI[1:4])),
+    ]
+
+
+@pytest.mark.parametrize("in_memory", [False, True], ids=["database", "snapshot"])
+@pytest.mark.parametrize("search_term, class_filter, order", VIEWS)
+def test_patched_model_matches_a_fresh_query(qapp, db, in_memory, search_term, class_filter, order):
+    source = db
+    if in_memory:
+        source = ColumnarSnapshot.from_database(db)
+        db.add_change_listener(source.apply_change)
+    model = RaceWinnersTableModel(source, page_size=50, fetch_size=100)
+    model.set_order(order)
+    model.set_filter(search_term, class_filter)
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    db.add_change_listener(lambda change, old_row, new_row: model.apply_change(old_row, new_row))
+    row = db.select_entries_window(search_term, class_filter, 1, 5, order)[0]
+
+    for description, write in changes(db, row):
+        loaded = model.rowCount()
+        write()
+        total = db.count_entries(search_term, class_filter)
+        assert model.total_rows() == total, description
+        assert abs(model.rowCount() - loaded) <= 1, description
+        assert [model.row_at(index) for index in range(total)] == \
+            db.select_entries_window(search_term, class_filter, total, 0, order), description
+        while model.canFetchMore():
+            model.fetchMore()
+        assert model.rowCount() == total, description
+    assert resets == []
+
+
+def test_fetch_more_is_ignored_during_a_row_change(qapp, db):
+    model = RaceWinnersTableModel(db, page_size=7, fetch_size=20)
+    model.set_filter("mugello", "All")
+    model.rowsAboutToBeInserted.connect(lambda: model.fetchMore())
+    db.add_change_listener(lambda change, old_row, new_row: model.apply_change(old_row, new_row))
+    db.insert_entry(*ROSSI)
+    assert model.rowCount() == 21
+    model.fetchMore()
+    assert model.rowCount() == 41
@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import assert_derived_data_current
+
+ADDED = (2031, "Mugello", "MotoGP", "Rider A", "Ducati", "IT")
+
+
+def insert(db, row):
+    db.insert_entry(*ADDED)
+
+
+def move_between_riders(db, row):
+    db.update_entry(*row[:4], *row[:3], "Rider A", *row[4:6], original_race=row[6])
+
+
+def move_between_classes(db, row):
+    db.update_entry(*row[:4], row[0], row[1], "Moto3" if row[2] != "Moto3" else "Moto2", *row[3:6],
+                    original_race=row[6])
+
+
+def delete(db, row):
+    db.delete_entry(*row[:4], race=row[6])
+
+
+@pytest.mark.parametrize("change", [insert, move_between_riders, move_between_classes, delete])
+def test_summary_matches_a_recount_after_each_write(db, change):
+    row = db.select_entries_window("rossi", "MotoGP", 1, 0)[0]
+    wins = db.pool.writer.execute("""
+        SELECT wins FROM win_summary WHERE dimension = 'rider' AND value = ? AND Season = 0 AND Class = 'All'
+    """, (row[3],)).fetchone()[0]
+    change(db, row)
+    assert_derived_data_current(db.pool.writer)
+    after = db.pool.writer.execute("""
+        SELECT wins FROM win_summary WHERE dimension = 'rider' AND value = ? AND Season = 0 AND Class = 'All'
+    """, (row[3],)).fetchone()[0]
+    assert after == wins - (change in (move_between_riders, delete))
+
+
+def test_last_win_removes_the_summary_rows(db):
+    db.insert_entry(*ADDED)
+    db.delete_entry(*ADDED[:4])
+    assert db.pool.writer.execute("SELECT COUNT(*) FROM win_summary WHERE value = 'Rider A'").fetchone()[0] == 0
+    assert_derived_data_current(db.pool.writer)
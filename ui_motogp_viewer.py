@@ -45,7 +45,7 @@ class Ui_MainWindow(object):
         self.input_fields_layout.addWidget(self.class_label)
         self.class_input = QtWidgets.QComboBox(self.data_viewer_tab)
         self.class_input.setObjectName("class_input")
-        self.class_input.addItems(["MotoGP", "Moto2", "Moto3", "500cc", "250cc", "125cc", "350cc", "80cc", "50cc"])
+        self.class_input.addItems(["MotoGP", "Moto2", "Moto3", "MotoE", "500cc", "250cc", "125cc", "350cc", "80cc", "50cc"])
         self.input_fields_layout.addWidget(self.class_input)
 
         # Rider
@@ -74,6 +74,15 @@ class Ui_MainWindow(object):
         self.country_input.setObjectName("country_input")
         self.input_fields_layout.addWidget(self.country_input)
 
+        # Race of the day, for rounds that ran more than one race per class
+        self.race_label = QtWidgets.QLabel(self.data_viewer_tab)
+        self.race_label.setObjectName("race_label")
+        self.input_fields_layout.addWidget(self.race_label)
+        self.race_input = QtWidgets.QSpinBox(self.data_viewer_tab)
+        self.race_input.setRange(1, 9)
+        self.race_input.setObjectName("race_input")
+        self.input_fields_layout.addWidget(self.race_input)
+
         self.form_layout.addLayout(self.input_fields_layout)
 
         self.button_layout = QtWidgets.QVBoxLayout()
@@ -94,19 +103,63 @@ class Ui_MainWindow(object):
         self.clear_form_button = QtWidgets.QPushButton(self.data_viewer_tab)
         self.clear_form_button.setObjectName("clear_form_button")
         self.button_layout.addWidget(self.clear_form_button)
+
+        # Edit session
+        self.session_layout = QtWidgets.QVBoxLayout()
+        self.session_layout.setObjectName("session_layout")
+        self.start_session_button = QtWidgets.QPushButton(self.data_viewer_tab)
+        self.start_session_button.setObjectName("start_session_button")
+        self.session_layout.addWidget(self.start_session_button)
+        self.commit_session_button = QtWidgets.QPushButton(self.data_viewer_tab)
+        self.commit_session_button.setObjectName("commit_session_button")
+        self.session_layout.addWidget(self.commit_session_button)
+        self.discard_session_button = QtWidgets.QPushButton(self.data_viewer_tab)
+        self.discard_session_button.setObjectName("discard_session_button")
+        self.session_layout.addWidget(self.discard_session_button)
+        self.undo_button = QtWidgets.QPushButton(self.data_viewer_tab)
+        self.undo_button.setObjectName("undo_button")
+        self.session_layout.addWidget(self.undo_button)
+        self.redo_button = QtWidgets.QPushButton(self.data_viewer_tab)
+        self.redo_button.setObjectName("redo_button")
+        self.session_layout.addWidget(self.redo_button)
+        self.rollback_session_button = QtWidgets.QPushButton(self.data_viewer_tab)
+        self.rollback_session_button.setObjectName("rollback_session_button")
+        self.session_layout.addWidget(self.rollback_session_button)
+        self.session_layout.addStretch()
+        self.button_layout.addStretch()
         self.form_layout.addLayout(self.button_layout)
+        self.form_layout.addLayout(self.session_layout)
+
+        # Rider profile
+        self.rider_profile_group = QtWidgets.QGroupBox(self.data_viewer_tab)
+        self.rider_profile_group.setObjectName("rider_profile_group")
+        self.rider_profile_layout = QtWidgets.QVBoxLayout(self.rider_profile_group)
+        self.rider_profile_layout.setObjectName("rider_profile_layout")
+        self.rider_profile_label = QtWidgets.QLabel(self.rider_profile_group)
+        self.rider_profile_label.setObjectName("rider_profile_label")
+        self.rider_profile_label.setWordWrap(True)
+        self.rider_profile_layout.addWidget(self.rider_profile_label)
+        self.rider_profile_table = QtWidgets.QTableWidget(self.rider_profile_group)
+        self.rider_profile_table.setObjectName("rider_profile_table")
+        self.rider_profile_table.setColumnCount(3)
+        self.rider_profile_table.setHorizontalHeaderLabels(["Wins by", "Value", "Wins"])
+        self.rider_profile_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.rider_profile_table.verticalHeader().setVisible(False)
+        self.rider_profile_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.rider_profile_layout.addWidget(self.rider_profile_table)
+        self.form_layout.addWidget(self.rider_profile_group, 1)
         self.form_layout.addStretch()
         self.verticalLayout_2.addLayout(self.form_layout)
 
         self.filter_search_layout = QtWidgets.QHBoxLayout()
         self.filter_search_layout.setObjectName("filter_search_layout")
 
-        # Search by Circuit
+        # Search
         self.search_label = QtWidgets.QLabel(self.data_viewer_tab)
         self.search_label.setObjectName("search_label")
         self.filter_search_layout.addWidget(self.search_label)
         self.search_input = QtWidgets.QLineEdit(self.data_viewer_tab)
-        self.search_input.setPlaceholderText("Search by Circuit...")
+        self.search_input.setPlaceholderText("Search circuit, rider, constructor or country...")
         self.search_input.setObjectName("search_input")
         self.filter_search_layout.addWidget(self.search_input)
 
@@ -122,19 +175,98 @@ class Ui_MainWindow(object):
         self.verticalLayout_2.addLayout(self.filter_search_layout)
 
         # Table Display
-        self.data_table = QtWidgets.QTableWidget(self.data_viewer_tab)
+        self.data_table = QtWidgets.QTableView(self.data_viewer_tab)
         self.data_table.setObjectName("data_table")
-        self.data_table.setColumnCount(6) # Season, Circuit, Class, Rider, Constructor, Country
-        self.data_table.setHorizontalHeaderLabels(["Season", "Circuit", "Class", "Rider", "Constructor", "Country"])
         self.data_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
         self.data_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.data_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.data_table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
         self.verticalLayout_2.addWidget(self.data_table)
 
         self.central_widget.addTab(self.data_viewer_tab, "Moto GP Data Viewer")
+
+        # Statistics
+        self.statistics_tab = QtWidgets.QWidget()
+        self.statistics_tab.setObjectName("statistics_tab")
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout(self.statistics_tab)
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+
+        self.stats_filter_layout = QtWidgets.QHBoxLayout()
+        self.stats_filter_layout.setObjectName("stats_filter_layout")
+        self.stats_dimension_label = QtWidgets.QLabel(self.statistics_tab)
+        self.stats_dimension_label.setObjectName("stats_dimension_label")
+        self.stats_filter_layout.addWidget(self.stats_dimension_label)
+        self.stats_dimension_combo = QtWidgets.QComboBox(self.statistics_tab)
+        self.stats_dimension_combo.setObjectName("stats_dimension_combo")
+        self.stats_dimension_combo.addItem("Rider", "rider")
+        self.stats_dimension_combo.addItem("Constructor", "constructor")
+        self.stats_dimension_combo.addItem("Country", "country")
+        self.stats_filter_layout.addWidget(self.stats_dimension_combo)
+        self.stats_season_label = QtWidgets.QLabel(self.statistics_tab)
+        self.stats_season_label.setObjectName("stats_season_label")
+        self.stats_filter_layout.addWidget(self.stats_season_label)
+        self.stats_season_combo = QtWidgets.QComboBox(self.statistics_tab)
+        self.stats_season_combo.setObjectName("stats_season_combo")
+        self.stats_filter_layout.addWidget(self.stats_season_combo)
+        self.stats_class_label = QtWidgets.QLabel(self.statistics_tab)
+        self.stats_class_label.setObjectName("stats_class_label")
+        self.stats_filter_layout.addWidget(self.stats_class_label)
+        self.stats_class_combo = QtWidgets.QComboBox(self.statistics_tab)
+        self.stats_class_combo.setObjectName("stats_class_combo")
+        self.stats_filter_layout.addWidget(self.stats_class_combo)
+        self.stats_filter_layout.addStretch()
+        self.verticalLayout_3.addLayout(self.stats_filter_layout)
+
+        self.stats_tables_layout = QtWidgets.QHBoxLayout()
+        self.stats_tables_layout.setObjectName("stats_tables_layout")
+        self.leaderboard_table = QtWidgets.QTableWidget(self.statistics_tab)
+        self.leaderboard_table.setObjectName("leaderboard_table")
+        self.leaderboard_table.setColumnCount(3)
+        self.leaderboard_table.setHorizontalHeaderLabels(["Name", "Wins", "Titles"])
+        self.leaderboard_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.leaderboard_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.leaderboard_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats_tables_layout.addWidget(self.leaderboard_table)
+        self.win_history_table = QtWidgets.QTableWidget(self.statistics_tab)
+        self.win_history_table.setObjectName("win_history_table")
+        self.win_history_table.setColumnCount(3)
+        self.win_history_table.setHorizontalHeaderLabels(["Season", "Class", "Wins"])
+        self.win_history_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.win_history_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats_tables_layout.addWidget(self.win_history_table)
+        self.verticalLayout_3.addLayout(self.stats_tables_layout)
+
+        # Circuit history
+        self.circuit_history_layout = QtWidgets.QHBoxLayout()
+        self.circuit_history_layout.setObjectName("circuit_history_layout")
+        self.circuit_history_label = QtWidgets.QLabel(self.statistics_tab)
+        self.circuit_history_label.setObjectName("circuit_history_label")
+        self.circuit_history_layout.addWidget(self.circuit_history_label)
+        self.circuit_history_combo = QtWidgets.QComboBox(self.statistics_tab)
+        self.circuit_history_combo.setObjectName("circuit_history_combo")
+        self.circuit_history_combo.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToContents)
+        self.circuit_history_layout.addWidget(self.circuit_history_combo)
+        self.circuit_facts_label = QtWidgets.QLabel(self.statistics_tab)
+        self.circuit_facts_label.setObjectName("circuit_facts_label")
+        self.circuit_history_layout.addWidget(self.circuit_facts_label)
+        self.circuit_history_layout.addStretch()
+        self.verticalLayout_3.addLayout(self.circuit_history_layout)
+        self.circuit_history_table = QtWidgets.QTableWidget(self.statistics_tab)
+        self.circuit_history_table.setObjectName("circuit_history_table")
+        self.circuit_history_table.setColumnCount(7)
+        self.circuit_history_table.setHorizontalHeaderLabels(["Season", "Circuit", "Class", "Rider", "Constructor", "Country", "Race"])
+        self.circuit_history_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.circuit_history_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.verticalLayout_3.addWidget(self.circuit_history_table)
+
+        self.central_widget.addTab(self.statistics_tab, "Statistics")
         self.verticalLayout.addWidget(self.central_widget)
         MainWindow.setCentralWidget(self.centralwidget)
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
         self.statusbar.setObjectName("statusbar")
+        self.session_status_label = QtWidgets.QLabel(self.statusbar)
+        self.session_status_label.setObjectName("session_status_label")
+        self.statusbar.addPermanentWidget(self.session_status_label)
         MainWindow.setStatusBar(self.statusbar)
 
         self.retranslateUi(MainWindow)
@@ -150,11 +282,24 @@ class Ui_MainWindow(object):
         self.rider_label.setText(_translate("MainWindow", "Rider:"))
         self.constructor_label.setText(_translate("MainWindow", "Constructor:"))
         self.country_label.setText(_translate("MainWindow", "Country:"))
+        self.race_label.setText(_translate("MainWindow", "Race:"))
         self.add_entry_button.setText(_translate("MainWindow", "Add Entry"))
         self.update_entry_button.setText(_translate("MainWindow", "Update Entry"))
         self.delete_entry_button.setText(_translate("MainWindow", "Delete Entry"))
         self.clear_form_button.setText(_translate("MainWindow", "Clear Form"))
+        self.start_session_button.setText(_translate("MainWindow", "Start Edit Session"))
+        self.commit_session_button.setText(_translate("MainWindow", "Commit Changes"))
+        self.discard_session_button.setText(_translate("MainWindow", "Discard Changes"))
+        self.undo_button.setText(_translate("MainWindow", "Undo"))
+        self.redo_button.setText(_translate("MainWindow", "Redo"))
+        self.rollback_session_button.setText(_translate("MainWindow", "Roll Back Session..."))
+        self.rider_profile_group.setTitle(_translate("MainWindow", "Rider Profile"))
         self.search_label.setText(_translate("MainWindow", "Search:"))
         self.class_filter_label.setText(_translate("MainWindow", "Filter by Class:"))
         self.central_widget.setTabText(self.central_widget.indexOf(self.data_viewer_tab), _translate("MainWindow", "Moto GP Data Viewer"))
+        self.stats_dimension_label.setText(_translate("MainWindow", "Leaderboard:"))
+        self.stats_season_label.setText(_translate("MainWindow", "Season:"))
+        self.stats_class_label.setText(_translate("MainWindow", "Class:"))
+        self.circuit_history_label.setText(_translate("MainWindow", "Circuit History:"))
+        self.central_widget.setTabText(self.central_widget.indexOf(self.statistics_tab), _translate("MainWindow", "Statistics"))
 